@@ -4,11 +4,48 @@ __all__ = [
     "MemoryCommandType",
     "ProcessResult",
     "JsonStorage",
+    "WalJsonStorage",
+    "SqliteStorage",
+    "ShardedStorage",
+    "MappedStorage",
+    "CachedStorage",
+    "Storage",
+    "open_storage",
     "ACTProcessor",
+    "ACTClient",
 ]
 
 __version__ = "0.1.0"
 
-from .models import ContextBlock, MemoryCommand, MemoryCommandType, ProcessResult
-from .storage import JsonStorage
-from .processor import ACTProcessor
\ No newline at end of file
+# Resolved on first access so `import act.cli` does not pull in every backend
+_EXPORTS = {
+    "ContextBlock": "models",
+    "MemoryCommand": "models",
+    "MemoryCommandType": "models",
+    "ProcessResult": "models",
+    "SqliteStorage": "sqlite_storage",
+    "JsonStorage": "storage",
+    "Storage": "storage",
+    "WalJsonStorage": "storage",
+    "open_storage": "storage",
+    "ShardedStorage": "sharded_storage",
+    "MappedStorage": "mapped_storage",
+    "CachedStorage": "cached_storage",
+    "ACTProcessor": "processor",
+    "ACTClient": "client",
+}
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'act' has no attribute {name!r}")
+    import importlib
+
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .models import ContextBlock
+from .storage import Storage
+
+
+TokenCounter = Callable[[str], int]
+DEFAULT_CACHE_SIZE = 100_000
+DEFAULT_SEARCH_K = 20
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+def approx_token_count(text: str) -> int:
+    """Words and punctuation marks, a rough stand-in for a subword tokenizer."""
+    return len(_TOKEN.findall(text))
+
+
+def block_header(block: ContextBlock) -> str:
+    return f"[{block.id}] {block.summary}"
+
+
+@dataclass
+class AssembledBlock:
+    block: ContextBlock
+    # True if the full content was packed, False if only the summary line fitted
+    full: bool
+    tokens: int
+
+    @property
+    def text(self) -> str:
+        header = block_header(self.block)
+        return f"{header}\n{self.block.content}" if self.full else header
+
+
+@dataclass
+class AssembledContext:
+    budget: int
+    tokens: int = 0
+    conversation: List[str] = field(default_factory=list)
+    blocks: List[AssembledBlock] = field(default_factory=list)
+
+    def render(self) -> str:
+        """Blocks first, then the kept conversation turns, separated by blank lines."""
+        return "\n\n".join([b.text for b in self.blocks] + self.conversation)
+
+
+class ContextAssembler:
+    """Packs the active context window: recent conversation plus the most valuable
+    stored blocks that fit a token budget.
+
+    Token counts of each block's header and content are cached by block id and
+    dropped whenever the store reports the block changed, so stored blocks are
+    tokenized once rather than on every turn. Pass a ``count_tokens`` matching the
+    model's tokenizer for exact budgets.
+    """
+
+    def __init__(
+        self,
+        storage: Storage,
+        count_tokens: TokenCounter = approx_token_count,
+        search: Optional[Callable[[str, int], List[Tuple[ContextBlock, float]]]] = None,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ) -> None:
+        self.storage = storage
+        self.count_tokens = count_tokens
+        self._search = search
+        self._cache: "OrderedDict[str, Tuple[int, int]]" = OrderedDict()
+        self._cache_size = cache_size
+        self._cache_lock = threading.Lock()
+        # Counts being computed, by block id; invalidating an id withdraws its ticket so
+        # a count of the old block is never cached after the change (as in CachedStorage)
+        self._counting: Dict[str, int] = {}
+        self._tickets = 0
+        storage.subscribe(self._invalidate)
+
+    def _invalidate(self, op: str, arg: object = None) -> None:
+        with self._cache_lock:
+            if op == "clear":
+                self._cache.clear()
+                self._counting.clear()
+            else:
+                block_id = arg.id if op == "upsert" else arg  # type: ignore[union-attr]
+                self._cache.pop(block_id, None)  # type: ignore[arg-type]
+                self._counting.pop(block_id, None)  # type: ignore[arg-type]
+
+    def block_tokens(self, block: ContextBlock) -> Tuple[int, int]:
+        """(header, content) token counts for a stored block."""
+        with self._cache_lock:
+            counts = self._cache.get(block.id)
+            if counts is not None:
+                self._cache.move_to_end(block.id)
+                return counts
+            self._tickets += 1
+            ticket = self._counting[block.id] = self._tickets
+        counts = (self.count_tokens(block_header(block)), self.count_tokens(block.content))
+        with self._cache_lock:
+            if self._counting.get(block.id) != ticket:
+                return counts
+            del self._counting[block.id]
+            self._cache[block.id] = counts
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return counts
+
+    def assemble(
+        self,
+        budget: int,
+        conversation: Sequence[str] = (),
+        candidates: Optional[Sequence[ContextBlock]] = None,
+        query: Optional[str] = None,
+        k: int = DEFAULT_SEARCH_K,
+    ) -> AssembledContext:
+        """Fill ``budget`` tokens with the newest conversation turns, then blocks.
+
+        ``conversation`` is oldest first; turns are kept newest first until one no
+        longer fits. ``candidates`` are stored blocks in order of value, best first;
+        if omitted, the ``k`` blocks most similar to ``query`` (or to the newest
+        turn) are used. Each candidate is packed in full if it fits, else as its
+        summary line if that fits, else skipped.
+        """
+        result = AssembledContext(budget=budget)
+        remaining = budget
+        kept: List[str] = []
+        for turn in reversed(conversation):
+            tokens = self.count_tokens(turn)
+            if tokens > remaining:
+                break
+            kept.append(turn)
+            remaining -= tokens
+        result.conversation = kept[::-1]
+
+        if candidates is None:
+            text = query or (conversation[-1] if conversation else "")
+            candidates = [b for b, _ in self._search(text, k)] if text and self._search else []
+        for block in candidates:
+            header, content = self.block_tokens(block)
+            if header + content <= remaining:
+                packed = AssembledBlock(block=block, full=True, tokens=header + content)
+            elif header <= remaining:
+                packed = AssembledBlock(block=block, full=False, tokens=header)
+            else:
+                continue
+            result.blocks.append(packed)
+            remaining -= packed.tokens
+        result.tokens = budget - remaining
+        return result
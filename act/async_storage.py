@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import functools
+import queue
+import threading
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+
+from .models import ContextBlock
+from .storage import Storage
+
+
+DEFAULT_READERS = 4
+DEFAULT_MAX_GROUP = 64
+
+_Job = Tuple[Callable[[], Any], "concurrent.futures.Future[Any]"]
+
+
+class AsyncStorage:
+    """Asyncio facade that keeps blocking storage work off the event loop.
+
+    Reads run on a small bounded thread pool. Writes go through a queue to one
+    dedicated writer thread, which drains whatever has queued up and runs it inside
+    a single ``storage.batch()``, so concurrent writers share one lock acquisition
+    and one flush. Each write also runs in a batch of its own nested in the group,
+    so on a backend that rolls batches back (SQLite) a write that raises discards
+    its partial changes without taking the rest of the group with it. A write's
+    awaitable resolves only after its batch is persisted, so a read issued after
+    awaiting a write always sees it.
+    """
+
+    def __init__(
+        self, storage: Storage, max_readers: int = DEFAULT_READERS, max_group: int = DEFAULT_MAX_GROUP
+    ) -> None:
+        self.storage = storage
+        self._max_group = max_group
+        self._readers = concurrent.futures.ThreadPoolExecutor(max_workers=max_readers, thread_name_prefix="act-reader")
+        self._queue: "queue.Queue[Optional[_Job]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="act-writer", daemon=True)
+        self._writer.start()
+
+    async def read(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, functools.partial(fn, *args, **kwargs))
+
+    async def write(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run ``fn`` on the writer thread as part of the next group commit."""
+        future: "concurrent.futures.Future[Any]" = concurrent.futures.Future()
+        self._queue.put((functools.partial(fn, *args, **kwargs), future))
+        return await asyncio.wrap_future(future)
+
+    async def get_block(self, block_id: str) -> Optional[ContextBlock]:
+        return await self.read(self.storage.get_block, block_id)
+
+    async def get_many(self, block_ids: Sequence[str]) -> List[Optional[ContextBlock]]:
+        return await self.read(self.storage.get_many, block_ids)
+
+    async def list_blocks(self, **kwargs: Any) -> List[ContextBlock]:
+        return await self.read(self.storage.list_blocks, **kwargs)
+
+    async def upsert_block(self, block: ContextBlock) -> ContextBlock:
+        return await self.write(self.storage.upsert_block, block)
+
+    async def put_many(self, blocks: Iterable[ContextBlock]) -> None:
+        await self.write(self.storage.put_many, blocks)
+
+    async def delete_block(self, block_id: str) -> bool:
+        return await self.write(self.storage.delete_block, block_id)
+
+    async def clear(self) -> None:
+        await self.write(self.storage.clear)
+
+    def close(self) -> None:
+        """Finish queued writes and stop the worker threads."""
+        self._queue.put(None)
+        self._writer.join()
+        self._readers.shutdown(wait=True)
+
+    def _write_loop(self) -> None:
+        stopping = False
+        while not stopping:
+            job = self._queue.get()
+            if job is None:
+                return
+            jobs = [job]
+            while len(jobs) < self._max_group:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stopping = True
+                    break
+                jobs.append(job)
+            self._run_group(jobs)
+
+    def _run_group(self, jobs: List[_Job]) -> None:
+        outcomes: List[Tuple["concurrent.futures.Future[Any]", Any, Optional[BaseException]]] = []
+        try:
+            with self.storage.batch():
+                for fn, future in jobs:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with self.storage.batch():
+                            value = fn()
+                        outcomes.append((future, value, None))
+                    except Exception as exc:
+                        outcomes.append((future, None, exc))
+        except Exception as exc:
+            # The commit itself failed, so none of the group is durable
+            outcomes = [(future, None, exc) for future, _, _ in outcomes]
+        for future, value, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(value)
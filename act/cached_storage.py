@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import ContextManager, Dict, Iterable, List, Optional, Sequence
+
+from .models import ContextBlock
+from .storage import Listener, Storage
+
+
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+# Rough per-entry cost of the block object, its strings and the cache slot
+_ENTRY_OVERHEAD = 256
+
+
+def block_weight(block: ContextBlock) -> int:
+    """Approximate bytes a cached block keeps alive."""
+    return _ENTRY_OVERHEAD + len(block.content) + len(block.summary) + len(block.id)
+
+
+class CachedStorage:
+    """A size-bounded LRU cache of hot blocks in front of an on-disk backend.
+
+    ``get_block`` serves the working set from memory; misses read the backend and
+    evict the least recently used blocks until the cached blocks weigh at most
+    ``max_bytes`` (content plus a fixed per-block overhead). Blocks are cached with
+    their content decoded, so a hit costs no disk read or decompression. Listings
+    go straight to the backend and do not disturb the cache.
+
+    Entries are dropped whenever the backend reports a change. Over SQLite, which
+    does not report other processes' writes, a cached block can lag behind them
+    until it is evicted or rewritten here.
+    """
+
+    def __init__(self, backend: Storage, max_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        if max_bytes < 0:
+            raise ValueError("max_bytes must not be negative")
+        self._backend = backend
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, ContextBlock]" = OrderedDict()
+        self._weights: Dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Backend reads in flight, by block id. Invalidating an id withdraws its ticket,
+        # so a miss never caches a block read before a write to it; writes to other
+        # blocks leave the read admissible.
+        self._reads: Dict[str, int] = {}
+        self._tickets = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        backend.subscribe(self._invalidate)
+
+    @property
+    def path(self) -> Path:
+        return self._backend.path
+
+    @property
+    def backend(self) -> Storage:
+        return self._backend
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "blocks": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _invalidate(self, op: str, arg: object = None) -> None:
+        with self._lock:
+            if op == "clear":
+                self._entries.clear()
+                self._weights.clear()
+                self._reads.clear()
+                self._bytes = 0
+            else:
+                block_id = arg.id if op == "upsert" else arg  # type: ignore[union-attr]
+                self._drop(block_id)  # type: ignore[arg-type]
+                self._reads.pop(block_id, None)  # type: ignore[arg-type]
+
+    def _drop(self, block_id: str) -> None:
+        if self._entries.pop(block_id, None) is not None:
+            self._bytes -= self._weights.pop(block_id)
+
+    def _admit(self, block: ContextBlock, ticket: int) -> None:
+        weight = block_weight(block)
+        with self._lock:
+            if self._reads.get(block.id) != ticket:
+                return
+            del self._reads[block.id]
+            if weight > self.max_bytes:
+                return
+            self._drop(block.id)
+            self._entries[block.id] = block
+            self._weights[block.id] = weight
+            self._bytes += weight
+            while self._bytes > self.max_bytes:
+                old_id, _ = self._entries.popitem(last=False)
+                self._bytes -= self._weights.pop(old_id)
+                self.evictions += 1
+
+    def get_block(self, block_id: str) -> Optional[ContextBlock]:
+        return self.get_many([block_id])[0]
+
+    def get_many(self, block_ids: Sequence[str]) -> List[Optional[ContextBlock]]:
+        # Lets JSON-family backends report other processes' writes before we answer
+        self._backend.refresh()
+        found: Dict[str, Optional[ContextBlock]] = {}
+        with self._lock:
+            for block_id in block_ids:
+                block = self._entries.get(block_id)
+                if block is not None:
+                    self._entries.move_to_end(block_id)
+                    self.hits += 1
+                    found[block_id] = block
+                elif block_id not in found:
+                    self.misses += 1
+                    found[block_id] = None
+            missing = [block_id for block_id, block in found.items() if block is None]
+            if missing:
+                self._tickets += 1
+                ticket = self._tickets
+                for block_id in missing:
+                    self._reads[block_id] = ticket
+        if missing:
+            try:
+                for block_id, block in zip(missing, self._backend.get_many(missing)):
+                    if block is None:
+                        continue
+                    block = _decoded(block)
+                    self._admit(block, ticket)
+                    found[block_id] = block
+            finally:
+                with self._lock:
+                    for block_id in missing:
+                        if self._reads.get(block_id) == ticket:
+                            del self._reads[block_id]
+        return [found[block_id] for block_id in block_ids]
+
+    def upsert_block(self, block: ContextBlock) -> ContextBlock:
+        return self._backend.upsert_block(block)
+
+    def put_many(self, blocks: Iterable[ContextBlock]) -> None:
+        self._backend.put_many(blocks)
+
+    def delete_block(self, block_id: str) -> bool:
+        return self._backend.delete_block(block_id)
+
+    def list_blocks(
+        self,
+        query: Optional[str] = None,
+        tag: Optional[str] = None,
+        top_k: Optional[int] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> List[ContextBlock]:
+        return self._backend.list_blocks(
+            query=query, tag=tag, top_k=top_k, limit=limit, cursor=cursor, since=since, until=until
+        )
+
+    def clear(self) -> None:
+        self._backend.clear()
+
+    def batch(self) -> ContextManager[None]:
+        return self._backend.batch()
+
+    def refresh(self) -> None:
+        self._backend.refresh()
+
+    def subscribe(self, listener: Listener) -> None:
+        self._backend.subscribe(listener)
+
+    def close(self) -> None:
+        self._backend.close()
+
+
+def _decoded(block: ContextBlock) -> ContextBlock:
+    if type(block) is ContextBlock:
+        return block
+    # Decode lazily stored content (mapped, compressed) once, not on every hit
+    return ContextBlock(
+        id=block.id,
+        content=block.content,
+        summary=block.summary,
+        type=block.type,
+        timestamp=block.timestamp,
+        tags=list(block.tags),
+    )
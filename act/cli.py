@@ -1,27 +1,113 @@
 from __future__ import annotations
 
+import functools
 import json
 import sys
+import time
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, List, Optional
 
 import typer
-from rich import box
-from rich.console import Console
-from rich.table import Table
 
-from .processor import ACTProcessor
-from .storage import JsonStorage
-from .utils import get_default_store_path
+from .compression import DEFAULT_DICT_SIZE
+from .namespaces import namespace_path, validate_namespace
+from .utils import get_default_store_path, iso_timestamp
 
+if TYPE_CHECKING:
+    from rich.console import Console
+
+    from .models import ContextBlock
+    from .storage import Storage
+
+# Scripts run `act` thousands of times, so rich, the processor and the storage
+# backends are imported by the commands that use them rather than up front.
 app = typer.Typer(add_completion=False, no_args_is_help=True)
-console = Console()
 
 
-def _get_storage(path: Optional[Path]) -> JsonStorage:
-    if path is None:
-        return JsonStorage()
-    return JsonStorage(storage_path=path)
+@functools.lru_cache(maxsize=None)
+def _console() -> "Console":
+    from rich.console import Console
+
+    return Console()
+
+
+def _table(title: str, **kwargs: object):
+    from rich import box
+    from rich.table import Table
+
+    return Table(title=title, box=box.SIMPLE_HEAVY, **kwargs)
+
+
+_namespace: Optional[str] = None
+_remote: Optional[str] = None
+
+
+@app.callback()
+def _options(
+    namespace: Optional[str] = typer.Option(
+        None,
+        "--namespace",
+        "-N",
+        envvar="ACT_NAMESPACE",
+        help="Work on this namespace's store, the one the server serves under /ns/{namespace}.",
+    ),
+    remote: Optional[str] = typer.Option(
+        None,
+        "--remote",
+        envvar="ACT_REMOTE",
+        help="Send process-output, store, retrieve, list, delete, export and import to a running act-server "
+        "(http://host:port or unix:/path/to/act.sock) instead of loading the store.",
+    ),
+) -> None:
+    """Active Context Transformer: manage stored context blocks."""
+    global _namespace, _remote
+    if namespace is not None:
+        try:
+            validate_namespace(namespace)
+        except ValueError as exc:
+            raise typer.BadParameter(str(exc), param_hint="--namespace")
+    _namespace = namespace
+    _remote = remote or None
+
+
+def _store_path(path: Optional[Path]) -> Path:
+    base = path or get_default_store_path()
+    return namespace_path(base, _namespace) if _namespace else base
+
+
+def _get_storage(path: Optional[Path]) -> "Storage":
+    from .storage import open_storage
+
+    if _remote:
+        _console().print("[red]This command works on the store itself; it is not available with --remote.[/red]")
+        raise typer.Exit(code=1)
+    return open_storage(storage_path=_store_path(path))
+
+
+def _client(store_path: Optional[Path]):
+    """An ``ACTClient`` for ``--remote``, or None to work on the store directly."""
+    if not _remote:
+        return None
+    if store_path is not None:
+        raise typer.BadParameter("cannot be combined with --remote", param_hint="--store-path")
+    from .client import ACTClient
+
+    try:
+        return ACTClient(_remote, namespace=_namespace)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc), param_hint="--remote")
+
+
+def _remote_call(fn, *args, **kwargs):
+    from .client import RemoteError
+
+    try:
+        return fn(*args, **kwargs)
+    except RemoteError as exc:
+        _console().print(f"[red]Server error {exc.status}: {exc.detail}[/red]")
+    except OSError as exc:
+        _console().print(f"[red]Could not reach {_remote}: {exc}[/red]")
+    raise typer.Exit(code=1)
 
 
 @app.command()
@@ -31,7 +117,7 @@ def process_output(
     ),
     text: Optional[str] = typer.Option(None, "--text", help="Raw model output text to process. If omitted, reads stdin."),
     json_out: bool = typer.Option(False, "--json", help="Print full JSON result instead of just cleaned text."),
-    store_path: Optional[Path] = typer.Option(None, "--store-path", help="Override path to the JSON storage file."),
+    store_path: Optional[Path] = typer.Option(None, "--store-path", help="Override path to the storage file (.db for SQLite)."),
 ):
     """Process model output, executing MEMORY_CMD directives and printing cleaned text or JSON result."""
     data: str
@@ -42,6 +128,17 @@ def process_output(
     else:
         data = sys.stdin.read()
 
+    client = _client(store_path)
+    if client is not None:
+        payload = _remote_call(client.process_output, data)
+        if json_out:
+            _console().print_json(data=payload)
+        else:
+            _console().print(payload["cleaned_text"])
+        return
+
+    from .processor import ACTProcessor
+
     processor = ACTProcessor(storage=_get_storage(store_path))
     result = processor.process_model_output(data)
 
@@ -50,98 +147,414 @@ def process_output(
             "cleaned_text": result.cleaned_text,
             "stored_blocks": [b.to_dict() for b in result.stored_blocks],
             "retrieved_blocks": [b.to_dict() for b in result.retrieved_blocks],
+            "searched_blocks": [b.to_dict() for b in result.searched_blocks],
             "commands": [vars(c) | {"type": c.type.value} for c in result.commands],
         }
-        console.print_json(data=json.dumps(payload))
+        _console().print_json(data=payload)
     else:
-        console.print(result.cleaned_text)
+        _console().print(result.cleaned_text)
 
 
 @app.command()
 def store(
-    block_id: str = typer.Argument(..., help="Unique id for the context block"),
-    summary: str = typer.Option(..., "--summary", "-s", help="Summary of the content"),
+    block_id: Optional[str] = typer.Argument(None, help="Unique id for the context block"),
+    summary: Optional[str] = typer.Option(None, "--summary", "-s", help="Summary of the content"),
     content_type: str = typer.Option("generic", "--type", "-t", help="Type/category of the content"),
-    content: str = typer.Option(..., "--content", "-c", help="Full content to store"),
+    content: Optional[str] = typer.Option(None, "--content", "-c", help="Full content to store"),
     tags: str = typer.Option("", "--tags", help="Comma-separated tags"),
-    store_path: Optional[Path] = typer.Option(None, "--store-path", help="Override path to the JSON storage file."),
+    from_file: Optional[Path] = typer.Option(
+        None,
+        "--from-file",
+        "-f",
+        exists=True,
+        dir_okay=False,
+        help="Store every block in a JSON array or JSON Lines file of {id, summary, type, content, tags} objects.",
+    ),
+    store_path: Optional[Path] = typer.Option(None, "--store-path", help="Override path to the storage file (.db for SQLite)."),
 ):
-    """Manually store a context block."""
-    storage = _get_storage(store_path)
-    processor = ACTProcessor(storage=storage)
+    """Manually store a context block, or many blocks from a file in one commit."""
+    client = _client(store_path)
+    if from_file is not None:
+        try:
+            blocks = _read_blocks_file(from_file)
+        except (ValueError, KeyError, TypeError) as exc:
+            _console().print(f"[red]Invalid blocks file: {exc}[/red]")
+            raise typer.Exit(code=1)
+        if client is not None:
+            entries = [{k: v for k, v in b.to_dict().items() if k != "timestamp"} for b in blocks]
+            _remote_call(client.put_many, entries)
+        else:
+            _get_storage(store_path).put_many(blocks)
+        _console().print(f"Stored [bold green]{len(blocks)}[/bold green] blocks")
+        return
+    if block_id is None or summary is None or content is None:
+        _console().print("[red]BLOCK_ID, --summary and --content are required unless --from-file is given.[/red]")
+        raise typer.Exit(code=1)
+    if client is not None:
+        tag_list = [t.strip() for t in tags.split(",") if t.strip()]
+        block = {"id": block_id, "summary": summary, "type": content_type, "content": content, "tags": tag_list}
+        _remote_call(client.store, block)
+        _console().print(f"Stored block: [bold green]{block_id}[/bold green]")
+        return
+    from .processor import ACTProcessor
+
+    processor = ACTProcessor(storage=_get_storage(store_path))
     cmd_text = f"STORE|{block_id}|{summary}|{content_type}|{content}|{tags}"
     result = processor.process_model_output(cmd_text)
     if result.stored_blocks:
-        console.print(f"Stored block: [bold green]{block_id}[/bold green]")
+        _console().print(f"Stored block: [bold green]{block_id}[/bold green]")
     else:
-        console.print("No block stored.")
+        _console().print("No block stored.")
+
+
+def _read_blocks_file(path: Path) -> List["ContextBlock"]:
+    from .transfer import block_from_dict, parse_lines
+
+    text = path.read_text(encoding="utf-8")
+    timestamp = iso_timestamp()
+    if not text.lstrip().startswith("["):
+        return list(parse_lines(text.splitlines(), timestamp))
+    blocks = []
+    for index, entry in enumerate(json.loads(text)):
+        try:
+            blocks.append(block_from_dict(entry, timestamp))
+        except (ValueError, KeyError, TypeError) as exc:
+            raise ValueError(f"entry {index}: {exc}") from exc
+    return blocks
 
 
 @app.command()
 def retrieve(
     block_id: str = typer.Argument(..., help="Block id to retrieve"),
-    store_path: Optional[Path] = typer.Option(None, "--store-path", help="Override path to the JSON storage file."),
+    store_path: Optional[Path] = typer.Option(None, "--store-path", help="Override path to the storage file (.db for SQLite)."),
 ):
     """Retrieve a stored context block by id."""
-    storage = _get_storage(store_path)
-    block = storage.get_block(block_id)
-    if not block:
-        console.print(f"[red]No block found with id '{block_id}'.[/red]")
+    client = _client(store_path)
+    if client is not None:
+        found = _remote_call(client.get_block, block_id)
+    else:
+        block = _get_storage(store_path).get_block(block_id)
+        found = block.to_dict() if block else None
+    if not found:
+        _console().print(f"[red]No block found with id '{block_id}'.[/red]")
         raise typer.Exit(code=1)
-    console.print_json(data=json.dumps(block.to_dict()))
+    _console().print_json(data=found)
 
 
 @app.command(name="list")
 def list_blocks(
     query: Optional[str] = typer.Option(None, "--query", "-q", help="Text to search in id, summary, or content"),
     tag: Optional[str] = typer.Option(None, "--tag", help="Filter by tag"),
-    store_path: Optional[Path] = typer.Option(None, "--store-path", help="Override path to the JSON storage file."),
+    top_k: Optional[int] = typer.Option(None, "--top-k", "-k", min=1, help="Show only the k most relevant matches"),
+    limit: Optional[int] = typer.Option(None, "--limit", "-n", min=1, help="Show at most this many blocks"),
+    cursor: Optional[str] = typer.Option(None, "--cursor", help="Resume from a cursor printed by a previous page"),
+    since: Optional[str] = typer.Option(None, "--since", help="Only blocks with timestamp >= this ISO timestamp"),
+    until: Optional[str] = typer.Option(None, "--until", help="Only blocks with timestamp < this ISO timestamp"),
+    store_path: Optional[Path] = typer.Option(None, "--store-path", help="Override path to the storage file (.db for SQLite)."),
 ):
     """List stored context blocks."""
-    storage = _get_storage(store_path)
-    blocks = storage.list_blocks(query=query, tag=tag)
-    table = Table(title="Context Blocks", box=box.SIMPLE_HEAVY)
+    kwargs = dict(query=query, tag=tag, top_k=top_k, limit=limit, cursor=cursor, since=since, until=until)
+    client = _client(store_path)
+    next_cursor: Optional[str] = None
+    if client is not None:
+        # Content is not shown, so leave it out of the response
+        found, next_cursor = _remote_call(client.list_blocks, fields="id,type,summary,tags,timestamp", **kwargs)
+        rows = [(b["id"], b["type"], b["summary"], ", ".join(b["tags"]), b["timestamp"]) for b in found]
+    else:
+        try:
+            blocks = _get_storage(store_path).list_blocks(**kwargs)
+        except ValueError as exc:
+            _console().print(f"[red]{exc}[/red]")
+            raise typer.Exit(code=1)
+        rows = [(b.id, b.type, b.summary, ", ".join(b.tags), b.timestamp) for b in blocks]
+        if top_k is None and limit is not None and len(blocks) == limit:
+            from .pagination import encode_cursor
+
+            next_cursor = encode_cursor(blocks[-1])
+    table = _table("Context Blocks")
     table.add_column("ID")
     table.add_column("Type")
     table.add_column("Summary")
     table.add_column("Tags")
     table.add_column("Timestamp")
-    for b in blocks:
-        table.add_row(b.id, b.type, b.summary, ", ".join(b.tags), b.timestamp)
-    console.print(table)
+    for row in rows:
+        table.add_row(*row)
+    _console().print(table)
+    if next_cursor:
+        _console().print(f"Next page: --cursor {next_cursor}")
 
 
 @app.command()
 def delete(
     block_id: str = typer.Argument(..., help="Block id to delete"),
-    store_path: Optional[Path] = typer.Option(None, "--store-path", help="Override path to the JSON storage file."),
+    store_path: Optional[Path] = typer.Option(None, "--store-path", help="Override path to the storage file (.db for SQLite)."),
 ):
     """Delete a context block by id."""
-    storage = _get_storage(store_path)
-    if storage.delete_block(block_id):
-        console.print(f"Deleted block: [bold]{block_id}[/bold]")
+    client = _client(store_path)
+    if client is not None:
+        deleted = _remote_call(client.delete_block, block_id)
+    else:
+        deleted = _get_storage(store_path).delete_block(block_id)
+    if deleted:
+        _console().print(f"Deleted block: [bold]{block_id}[/bold]")
     else:
-        console.print(f"[yellow]No block found with id '{block_id}'.[/yellow]")
+        _console().print(f"[yellow]No block found with id '{block_id}'.[/yellow]")
 
 
 @app.command()
 def clear(
     confirm: bool = typer.Option(False, "--yes", help="Confirm deletion of all blocks"),
-    store_path: Optional[Path] = typer.Option(None, "--store-path", help="Override path to the JSON storage file."),
+    store_path: Optional[Path] = typer.Option(None, "--store-path", help="Override path to the storage file (.db for SQLite)."),
 ):
     """Clear all stored blocks."""
     if not confirm:
-        console.print("[red]Refusing to clear without --yes[/red]")
+        _console().print("[red]Refusing to clear without --yes[/red]")
         raise typer.Exit(code=1)
     storage = _get_storage(store_path)
     storage.clear()
-    console.print("Cleared all blocks.")
+    _console().print("Cleared all blocks.")
+
+
+def _progress(verb: str):
+    """A per-batch progress callback writing to stderr, or None when stderr is not a terminal."""
+    if not sys.stderr.isatty():
+        return None
+
+    def report(count: int) -> None:
+        sys.stderr.write(f"\r{verb} {count} blocks...")
+        sys.stderr.flush()
+
+    return report
+
+
+def _counted(lines, every: int, progress):
+    # Progress for remote transfers, where the server does the batching
+    for n, line in enumerate(lines, 1):
+        yield line
+        if progress is not None and n % every == 0:
+            progress(n)
+
+
+@app.command(name="export")
+def export_blocks(
+    output: Optional[Path] = typer.Option(None, "--output", "-o", dir_okay=False, help="Write here instead of stdout"),
+    query: Optional[str] = typer.Option(None, "--query", "-q", help="Only blocks containing this text"),
+    tag: Optional[str] = typer.Option(None, "--tag", help="Only blocks with this tag"),
+    since: Optional[str] = typer.Option(None, "--since", help="Only blocks with timestamp >= this ISO timestamp"),
+    until: Optional[str] = typer.Option(None, "--until", help="Only blocks with timestamp < this ISO timestamp"),
+    batch_size: int = typer.Option(1000, "--batch-size", min=1, help="Blocks read from the store at a time"),
+    store_path: Optional[Path] = typer.Option(None, "--store-path", help="Override path to the storage file (.db for SQLite)."),
+):
+    """Write blocks as NDJSON, newest first, holding one page of blocks in memory at a time."""
+    filters = dict(query=query, tag=tag, since=since, until=until)
+    progress = _progress("Exported")
+    client = _client(store_path)
+    out = output.open("w", encoding="utf-8") if output is not None else sys.stdout
+    try:
+        if client is not None:
+            count = 0
+            for line in _counted(_remote_call(client.export_lines, **filters), batch_size, progress):
+                out.write(line)
+                count += 1
+        else:
+            from .transfer import export_blocks as export_to
+
+            storage = _get_storage(store_path)
+            try:
+                count = export_to(storage, out, page_size=batch_size, progress=progress, **filters)
+            except ValueError as exc:
+                _console().print(f"[red]{exc}[/red]")
+                raise typer.Exit(code=1)
+    finally:
+        if output is not None:
+            out.close()
+    if progress:
+        sys.stderr.write("\n")
+    typer.echo(f"Exported {count} blocks", err=True)
+
+
+@app.command(name="import")
+def import_blocks(
+    source: Path = typer.Argument(..., help="NDJSON file of {id, summary, type, content, tags, timestamp}, or - for stdin"),
+    mode: str = typer.Option("upsert", "--mode", help="upsert replaces blocks with the same id; skip keeps stored ones"),
+    batch_size: int = typer.Option(1000, "--batch-size", min=1, help="Blocks per commit"),
+    store_path: Optional[Path] = typer.Option(None, "--store-path", help="Override path to the storage file (.db for SQLite)."),
+):
+    """Store blocks from an NDJSON file (such as one written by export), committing in batches."""
+    if mode not in ("upsert", "skip"):
+        raise typer.BadParameter("must be 'upsert' or 'skip'", param_hint="--mode")
+    progress = _progress("Imported")
+    client = _client(store_path)
+    stream = sys.stdin if str(source) == "-" else source.open(encoding="utf-8")
+    try:
+        if client is not None:
+            lines = _counted(stream, batch_size, progress)
+            stats = _remote_call(client.import_lines, lines, mode=mode, batch_size=batch_size)
+            read, stored, skipped = stats["read"], stats["stored"], stats["skipped"]
+        else:
+            from .transfer import import_blocks as import_from
+
+            storage = _get_storage(store_path)
+            try:
+                result = import_from(storage, stream, mode=mode, batch_size=batch_size, progress=progress)
+            except ValueError as exc:
+                _console().print(f"[red]Invalid blocks file, {exc}[/red]")
+                raise typer.Exit(code=1)
+            read, stored, skipped = result.read, result.stored, result.skipped
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    if progress:
+        sys.stderr.write("\n")
+    _console().print(f"Imported {stored} of {read} blocks ({skipped} skipped)")
+
+
+@app.command()
+def gc(
+    policy_file: Optional[Path] = typer.Option(
+        None,
+        "--policy",
+        exists=True,
+        dir_okay=False,
+        envvar="ACT_RETENTION",
+        help="Retention policy JSON file (max_age, max_blocks, max_bytes per store, type or tag).",
+    ),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Report what would be deleted without deleting it"),
+    batch_size: int = typer.Option(500, "--batch-size", min=1, help="Blocks deleted per commit"),
+    store_path: Optional[Path] = typer.Option(None, "--store-path", help="Override path to the storage file (.db for SQLite)."),
+):
+    """Delete the blocks a retention policy does not allow, in batches."""
+    from .retention import RetentionPolicy, sweep
+
+    if policy_file is None:
+        raise typer.BadParameter("a policy file is required (or set ACT_RETENTION)", param_hint="--policy")
+    try:
+        policy = RetentionPolicy.load(policy_file)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc), param_hint="--policy")
+    # A one-shot process has seen no retrievals, so space limits evict the oldest writes
+    result = sweep(_get_storage(store_path), policy, batch_size=batch_size, dry_run=dry_run)
+    table = _table("Would delete" if dry_run else "Deleted")
+    table.add_column("Limit")
+    table.add_column("Blocks", justify="right")
+    for reason, count in sorted(result.reasons.items()):
+        table.add_row(reason, str(count))
+    _console().print(table)
+    verb = "Would delete" if dry_run else "Deleted"
+    _console().print(f"{verb} {result.deleted} of {result.scanned} blocks, {result.freed_bytes} bytes")
+
+
+@app.command()
+def reshard(
+    source: Path = typer.Argument(..., help="Existing store to copy from (JSON, SQLite or .shards)"),
+    dest: Path = typer.Argument(..., help="New sharded store directory, e.g. data/context_store.shards"),
+    shards: Optional[int] = typer.Option(None, "--shards", min=1, help="Number of shards to create (default 16)"),
+):
+    """Copy a store into a new hash-sharded store."""
+    from .sharded_storage import DEFAULT_SHARDS, reshard_store
+
+    shards = shards or DEFAULT_SHARDS
+    try:
+        count = reshard_store(source, dest, shards=shards)
+    except ValueError as exc:
+        _console().print(f"[red]{exc}[/red]")
+        raise typer.Exit(code=1)
+    _console().print(f"Copied {count} blocks into {shards} shards at [bold]{dest}[/bold]")
+
+
+@app.command()
+def stats(
+    server: Optional[str] = typer.Option(
+        None, "--server", help="Show per-stage latency from a running server's /metrics, e.g. http://localhost:8000"
+    ),
+    store_path: Optional[Path] = typer.Option(None, "--store-path", help="Override path to the storage file (.db for SQLite)."),
+):
+    """Show block counts, content size and compression ratio for a store, or a server's stage latencies."""
+    if server is not None:
+        _server_stats(server)
+        return
+    start = time.perf_counter()
+    storage = _get_storage(store_path)
+    load_ms = (time.perf_counter() - start) * 1000
+    from .compression import store_stats
+
+    s = store_stats(storage.list_blocks(), storage.path)
+    table = _table(str(storage.path), show_header=False)
+    table.add_row("Blocks", str(s["blocks"]))
+    table.add_row("Compressed blocks", str(s["compressed_blocks"]))
+    table.add_row("Content bytes", str(s["content_bytes"]))
+    table.add_row("Stored content bytes", str(s["stored_content_bytes"]))
+    ratio = s["content_bytes"] / s["stored_content_bytes"] if s["stored_content_bytes"] else 1.0
+    table.add_row("Compression ratio", f"{ratio:.2f}x")
+    dedup_stats = getattr(storage, "dedup_stats", None)
+    if dedup_stats is not None:
+        d = dedup_stats()
+        table.add_row("Blocks sharing content", str(d["shared_blocks"]))
+        table.add_row("Deduplicated bytes", str(d["deduplicated_bytes"]))
+    table.add_row("Bytes on disk", str(s["disk_bytes"]))
+    table.add_row("Open time", f"{load_ms:.1f} ms")
+    _console().print(table)
+
+
+def _server_stats(server: str) -> None:
+    import urllib.request
+
+    from .metrics import parse_histograms, quantile
+
+    url = server.rstrip("/") + "/metrics"
+    try:
+        with urllib.request.urlopen(url, timeout=10) as resp:
+            text = resp.read().decode("utf-8")
+    except OSError as exc:
+        _console().print(f"[red]Could not fetch {url}: {exc}[/red]")
+        raise typer.Exit(code=1)
+    table = _table(url)
+    table.add_column("Metric")
+    table.add_column("Labels")
+    table.add_column("Count", justify="right")
+    table.add_column("Mean ms", justify="right")
+    table.add_column("p50 ms", justify="right")
+    table.add_column("p95 ms", justify="right")
+    for (name, labels), (counts, total, count) in sorted(parse_histograms(text).items()):
+        table.add_row(
+            name,
+            " ".join(f"{k}={v}" for k, v in labels),
+            str(count),
+            f"{total / count * 1000:.2f}" if count else "-",
+            f"<={quantile(counts, count, 0.5) * 1000:g}",
+            f"<={quantile(counts, count, 0.95) * 1000:g}",
+        )
+    _console().print(table)
+
+
+@app.command()
+def train_dict(
+    size: int = typer.Option(DEFAULT_DICT_SIZE, "--size", min=256, help="Dictionary size in bytes"),
+    store_path: Optional[Path] = typer.Option(None, "--store-path", help="Override path to the storage file."),
+):
+    """Train a shared compression dictionary on a JSON store and recompress it."""
+    storage = _get_storage(store_path)
+    # Look through an ACT_CACHE_BYTES cache to the store itself
+    storage = getattr(storage, "backend", storage)
+    if not hasattr(storage, "train_dictionary"):
+        _console().print("[red]Dictionaries are only supported by JSON and WAL stores.[/red]")
+        raise typer.Exit(code=1)
+    try:
+        trained = storage.train_dictionary(size=size)
+    except ValueError as exc:
+        _console().print(f"[red]{exc}[/red]")
+        raise typer.Exit(code=1)
+    if not trained:
+        _console().print("[yellow]Stored content has too little in common to build a dictionary.[/yellow]")
+        raise typer.Exit(code=1)
+    _console().print(f"Trained a {trained}-byte dictionary and recompressed [bold]{storage.path}[/bold]")
 
 
 @app.command()
 def path() -> None:
     """Show the current storage file path."""
-    console.print(str(get_default_store_path().resolve()))
+    # Plain echo: scripts read this, and rich would wrap long paths
+    typer.echo(str(_store_path(None).resolve()))
 
 
 def main() -> None:
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import http.client
+import json
+import socket
+import urllib.parse
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .namespaces import validate_namespace
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+NDJSON = "application/x-ndjson"
+# Streamed request bodies are sent in chunks of about this many bytes
+_CHUNK_BYTES = 64 * 1024
+
+
+class RemoteError(Exception):
+    """The server answered with an error status."""
+
+    def __init__(self, status: int, detail: str) -> None:
+        super().__init__(f"{status}: {detail}")
+        self.status = status
+        self.detail = detail
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self._socket_path = socket_path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self._socket_path)
+        self.sock = sock
+
+
+class ACTClient:
+    """A minimal client for a running ``act-server``.
+
+    ``url`` is ``http://host:port`` or ``unix:/path/to/act.sock`` for a server
+    started with ``act-server --uds``. Requests go to ``/ns/{namespace}`` when a
+    namespace is given. Blocks are plain dicts, as the server sends them.
+    """
+
+    def __init__(self, url: str, namespace: Optional[str] = None, timeout: float = 30.0) -> None:
+        self.url = url
+        self._prefix = f"/ns/{validate_namespace(namespace)}" if namespace else ""
+        if url.startswith("unix:"):
+            self._conn: http.client.HTTPConnection = _UnixHTTPConnection(url[len("unix:"):], timeout)
+            return
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported server URL {url!r}: use http://host:port or unix:/path/to/socket")
+        conn_cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self._conn = conn_cls(parts.hostname, parts.port, timeout=timeout)
+        self._prefix = parts.path.rstrip("/") + self._prefix
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "ACTClient":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _open(
+        self,
+        method: str,
+        path: str,
+        payload: Any = None,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> http.client.HTTPResponse:
+        """Send a request and return the response, unread unless it is an error."""
+        target = self._prefix + path
+        query = {k: v for k, v in (params or {}).items() if v is not None}
+        if query:
+            target += "?" + urllib.parse.urlencode(query)
+        try:
+            self._conn.request(method, target, body=payload, headers=headers or {})
+            resp = self._conn.getresponse()
+            if resp.status < 400:
+                return resp
+            raw = resp.read()
+        except (OSError, http.client.HTTPException):
+            self._conn.close()
+            raise
+        try:
+            detail = json.loads(raw).get("detail")
+        except (ValueError, AttributeError):
+            detail = None
+        raise RemoteError(resp.status, str(detail or resp.reason))
+
+    def _request(
+        self, method: str, path: str, body: Any = None, params: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Any, http.client.HTTPResponse]:
+        headers = {"Accept": "application/json"}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        resp = self._open(method, path, payload, params, headers)
+        try:
+            raw = resp.read()
+        except (OSError, http.client.HTTPException):
+            self._conn.close()
+            raise
+        return (json.loads(raw) if raw else None), resp
+
+    def process_output(self, text: str) -> dict:
+        return self._request("POST", "/process_output", {"text": text})[0]
+
+    def store(self, block: dict) -> dict:
+        return self._request("POST", "/store", block)[0]
+
+    def put_many(self, blocks: List[dict]) -> List[dict]:
+        return self._request("POST", "/blocks:batchPut", {"blocks": blocks})[0]
+
+    def get_block(self, block_id: str) -> Optional[dict]:
+        try:
+            return self._request("GET", "/retrieve/" + urllib.parse.quote(block_id, safe=""))[0]
+        except RemoteError as exc:
+            if exc.status == 404:
+                return None
+            raise
+
+    def list_blocks(self, **params: Any) -> Tuple[List[dict], Optional[str]]:
+        """Blocks for the ``GET /blocks`` parameters, and the next page's cursor if any."""
+        data, resp = self._request("GET", "/blocks", params=params)
+        return data, resp.getheader(NEXT_CURSOR_HEADER)
+
+    def delete_block(self, block_id: str) -> bool:
+        try:
+            self._request("DELETE", "/blocks/" + urllib.parse.quote(block_id, safe=""))
+        except RemoteError as exc:
+            if exc.status == 404:
+                return False
+            raise
+        return True
+
+    def export_lines(self, **params: Any) -> Iterator[str]:
+        """NDJSON lines from ``GET /blocks:export``, read as they arrive."""
+        # Opened here rather than on first iteration, so a bad request raises at once
+        return _lines(self._open("GET", "/blocks:export", params=params, headers={"Accept": NDJSON}))
+
+    def import_lines(self, lines: Iterable[str], mode: str = "upsert", batch_size: Optional[int] = None) -> dict:
+        """Stream NDJSON ``lines`` to ``POST /blocks:import``; returns its {read, stored, skipped}."""
+        headers = {"Accept": "application/json", "Content-Type": NDJSON}
+        params = {"mode": mode, "batch_size": batch_size}
+        # An iterable body without a length goes out with chunked transfer encoding
+        resp = self._open("POST", "/blocks:import", _chunks(lines), params, headers)
+        return json.loads(resp.read())
+
+
+def _lines(resp: http.client.HTTPResponse) -> Iterator[str]:
+    try:
+        for raw in resp:
+            yield raw.decode("utf-8")
+    finally:
+        resp.close()
+
+
+def _chunks(lines: Iterable[str]) -> Iterator[bytes]:
+    buffer: List[bytes] = []
+    size = 0
+    for line in lines:
+        data = line.encode("utf-8")
+        if not data.endswith(b"\n"):
+            data += b"\n"
+        buffer.append(data)
+        size += len(data)
+        if size >= _CHUNK_BYTES:
+            yield b"".join(buffer)
+            buffer.clear()
+            size = 0
+    if buffer:
+        yield b"".join(buffer)
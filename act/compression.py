@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import base64
+import threading
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .models import ContextBlock
+
+
+DEFAULT_MIN_BYTES = 256
+DEFAULT_DICT_SIZE = 32 * 1024  # zlib uses at most the last 32 KiB of a preset dictionary
+_LEVEL = 6
+
+
+class CompressedContextBlock(ContextBlock):
+    """A block holding its content zlib-compressed, decompressed on each access."""
+
+    __slots__ = ("_codec", "_data", "_dict_id", "_content")
+
+    def __init__(
+        self,
+        id: str,
+        summary: str,
+        type: str,
+        timestamp: str,
+        tags: Optional[List[str]],
+        codec: "ContentCodec",
+        data: bytes,
+        dict_id: int,
+    ) -> None:
+        super().__init__(id=id, content="", summary=summary, type=type, timestamp=timestamp, tags=tags)
+        self._codec: Optional[ContentCodec] = codec
+        self._data = data
+        self._dict_id = dict_id
+
+    @property  # type: ignore[override]
+    def content(self) -> str:
+        if self._codec is None:
+            return self._content
+        return self._codec.decompress(self._data, self._dict_id)
+
+    @content.setter
+    def content(self, value: str) -> None:
+        self._codec = None
+        self._content = value
+
+    @property
+    def stored_size(self) -> int:
+        return len(self._data) if self._codec is not None else super().stored_size
+
+
+class ContentCodec:
+    """Compresses block content for a JSON store, optionally against a shared dictionary.
+
+    Content of at least ``min_bytes`` is deflated, with the store's current preset
+    dictionary if one has been trained, and kept only if that makes it smaller.
+    ``min_bytes=None`` turns compression off for new writes; content already stored
+    compressed is always readable. Dictionaries are kept next to the store as
+    ``<store>.zdict-<id>`` and never rewritten, so blocks compressed against an older
+    dictionary stay readable after retraining.
+    """
+
+    def __init__(self, store_path: Path, min_bytes: Optional[int] = DEFAULT_MIN_BYTES) -> None:
+        self._store_path = store_path
+        self.min_bytes = min_bytes
+        self.dict_id = 0
+        self._dicts: Dict[int, bytes] = {}
+        self._lock = threading.Lock()
+
+    def dictionary_path(self, dict_id: int) -> Path:
+        return self._store_path.with_name(f"{self._store_path.name}.zdict-{dict_id:08x}")
+
+    def _dictionary(self, dict_id: int) -> bytes:
+        zdict = self._dicts.get(dict_id)
+        if zdict is None:
+            with self._lock:
+                zdict = self._dicts.get(dict_id)
+                if zdict is None:
+                    zdict = self.dictionary_path(dict_id).read_bytes()
+                    self._dicts[dict_id] = zdict
+        return zdict
+
+    def use_dictionary(self, zdict: bytes) -> int:
+        """Save ``zdict`` beside the store and compress new content against it."""
+        dict_id = zlib.crc32(zdict) or 1
+        path = self.dictionary_path(dict_id)
+        if not path.exists():
+            tmp_path = path.with_name(path.name + ".tmp")
+            tmp_path.write_bytes(zdict)
+            tmp_path.replace(path)
+        self._dicts[dict_id] = zdict
+        self.dict_id = dict_id
+        return dict_id
+
+    def decompress(self, data: bytes, dict_id: int) -> str:
+        if dict_id:
+            d = zlib.decompressobj(zdict=self._dictionary(dict_id))
+            raw = d.decompress(data) + d.flush()
+        else:
+            raw = zlib.decompress(data)
+        return raw.decode("utf-8")
+
+    def pack(self, block: ContextBlock) -> ContextBlock:
+        """``block`` with its content compressed, or unchanged if that would not pay off."""
+        if self.min_bytes is None or isinstance(block, CompressedContextBlock) and block._codec is self:
+            return block
+        raw = block.content.encode("utf-8")
+        if len(raw) < self.min_bytes:
+            return block
+        if self.dict_id:
+            c = zlib.compressobj(_LEVEL, zdict=self._dictionary(self.dict_id))
+            data = c.compress(raw) + c.flush()
+        else:
+            data = zlib.compress(raw, _LEVEL)
+        if len(data) >= len(raw):
+            return block
+        return CompressedContextBlock(
+            id=block.id,
+            summary=block.summary,
+            type=block.type,
+            timestamp=block.timestamp,
+            tags=block.tags,
+            codec=self,
+            data=data,
+            dict_id=self.dict_id,
+        )
+
+    def to_dict(self, block: ContextBlock) -> dict:
+        if isinstance(block, CompressedContextBlock) and block._codec is not None:
+            data = {
+                "id": block.id,
+                "content_z": base64.b64encode(block._data).decode("ascii"),
+                "summary": block.summary,
+                "type": block.type,
+                "timestamp": block.timestamp,
+                "tags": list(block.tags),
+            }
+            if block._dict_id:
+                data["zdict"] = block._dict_id
+            return data
+        return block.to_dict()
+
+    def from_dict(self, data: dict) -> ContextBlock:
+        if "content_z" not in data:
+            return ContextBlock.from_dict(data)
+        return CompressedContextBlock(
+            id=data["id"],
+            summary=data["summary"],
+            type=data["type"],
+            timestamp=data["timestamp"],
+            tags=data.get("tags"),
+            codec=self,
+            data=base64.b64decode(data["content_z"]),
+            dict_id=data.get("zdict", 0),
+        )
+
+
+def stored_size(block: ContextBlock) -> int:
+    """Bytes of content as the store keeps it."""
+    return block.stored_size
+
+
+def train_dictionary(samples: Iterable[str], size: int = DEFAULT_DICT_SIZE) -> bytes:
+    """Build a zlib preset dictionary from lines that recur across ``samples``.
+
+    Lines seen in more than one sample are ranked by the bytes they would save
+    (length times occurrences) and packed most valuable last, where deflate
+    references them most cheaply.
+    """
+    counts: Counter = Counter()
+    for sample in samples:
+        counts.update({line for line in sample.splitlines(keepends=True) if len(line.strip()) >= 4})
+    ranked = sorted(
+        (line for line, n in counts.items() if n > 1), key=lambda line: len(line) * counts[line], reverse=True
+    )
+    chosen: List[bytes] = []
+    total = 0
+    for line in ranked:
+        raw = line.encode("utf-8")
+        if total + len(raw) > size:
+            continue
+        chosen.append(raw)
+        total += len(raw)
+    return b"".join(reversed(chosen))
+
+
+def store_stats(blocks: Iterable[ContextBlock], path: Path) -> Dict[str, int]:
+    """Block count, raw and stored content bytes, and on-disk size of the store at ``path``.
+
+    The on-disk size covers ``path`` itself (every file under it, for a sharded
+    store directory) and its sidecar files such as a log, content file or dictionaries.
+    """
+    count = raw = stored = compressed = 0
+    for block in blocks:
+        count += 1
+        raw += len(block.content.encode("utf-8"))
+        size = stored_size(block)
+        stored += size
+        if isinstance(block, CompressedContextBlock) and block._codec is not None:
+            compressed += 1
+    if path.is_dir():
+        files = [p for p in path.rglob("*") if p.is_file()]
+    else:
+        files = [p for p in path.parent.glob(path.name + "*") if p.is_file()]
+    return {
+        "blocks": count,
+        "compressed_blocks": compressed,
+        "content_bytes": raw,
+        "stored_content_bytes": stored,
+        "disk_bytes": sum(p.stat().st_size for p in files),
+    }
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from .compression import CompressedContextBlock
+from .models import ContextBlock
+
+
+DEFAULT_DEDUP_MIN_BYTES = 64
+# Snapshot entry keys that hold a block's content, moved to the payload table when shared
+PAYLOAD_KEYS = ("content", "content_z", "zdict")
+
+Payload = Union[str, bytes]
+
+
+class ContentPool:
+    """Each distinct content payload of a store kept once, with the blocks using it.
+
+    Blocks whose content is at least ``min_bytes`` characters are keyed by a digest
+    of their content; compressed blocks by a digest of their data and dictionary. ``add`` points a block at
+    the payload already held for that digest, so identical content stored under many
+    ids costs one string in memory; the count of blocks per digest tells the
+    snapshot writer which payloads to write once and reference.
+    """
+
+    def __init__(self, min_bytes: int = DEFAULT_DEDUP_MIN_BYTES) -> None:
+        self.min_bytes = min_bytes
+        self._payloads: Dict[str, List] = {}  # digest -> [payload, blocks using it]
+        self._refs: Dict[str, str] = {}  # block id -> digest
+
+    def digest(self, block: ContextBlock) -> Optional[str]:
+        """The digest ``block``'s content is pooled under, or None if it is too small to pool."""
+        return self._keyed(block)[0]
+
+    def _keyed(self, block: ContextBlock) -> Tuple[Optional[str], Payload]:
+        # The object the block keeps its content in, and its digest if it is worth pooling
+        payload: Payload
+        if isinstance(block, CompressedContextBlock) and block._codec is not None:
+            payload = block._data
+            key = b"z" + block._dict_id.to_bytes(4, "big") + payload
+        else:
+            payload = block.content
+            if not isinstance(payload, str):
+                raise TypeError(f"block {block.id!r} has {type(payload).__name__} content, not str")
+            if len(payload) < self.min_bytes:
+                return None, payload
+            key = b"t" + payload.encode("utf-8")
+        return hashlib.blake2b(key, digest_size=16).hexdigest(), payload
+
+    def ref(self, block_id: str) -> Optional[str]:
+        return self._refs.get(block_id)
+
+    def add(self, block: ContextBlock) -> None:
+        """Count ``block`` as using its payload and make it share the pooled copy.
+        Replaces whatever the pool held for the same id."""
+        digest, payload = self._keyed(block)
+        if digest is not None:
+            slot = self._payloads.get(digest)
+            if slot is None:
+                self._payloads[digest] = [payload, 1]
+            else:
+                slot[1] += 1
+                if isinstance(block, CompressedContextBlock) and block._codec is not None:
+                    block._data = slot[0]
+                else:
+                    block.content = slot[0]
+        self.remove(block.id)
+        if digest is not None:
+            self._refs[block.id] = digest
+
+    def remove(self, block_id: str) -> None:
+        digest = self._refs.pop(block_id, None)
+        if digest is None:
+            return
+        slot = self._payloads[digest]
+        slot[1] -= 1
+        if slot[1] == 0:
+            del self._payloads[digest]
+
+    def clear(self) -> None:
+        self._payloads.clear()
+        self._refs.clear()
+
+    def rebuild(self, blocks: Iterable[ContextBlock]) -> List[str]:
+        """Pool ``blocks`` afresh. Returns the ids of blocks left out because their
+        content could not be keyed."""
+        self.clear()
+        rejected = []
+        for block in blocks:
+            try:
+                self.add(block)
+            except (TypeError, AttributeError):
+                rejected.append(block.id)
+        return rejected
+
+    def shared(self, block_id: str) -> Optional[str]:
+        """The digest of ``block_id``'s payload if other blocks use it too."""
+        digest = self._refs.get(block_id)
+        if digest is None or self._payloads[digest][1] < 2:
+            return None
+        return digest
+
+    def stats(self) -> Dict[str, int]:
+        """Pooled payloads, blocks sharing a payload with another, and the bytes of
+        payload copies that sharing saves."""
+        shared = saved = 0
+        for payload, count in self._payloads.values():
+            if count > 1:
+                shared += count
+                size = len(payload) if isinstance(payload, bytes) else len(payload.encode("utf-8"))
+                saved += (count - 1) * size
+        return {"payloads": len(self._payloads), "shared_blocks": shared, "deduplicated_bytes": saved}
+
+
+def split_payload(entry: dict, digest: str, payloads: Dict[str, dict]) -> dict:
+    """``entry`` with its content replaced by a ``content_ref`` to ``digest``, whose
+    content goes into ``payloads`` if it is not there yet."""
+    payload = {k: entry.pop(k) for k in PAYLOAD_KEYS if k in entry}
+    payloads.setdefault(digest, payload)
+    entry["content_ref"] = digest
+    return entry
+
+
+def join_payload(entry: dict, payloads: Dict[str, dict]) -> dict:
+    """``entry`` with a ``content_ref`` resolved against ``payloads``."""
+    digest = entry.get("content_ref")
+    if digest is None:
+        return entry
+    joined = {k: v for k, v in entry.items() if k != "content_ref"}
+    joined.update(payloads[digest])
+    return joined
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from .models import ContextBlock
+from .pagination import SortKey, TimeKey, sort_key
+
+
+TRIGRAM = 3
+
+# Field weights for relevance ranking: a hit in the id or summary says more about a
+# block than one buried in its content.
+_ID_WEIGHT = 4
+_SUMMARY_WEIGHT = 2
+_CONTENT_WEIGHT = 1
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i : i + TRIGRAM] for i in range(len(text) - TRIGRAM + 1)}
+
+
+def _block_trigrams(block: ContextBlock) -> Set[str]:
+    grams = _trigrams(block.id.lower())
+    grams |= _trigrams(block.summary.lower())
+    grams |= _trigrams(block.content.lower())
+    return grams
+
+
+def relevance(block: ContextBlock, query: str) -> int:
+    """Weighted occurrence count of the lowercase ``query`` across a block's text fields."""
+    return (
+        _ID_WEIGHT * block.id.lower().count(query)
+        + _SUMMARY_WEIGHT * block.summary.lower().count(query)
+        + _CONTENT_WEIGHT * block.content.lower().count(query)
+    )
+
+
+class BlockIndex:
+    """Inverted index from lowercase tags and text trigrams to block ids, plus a
+    list of blocks ordered by (timestamp, id).
+
+    The inverted index only narrows the candidate set; callers still verify the
+    substring match against the block itself. Not thread-safe: the owning storage
+    guards it with the same lock as its block cache.
+
+    With ``index_content=False`` block content is never read and no trigrams are
+    kept: a text match may lie in the unindexed content, so queries are not narrowed.
+    """
+
+    def __init__(self, index_content: bool = True) -> None:
+        self._index_content = index_content
+        self._tags: Dict[str, Set[str]] = {}
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._by_time: List[SortKey] = []
+
+    def rebuild(self, blocks: Iterable[ContextBlock]) -> None:
+        self.clear()
+        for block in blocks:
+            self._add_terms(block)
+            self._by_time.append(sort_key(block))
+        self._by_time.sort()
+
+    def clear(self) -> None:
+        self._tags.clear()
+        self._trigrams.clear()
+        self._by_time.clear()
+
+    def add(self, block: ContextBlock) -> None:
+        self._add_terms(block)
+        insort(self._by_time, sort_key(block))
+
+    def _add_terms(self, block: ContextBlock) -> None:
+        for tag in {t.lower() for t in block.tags}:
+            self._tags.setdefault(tag, set()).add(block.id)
+        if not self._index_content:
+            return
+        for gram in _block_trigrams(block):
+            self._trigrams.setdefault(gram, set()).add(block.id)
+
+    def remove(self, block: ContextBlock) -> None:
+        for tag in {t.lower() for t in block.tags}:
+            _discard(self._tags, tag, block.id)
+        if self._index_content:
+            for gram in _block_trigrams(block):
+                _discard(self._trigrams, gram, block.id)
+        key = sort_key(block)
+        i = bisect_left(self._by_time, key)
+        if i < len(self._by_time) and self._by_time[i] == key:
+            del self._by_time[i]
+
+    def newest_ids(self, before: Optional[SortKey] = None, since: Optional[TimeKey] = None) -> Iterator[str]:
+        """Block ids newest first, starting below ``before`` and stopping before ``since``."""
+        i = len(self._by_time) if before is None else bisect_left(self._by_time, before)
+        while i > 0:
+            i -= 1
+            epoch, timestamp, block_id = self._by_time[i]
+            if since is not None and (epoch, timestamp) < since:
+                return
+            yield block_id
+
+    def tag_ids(self, tag: str) -> Set[str]:
+        return self._tags.get(tag.lower(), set())
+
+    def query_candidates(self, query: str) -> Optional[Set[str]]:
+        """Ids that may contain ``query``, or ``None`` if it is too short to narrow down."""
+        grams = _trigrams(query.lower())
+        if not grams or not self._index_content:
+            return None
+        postings = sorted((self._trigrams.get(g, set()) for g in grams), key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            if not result:
+                break
+            result &= posting
+        return result
+
+
+def _discard(index: Dict[str, Set[str]], key: str, block_id: str) -> None:
+    ids = index.get(key)
+    if ids is None:
+        return
+    ids.discard(block_id)
+    if not ids:
+        del index[key]
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import mmap
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .compression import DEFAULT_DICT_SIZE
+from .dedup import join_payload
+from .metrics import metrics
+from .models import ContextBlock
+from .storage import DEFAULT_COMPACT_THRESHOLD, JsonStorage
+from .utils import dump_json_file, load_json_file
+
+
+class _ContentFile:
+    """Append-only file of UTF-8 block contents, read through a shared memory map."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._map: Optional[mmap.mmap] = None
+        self._remap_lock = threading.Lock()
+
+    def read(self, offset: int, length: int) -> bytes:
+        if length == 0:
+            return b""
+        mapped = self._map
+        if mapped is None or offset + length > len(mapped):
+            # Another writer (or we) appended past the end of our mapping
+            mapped = self._remap(offset + length)
+        return mapped[offset : offset + length]
+
+    def _remap(self, needed: int) -> mmap.mmap:
+        with self._remap_lock:
+            if self._map is None or needed > len(self._map):
+                # The old map is left to the garbage collector: other threads may still be slicing it
+                with self.path.open("rb") as f:
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._map
+
+    def append(self, chunks: List[bytes]) -> int:
+        """Append ``chunks`` and return the offset of the first one."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("ab") as f:
+            start = f.tell()
+            f.write(b"".join(chunks))
+        return start
+
+    def size(self) -> int:
+        try:
+            return self.path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+
+class MappedContextBlock(ContextBlock):
+    """A block whose content stays in the data file and is decoded on each access.
+
+    Only the metadata is held in memory. Assigning ``content`` detaches the block
+    from the file.
+    """
+
+    __slots__ = ("_source", "_offset", "_length", "_content")
+
+    def __init__(
+        self,
+        id: str,
+        summary: str,
+        type: str,
+        timestamp: str,
+        tags: Optional[List[str]],
+        source: _ContentFile,
+        offset: int,
+        length: int,
+    ) -> None:
+        super().__init__(id=id, content="", summary=summary, type=type, timestamp=timestamp, tags=tags)
+        self._source: Optional[_ContentFile] = source
+        self._offset = offset
+        self._length = length
+
+    @property  # type: ignore[override]
+    def content(self) -> str:
+        if self._source is None:
+            return self._content
+        return self._source.read(self._offset, self._length).decode("utf-8")
+
+    @content.setter
+    def content(self, value: str) -> None:
+        self._source = None
+        self._content = value
+
+    @property
+    def stored_size(self) -> int:
+        return self._length if self._source is not None else super().stored_size
+
+
+def _meta(block: ContextBlock) -> tuple:
+    return (block.id, block.summary, block.type, block.timestamp, block.tags)
+
+
+class MappedStorage(JsonStorage):
+    """JSON metadata index plus a memory-mapped content file.
+
+    The store file holds each block's id, summary, type, timestamp and tags with
+    the offset and length of its content in ``<store>.data``. Startup reads only
+    the metadata, so load time and resident memory follow the block count rather
+    than the bytes stored; content is decoded from the map when it is read.
+
+    Content is appended and never rewritten in place. Once the unreferenced bytes
+    pass ``compact_threshold`` and outweigh the live ones, the live content is
+    copied to a fresh data file on the next write.
+    """
+
+    _index_content = False
+    _dedup_content = False
+
+    def __init__(
+        self,
+        storage_path: Optional[Path] = None,
+        compact_threshold: int = DEFAULT_COMPACT_THRESHOLD,
+    ) -> None:
+        self._data: Optional[_ContentFile] = None
+        self._compact_threshold = compact_threshold
+        super().__init__(storage_path=storage_path)
+
+    def train_dictionary(self, size: int = DEFAULT_DICT_SIZE) -> int:
+        raise ValueError("memory-mapped stores keep content uncompressed, so a dictionary has no use")
+
+    @property
+    def data_path(self) -> Path:
+        return self._content_file(self._data.path.name if self._data else None).path
+
+    def _content_file(self, name: Optional[str]) -> _ContentFile:
+        name = name or self._path.name + ".data"
+        if self._data is None or self._data.path.name != name:
+            self._data = _ContentFile(self._path.with_name(name))
+        return self._data
+
+    def _read_snapshot(self) -> Dict[str, ContextBlock]:
+        data = load_json_file(self._path) or {"version": 2, "blocks": {}}
+        source = self._content_file(data.get("data"))
+        payloads = data.get("payloads", {})
+        parsed: Dict[str, ContextBlock] = {}
+        for block_id, entry in data.get("blocks", {}).items():
+            try:
+                entry = join_payload(entry, payloads)
+                if "content" in entry:
+                    # A plain JSON store being converted; its content moves to the data file on the next write
+                    parsed[block_id] = ContextBlock.from_dict(entry)
+                else:
+                    parsed[block_id] = MappedContextBlock(
+                        id=entry["id"],
+                        summary=entry["summary"],
+                        type=entry["type"],
+                        timestamp=entry["timestamp"],
+                        tags=entry.get("tags"),
+                        source=source,
+                        offset=entry["offset"],
+                        length=entry["length"],
+                    )
+            except Exception:
+                # Skip malformed entries
+                continue
+        return parsed
+
+    def _same(self, current: ContextBlock, incoming: ContextBlock) -> bool:
+        # Compare locations rather than content so merging never reads the data file
+        if isinstance(current, MappedContextBlock) and isinstance(incoming, MappedContextBlock):
+            return (
+                current._source is incoming._source
+                and current._offset == incoming._offset
+                and current._length == incoming._length
+                and _meta(current) == _meta(incoming)
+            )
+        return current == incoming
+
+    @metrics.timed("save")
+    def _save_cache(self) -> None:
+        with self._lock:
+            # _commit() has refreshed from disk, so this is the data file the snapshot names
+            source = self._content_file(self._data.path.name if self._data else None)
+            previous: Optional[Path] = None
+            with self._cache_lock:
+                blocks = list(self._in_memory_cache.values())
+            live = sum(b._length for b in blocks if _mapped_to(b, source))
+            garbage = source.size() - live
+            if garbage > self._compact_threshold and garbage > live:
+                previous = source.path
+                source = self._content_file(f"{self._path.name}.data.{uuid.uuid4().hex[:8]}")
+                moving = blocks
+            else:
+                moving = [b for b in blocks if not _mapped_to(b, source)]
+
+            chunks = [_content_bytes(b) for b in moving]
+            offset = source.append(chunks) if chunks else 0
+            relocated: Dict[str, ContextBlock] = {}
+            for block, chunk in zip(moving, chunks):
+                relocated[block.id] = MappedContextBlock(
+                    id=block.id,
+                    summary=block.summary,
+                    type=block.type,
+                    timestamp=block.timestamp,
+                    tags=list(block.tags),
+                    source=source,
+                    offset=offset,
+                    length=len(chunk),
+                )
+                offset += len(chunk)
+
+            with self._cache_lock:
+                for block in moving:
+                    # Only swap in the mapped copy if nothing replaced the block meanwhile
+                    if self._in_memory_cache.get(block.id) is block:
+                        self._in_memory_cache[block.id] = relocated[block.id]
+            entries = {}
+            for block in blocks:
+                stored = relocated.get(block.id, block)
+                entries[block.id] = {
+                    "id": stored.id,
+                    "summary": stored.summary,
+                    "type": stored.type,
+                    "timestamp": stored.timestamp,
+                    "tags": stored.tags,
+                    "offset": stored._offset,  # type: ignore[attr-defined]
+                    "length": stored._length,  # type: ignore[attr-defined]
+                }
+            dump_json_file(self._path, {"version": 2, "data": source.path.name, "blocks": entries})
+            if previous is not None:
+                try:
+                    # Readers that still map the old file keep it alive until they drop it
+                    os.remove(previous)
+                except OSError:
+                    pass
+
+
+def _mapped_to(block: ContextBlock, source: _ContentFile) -> bool:
+    return isinstance(block, MappedContextBlock) and block._source is source
+
+
+def _content_bytes(block: ContextBlock) -> bytes:
+    if isinstance(block, MappedContextBlock) and block._source is not None:
+        return block._source.read(block._offset, block._length)
+    return block.content.encode("utf-8")
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import bisect
+import functools
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+
+# Upper bounds in seconds, from a fast parse to a slow full rewrite of a large store
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_HELP = {
+    "act_stage_seconds": ("histogram", "Time spent in each processing stage."),
+    "act_request_seconds": ("histogram", "HTTP request latency by route."),
+    "act_commands_total": ("counter", "Memory commands executed, by type."),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self) -> None:
+        self.counts = [0] * len(BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+
+class Registry:
+    """Counters and latency histograms, rendered in the Prometheus text format.
+
+    Recording is a no-op while ``enabled`` is false, so instrumented code costs
+    one attribute check when metrics are turned off (``ACT_METRICS=0``).
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Labels], _Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        i = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = _Histogram()
+            if i < len(BUCKETS):
+                hist.counts[i] += 1
+            hist.sum += seconds
+            hist.count += 1
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def stage(self, name: str) -> "_StageTimer":
+        """``with metrics.stage("parse"):`` records the block's duration."""
+        return _StageTimer(self, name)
+
+    def timed(self, stage: str) -> Callable[[F], F]:
+        """Decorator recording each call's duration under ``stage``."""
+
+        def decorate(fn: F) -> F:
+            @functools.wraps(fn)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe("act_stage_seconds", time.perf_counter() - start, stage=stage)
+
+            return wrapper  # type: ignore[return-value]
+
+        return decorate
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def snapshot(self) -> Dict[str, Dict[Labels, Any]]:
+        """Copies of every series: histograms as (bucket counts, sum, count), counters as values."""
+        with self._lock:
+            out: Dict[str, Dict[Labels, Any]] = {}
+            for (name, labels), hist in self._histograms.items():
+                out.setdefault(name, {})[labels] = (list(hist.counts), hist.sum, hist.count)
+            for (name, labels), value in self._counters.items():
+                out.setdefault(name, {})[labels] = value
+            return out
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name, series in sorted(self.snapshot().items()):
+            kind, help_text = _HELP.get(name, ("untyped", name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(series.items()):
+                if kind != "histogram":
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                    continue
+                counts, total, count = value
+                cumulative = 0
+                for bound, n in zip(BUCKETS, counts):
+                    cumulative += n
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', repr(bound)),))} {cumulative}")
+                lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+class _StageTimer:
+    __slots__ = ("_registry", "_name", "_start")
+
+    def __init__(self, registry: Registry, name: str) -> None:
+        self._registry = registry
+        self._name = name
+        self._start = 0.0
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc: object) -> None:
+        self._registry.observe("act_stage_seconds", time.perf_counter() - self._start, stage=self._name)
+
+
+class TimedLock:
+    """Wraps a (reentrant) lock and records how long outermost acquisitions wait."""
+
+    def __init__(self, lock: Any, stage: str, registry: Optional[Registry] = None) -> None:
+        self._inner = lock
+        self._stage = stage
+        self._registry = registry or metrics
+
+    def __enter__(self) -> None:
+        if not self._registry.enabled or self._inner.is_locked:
+            self._inner.acquire()
+            return
+        start = time.perf_counter()
+        self._inner.acquire()
+        self._registry.observe("act_stage_seconds", time.perf_counter() - start, stage=self._stage)
+
+    def __exit__(self, *exc: object) -> None:
+        self._inner.release()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._inner, name)
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (f'{k}="{_escape(v)}"' for k, v in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def quantile(counts: List[int], total: int, q: float) -> float:
+    """Upper bucket bound below which fraction ``q`` of ``total`` observations fall,
+    given per-bucket ``counts`` (observations past the last bucket are not in them)."""
+    if not total:
+        return 0.0
+    seen = 0
+    for bound, n in zip(BUCKETS, counts):
+        seen += n
+        if seen >= q * total:
+            return bound
+    return float("inf")
+
+
+_SAMPLE = re.compile(r'^(\w+?)(_bucket|_sum|_count)?(?:\{(.*)\})? (\S+)$')
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_histograms(text: str) -> Dict[Tuple[str, Labels], Tuple[List[int], float, int]]:
+    """Histograms from Prometheus text as rendered by ``Registry.render``, keyed like
+    ``Registry.snapshot`` and with per-bucket (not cumulative) counts."""
+    cumulative: Dict[Tuple[str, Labels], Dict[str, float]] = {}
+    sums: Dict[Tuple[str, Labels], float] = {}
+    counts: Dict[Tuple[str, Labels], int] = {}
+    for line in text.splitlines():
+        m = _SAMPLE.match(line)
+        if not m or not m.group(2):
+            continue
+        name, part, raw_labels, value = m.groups()
+        labels = dict(_LABEL.findall(raw_labels or ""))
+        le = labels.pop("le", None)
+        key = (name, tuple(sorted(labels.items())))
+        if part == "_bucket" and le is not None:
+            cumulative.setdefault(key, {})[le] = float(value)
+        elif part == "_sum":
+            sums[key] = float(value)
+        else:
+            counts[key] = int(float(value))
+    out = {}
+    for key, count in counts.items():
+        buckets = cumulative.get(key, {})
+        running = [int(buckets.get(repr(bound), 0)) for bound in BUCKETS]
+        per_bucket = [b - a for a, b in zip([0] + running, running)]
+        out[key] = (per_bucket, sums.get(key, 0.0), count)
+    return out
+
+
+metrics = Registry(enabled=os.environ.get("ACT_METRICS", "1").strip() != "0")
+
+
+class SamplingProfiler:
+    """Samples every thread's Python stack at a fixed interval from a daemon thread.
+
+    ``stop()`` writes the aggregated stacks to ``path`` in the collapsed format
+    (``frame;frame;frame count``) that flame graph tools read. Nothing runs until
+    ``start()``; the interpreter is not traced between samples.
+    """
+
+    def __init__(self, path: Path, interval: float = 0.005) -> None:
+        self.path = path
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="act-profiler", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                f: Any = frame
+                while f is not None:
+                    code = f.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{f.f_lineno})")
+                    f = f.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field, asdict
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from enum import Enum
 from typing import List, Optional
 
@@ -8,19 +10,99 @@ from typing import List, Optional
 class MemoryCommandType(str, Enum):
     STORE = "STORE"
     RETRIEVE = "RETRIEVE"
+    SEARCH = "SEARCH"
+
+
+def parse_epoch(timestamp: str) -> float:
+    """Seconds since the epoch for an ISO-8601 timestamp, or ``-inf`` if it is not one.
+
+    Naive timestamps are taken as UTC.
+    """
+    try:
+        if timestamp.endswith("Z"):
+            timestamp = timestamp[:-1] + "+00:00"
+        parsed = datetime.fromisoformat(timestamp)
+    except (AttributeError, ValueError):
+        return float("-inf")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def utf8_len(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
 
 
-@dataclass
 class ContextBlock:
-    id: str
-    content: str
-    summary: str
-    type: str
-    timestamp: str
-    tags: List[str] = field(default_factory=list)
+    """A stored unit of context.
+
+    Slotted rather than a dataclass to keep per-block overhead down in large
+    stores: ``type`` and tag strings are interned so blocks share them, and the
+    parsed ``epoch`` of ``timestamp`` is kept alongside it for ordering.
+    """
+
+    __slots__ = ("id", "content", "summary", "type", "_timestamp", "epoch", "tags")
+
+    def __init__(
+        self,
+        id: str,
+        content: str,
+        summary: str,
+        type: str,
+        timestamp: str,
+        tags: Optional[List[str]] = None,
+    ) -> None:
+        self.id = id
+        self.content = content
+        self.summary = summary
+        self.type = sys.intern(type)
+        self.timestamp = timestamp
+        self.tags = [sys.intern(t) for t in tags] if tags else []
+
+    @property
+    def timestamp(self) -> str:
+        return self._timestamp
+
+    @timestamp.setter
+    def timestamp(self, value: str) -> None:
+        self._timestamp = value
+        self.epoch = parse_epoch(value)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ContextBlock):
+            return NotImplemented
+        return (
+            self.id == other.id
+            and self.summary == other.summary
+            and self.type == other.type
+            and self.timestamp == other.timestamp
+            and self.tags == other.tags
+            and self.content == other.content
+        )
+
+    __hash__ = None  # type: ignore[assignment]
+
+    @property
+    def stored_size(self) -> int:
+        """Bytes of content as the store keeps it; subclasses that hold content
+        compressed or on disk answer without decoding it."""
+        return utf8_len(self.content)
+
+    def __repr__(self) -> str:
+        return (
+            f"ContextBlock(id={self.id!r}, content={self.content!r}, summary={self.summary!r}, "
+            f"type={self.type!r}, timestamp={self.timestamp!r}, tags={self.tags!r})"
+        )
 
     def to_dict(self) -> dict:
-        return asdict(self)
+        return {
+            "id": self.id,
+            "content": self.content,
+            "summary": self.summary,
+            "type": self.type,
+            "timestamp": self.timestamp,
+            "tags": list(self.tags),
+        }
 
     @staticmethod
     def from_dict(data: dict) -> "ContextBlock":
@@ -30,7 +112,7 @@ class ContextBlock:
             summary=data["summary"],
             type=data["type"],
             timestamp=data["timestamp"],
-            tags=list(data.get("tags", [])),
+            tags=data.get("tags"),
         )
 
 
@@ -39,10 +121,14 @@ class MemoryCommand:
     type: MemoryCommandType
     raw: str
     block_id: Optional[str] = None
+    # Every id named by a RETRIEVE; block_id is the first of them
+    block_ids: List[str] = field(default_factory=list)
     summary: Optional[str] = None
     content_type: Optional[str] = None
     content: Optional[str] = None
     tags: List[str] = field(default_factory=list)
+    query: Optional[str] = None
+    top_k: Optional[int] = None
 
 
 @dataclass
@@ -50,4 +136,5 @@ class ProcessResult:
     cleaned_text: str
     stored_blocks: List[ContextBlock] = field(default_factory=list)
     retrieved_blocks: List[ContextBlock] = field(default_factory=list)
+    searched_blocks: List[ContextBlock] = field(default_factory=list)
     commands: List[MemoryCommand] = field(default_factory=list)
\ No newline at end of file
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Generic, Iterator, List, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_MAX_OPEN = 64
+_NAMESPACE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,127}$")
+
+
+def validate_namespace(namespace: str) -> str:
+    # Namespaces become file names, so nothing that could step outside the directory
+    if not _NAMESPACE.match(namespace) or ".." in namespace:
+        raise ValueError(
+            f"Invalid namespace {namespace!r}: use 1-128 letters, digits, '.', '_' or '-', starting with a letter or digit"
+        )
+    return namespace
+
+
+def namespace_path(base: Path, namespace: str) -> Path:
+    """Store path for ``namespace`` beside the store at ``base``, same backend.
+
+    ``data/context_store.json`` and namespace ``conv-42`` give
+    ``data/context_store.ns/conv-42.json``; a ``.db`` or ``.shards`` base keeps its suffix.
+    """
+    validate_namespace(namespace)
+    return base.with_name(base.stem + ".ns") / (namespace + base.suffix)
+
+
+class _Entry(Generic[T]):
+    __slots__ = ("value", "leases")
+
+    def __init__(self, value: T) -> None:
+        self.value = value
+        self.leases = 0
+
+
+class NamespacePool(Generic[T]):
+    """A bounded LRU of open per-namespace resources.
+
+    ``lease(namespace)`` opens the namespace on first use and keeps it open while
+    the lease is held. Once more than ``max_open`` namespaces are open, the least
+    recently used ones that nobody holds are closed; leased namespaces are never
+    closed under a caller, so the pool can briefly exceed its bound.
+    """
+
+    def __init__(self, open_fn: Callable[[str], T], close_fn: Callable[[T], None], max_open: int = DEFAULT_MAX_OPEN):
+        if max_open < 1:
+            raise ValueError("max_open must be at least 1")
+        self._open = open_fn
+        self._close = close_fn
+        self.max_open = max_open
+        self._entries: "OrderedDict[str, _Entry[T]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # One lock per namespace being opened, so a slow load does not block other namespaces
+        self._opening: Dict[str, threading.Lock] = {}
+        self.opened = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def open_namespaces(self) -> List[str]:
+        with self._lock:
+            return list(self._entries)
+
+    @contextmanager
+    def lease(self, namespace: str) -> Iterator[T]:
+        entry = self._acquire(namespace)
+        try:
+            yield entry.value
+        finally:
+            with self._lock:
+                entry.leases -= 1
+            self._evict()
+
+    def _acquire(self, namespace: str) -> _Entry[T]:
+        validate_namespace(namespace)
+        with self._lock:
+            entry = self._entries.get(namespace)
+            if entry is not None:
+                entry.leases += 1
+                self._entries.move_to_end(namespace)
+                return entry
+            opening = self._opening.setdefault(namespace, threading.Lock())
+        with opening:
+            with self._lock:
+                entry = self._entries.get(namespace)
+                if entry is not None:
+                    entry.leases += 1
+                    self._entries.move_to_end(namespace)
+                    return entry
+            value = self._open(namespace)
+            with self._lock:
+                entry = self._entries[namespace] = _Entry(value)
+                entry.leases += 1
+                self._opening.pop(namespace, None)
+                self.opened += 1
+        self._evict()
+        return entry
+
+    def _evict(self) -> None:
+        victims = []
+        with self._lock:
+            excess = len(self._entries) - self.max_open
+            for namespace, entry in list(self._entries.items()):
+                if excess <= 0:
+                    break
+                if entry.leases == 0:
+                    del self._entries[namespace]
+                    victims.append(entry.value)
+                    excess -= 1
+            self.evicted += len(victims)
+        for value in victims:
+            self._close(value)
+
+    def close(self) -> None:
+        with self._lock:
+            values = [entry.value for entry in self._entries.values()]
+            self._entries.clear()
+        for value in values:
+            self._close(value)
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import base64
+import json
+from typing import Optional, Tuple
+
+from .models import ContextBlock, parse_epoch
+
+
+# Blocks are listed newest first, ordered by (epoch, timestamp, id) descending.
+# The epoch orders ISO timestamps by instant whatever their UTC offset; the raw
+# string breaks ties (and orders timestamps that are not ISO-8601, which all get
+# an epoch of -inf), and the id keeps blocks sharing a timestamp deterministic.
+SortKey = Tuple[float, str, str]
+TimeKey = Tuple[float, str]
+
+
+def sort_key(block: ContextBlock) -> SortKey:
+    return (block.epoch, block.timestamp, block.id)
+
+
+def time_key(timestamp: str) -> TimeKey:
+    """The (epoch, timestamp) prefix of the sort key for a bare timestamp, e.g. ``since``."""
+    return (parse_epoch(timestamp), timestamp)
+
+
+def encode_cursor(block: ContextBlock) -> str:
+    """Opaque cursor that resumes a listing just after ``block``."""
+    raw = json.dumps([block.timestamp, block.id], ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> SortKey:
+    try:
+        timestamp, block_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception as exc:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from exc
+    return time_key(str(timestamp)) + (str(block_id),)
+
+
+def upper_bound(cursor: Optional[str], until: Optional[str]) -> Optional[SortKey]:
+    """Exclusive upper sort key implied by a cursor and/or an ``until`` timestamp."""
+    bounds = []
+    if cursor:
+        bounds.append(decode_cursor(cursor))
+    if until:
+        # (epoch, ts, "") sorts before every real key at that time, so this excludes `until` itself
+        bounds.append(time_key(until) + ("",))
+    return min(bounds) if bounds else None
@@ -1,15 +1,24 @@
 from __future__ import annotations
 
+import heapq
 import re
-from typing import List, Sequence, Tuple
+from typing import Iterable, List, Optional, Sequence, Tuple
 
+from .metrics import metrics
 from .models import MemoryCommand, MemoryCommandType
 
 
-# Patterns for extracting commands
-_CODE_FENCE_PATTERN = re.compile(r"```MEMORY_CMD\s*\n([\s\S]*?)\n```", re.MULTILINE)
-_INLINE_PREFIX_PATTERN = re.compile(r"^\s*MEMORY_CMD:\s*(.+)$", re.MULTILINE)
-_DIRECT_CMD_PATTERN = re.compile(r"^\s*(STORE|RETRIEVE)\|.+$", re.MULTILINE)
+# The three command forms, as regular expressions:
+#   fenced:  ```MEMORY_CMD\s*\n([\s\S]*?)\n```
+#   inline:  ^\s*MEMORY_CMD:\s*(.+)$            (multiline)
+#   direct:  ^\s*(STORE|RETRIEVE|SEARCH)\|.+$   (multiline)
+# They are matched by a hand-written scanner below in one pass over the text.
+_FENCE_OPEN = "```MEMORY_CMD"
+_FENCE_CLOSE = "\n```"
+_INLINE_PREFIX = "MEMORY_CMD:"
+_DIRECT_KEYWORDS = ("STORE|", "RETRIEVE|", "SEARCH|")
+DEFAULT_SEARCH_K = 5
+_WHITESPACE = re.compile(r"\s*")
 
 
 def _parse_command_text(cmd_text: str) -> MemoryCommand:
@@ -34,59 +43,229 @@ def _parse_command_text(cmd_text: str) -> MemoryCommand:
     if raw.startswith("RETRIEVE|"):
         parts = raw.split("|")
         if len(parts) < 2:
-            raise ValueError("RETRIEVE command requires 2 fields: RETRIEVE|id")
-        _, block_id = parts[:2]
+            raise ValueError("RETRIEVE command requires 2 fields: RETRIEVE|id1,id2,...")
+        block_ids = [i.strip() for i in parts[1].split(",") if i.strip()]
         return MemoryCommand(
             type=MemoryCommandType.RETRIEVE,
             raw=raw,
-            block_id=block_id.strip(),
+            block_id=block_ids[0] if block_ids else "",
+            block_ids=block_ids,
+        )
+    if raw.startswith("SEARCH|"):
+        parts = raw.split("|")
+        query = parts[1].strip()
+        if not query:
+            raise ValueError("SEARCH command requires a query: SEARCH|query|k")
+        k = parts[2].strip() if len(parts) > 2 else ""
+        top_k = int(k) if k else DEFAULT_SEARCH_K
+        if top_k < 1:
+            raise ValueError("SEARCH k must be at least 1")
+        return MemoryCommand(
+            type=MemoryCommandType.SEARCH,
+            raw=raw,
+            query=query,
+            top_k=top_k,
         )
     raise ValueError(f"Unknown command: {raw}")
 
 
+@metrics.timed("parse")
 def extract_memory_commands(text: str) -> Tuple[List[MemoryCommand], List[Tuple[int, int]]]:
-    commands: List[MemoryCommand] = []
-    spans: List[Tuple[int, int]] = []
-
-    # 1) Code-fenced blocks
-    for match in _CODE_FENCE_PATTERN.finditer(text):
-        cmd_text = match.group(1)
-        try:
-            commands.append(_parse_command_text(cmd_text))
-            spans.append((match.start(), match.end()))
-        except Exception:
-            # Skip malformed commands, but still remove the block
-            spans.append((match.start(), match.end()))
-
-    # 2) Inline prefix
-    for match in _INLINE_PREFIX_PATTERN.finditer(text):
-        cmd_text = match.group(1)
-        try:
-            commands.append(_parse_command_text(cmd_text))
-            spans.append((match.start(), match.end()))
-        except Exception:
-            spans.append((match.start(), match.end()))
-
-    # 3) Direct commands (avoid duplicates where already captured)
-    # Build a set of ranges already covered to avoid double counting
-    covered = _merge_spans(spans)
-    for match in _DIRECT_CMD_PATTERN.finditer(text):
-        span = (match.start(), match.end())
-        if _is_span_covered(span, covered):
+    """Find every MEMORY_CMD in ``text`` in a single left-to-right pass.
+
+    Recognises fenced blocks, ``MEMORY_CMD:`` lines and bare ``STORE|``/``RETRIEVE|``/``SEARCH|``
+    lines with the same rules as the patterns above: commands are returned fenced
+    first, then inline, then direct; a direct command inside an already matched
+    span is not counted twice; malformed commands are dropped but their text is
+    still reported for removal. Spans are merged and sorted.
+    """
+    scan = _Scanner(text)
+    scan.run()
+
+    commands = scan.fence_commands + scan.inline_commands
+    covered = _merge_sorted_spans(heapq.merge(scan.fence_spans, scan.inline_spans))
+    direct_spans: List[Tuple[int, int]] = []
+    j = 0
+    for span, cmd in scan.direct:
+        # Direct matches are in order, so a single pointer finds the covering span
+        while j + 1 < len(covered) and covered[j + 1][0] <= span[0]:
+            j += 1
+        if covered and covered[j][0] <= span[0] and span[1] <= covered[j][1]:
             continue
-        cmd_text = match.group(0)
-        try:
-            commands.append(_parse_command_text(cmd_text))
-            spans.append(span)
-        except Exception:
-            spans.append(span)
+        if cmd is not None:
+            commands.append(cmd)
+        direct_spans.append(span)
+
+    spans = _merge_sorted_spans(heapq.merge(scan.fence_spans, scan.inline_spans, direct_spans))
+    return commands, spans
+
+
+class _Scanner:
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.fence_commands: List[MemoryCommand] = []
+        self.fence_spans: List[Tuple[int, int]] = []
+        self.inline_commands: List[MemoryCommand] = []
+        self.inline_spans: List[Tuple[int, int]] = []
+        self.direct: List[Tuple[Tuple[int, int], Optional[MemoryCommand]]] = []
+        # First fence opener whose outcome depends on text that has not arrived yet
+        self.pending_fence = -1
+        # Memoised search for the next fence closer; fence bodies are looked up in
+        # increasing order, so each closer is found once.
+        self._closer_from = -1
+        self._closer_at = -1
+
+    def run(self) -> None:
+        text = self.text
+        n = len(text)
+        next_fence = text.find(_FENCE_OPEN)
+        inline_resume = 0
+        # Start of the run of whitespace-only lines directly above the current one;
+        # a line-anchored command's span absorbs them, as `^\s*` does.
+        blank_run = -1
+        line_start = 0
+        while True:
+            eol = text.find("\n", line_start)
+            if eol == -1:
+                eol = n
+
+            while next_fence != -1 and next_fence < eol:
+                end = self._match_fence(next_fence)
+                next_fence = text.find(_FENCE_OPEN, end if end != -1 else next_fence + 1)
+
+            content = _WHITESPACE.match(text, line_start, eol).end()
+            if content == eol:
+                if blank_run < 0:
+                    blank_run = line_start
+            else:
+                start = blank_run if blank_run >= 0 else line_start
+                blank_run = -1
+                if line_start >= inline_resume and text.startswith(_INLINE_PREFIX, content):
+                    end = self._match_inline(start, content + len(_INLINE_PREFIX))
+                    if end != -1:
+                        inline_resume = end
+                for keyword in _DIRECT_KEYWORDS:
+                    if text.startswith(keyword, content):
+                        if content + len(keyword) < eol:
+                            self.direct.append(((start, eol), _try_parse(text[start:eol])))
+                        break
+
+            if eol == n:
+                break
+            line_start = eol + 1
 
-    return commands, _merge_spans(spans)
+    def _match_fence(self, start: int) -> int:
+        text = self.text
+        ws_start = start + len(_FENCE_OPEN)
+        ws_end = _WHITESPACE.match(text, ws_start).end()
+        # `\s*\n` is greedy, so the body starts after the last newline of the run...
+        body_start = text.rfind("\n", ws_start, ws_end) + 1
+        if ws_end == len(text) and self.pending_fence == -1:
+            self.pending_fence = start
+        if body_start == 0:
+            return -1
+        close = self._find_closer(body_start)
+        if close == -1:
+            if self.pending_fence == -1:
+                self.pending_fence = start
+            # ...unless only an earlier newline leaves room for a closer glued to the run
+            if body_start != ws_end or not text.startswith("```", ws_end):
+                return -1
+            prev = text.rfind("\n", ws_start, body_start - 1)
+            if prev == -1:
+                return -1
+            close = body_start - 1
+            body_start = prev + 1
+        end = close + len(_FENCE_CLOSE)
+        cmd = _try_parse(text[body_start:close])
+        if cmd is not None:
+            self.fence_commands.append(cmd)
+        self.fence_spans.append((start, end))
+        return end
+
+    def _find_closer(self, pos: int) -> int:
+        if self._closer_from != -1 and self._closer_from <= pos and (self._closer_at == -1 or self._closer_at >= pos):
+            return self._closer_at
+        self._closer_from = pos
+        self._closer_at = self.text.find(_FENCE_CLOSE, pos)
+        return self._closer_at
+
+    def _match_inline(self, start: int, arg_start: int) -> int:
+        text = self.text
+        n = len(text)
+        cmd_start = _WHITESPACE.match(text, arg_start).end()
+        if cmd_start == n:
+            # Only whitespace remains: `\s*(.+)$` backtracks to the last non-newline character
+            cmd_start = len(text.rstrip("\n")) - 1
+            if cmd_start < arg_start:
+                return -1
+        end = text.find("\n", cmd_start)
+        if end == -1:
+            end = n
+        cmd = _try_parse(text[cmd_start:end])
+        if cmd is not None:
+            self.inline_commands.append(cmd)
+        self.inline_spans.append((start, end))
+        return end
+
+
+def stream_boundary(text: str) -> int:
+    """How much of a still-growing ``text`` can be parsed without waiting for more.
+
+    Returns a line-start offset such that ``extract_memory_commands`` finds the same
+    commands and spans in ``text[:offset]`` as it will once the text is complete.
+    """
+    cut = text.rfind("\n") + 1
+    # Trailing blank lines may be absorbed by a command on the next line, and a bare
+    # `MEMORY_CMD:` takes its argument from the next non-blank line.
+    while cut > 0:
+        line_end = cut - 1
+        line_start = text.rfind("\n", 0, line_end) + 1
+        content = _WHITESPACE.match(text, line_start, line_end).end()
+        if content != line_end and not (
+            text.startswith(_INLINE_PREFIX, content)
+            and _WHITESPACE.match(text, content + len(_INLINE_PREFIX), line_end).end() == line_end
+        ):
+            break
+        cut = line_start
+    if cut == 0:
+        return 0
+
+    scan = _Scanner(text)
+    scan.run()
+    if scan.pending_fence != -1 and scan.pending_fence < cut:
+        cut = text.rfind("\n", 0, scan.pending_fence) + 1
+    spans = _merge_sorted_spans(heapq.merge(scan.fence_spans, scan.inline_spans, (s for s, _ in scan.direct)))
+    for start, end in reversed(spans):
+        if start < cut <= end:
+            cut = text.rfind("\n", 0, start) + 1
+    return cut
+
+
+def _try_parse(cmd_text: str) -> Optional[MemoryCommand]:
+    try:
+        return _parse_command_text(cmd_text)
+    except Exception:
+        # Skip malformed commands, but still remove their text
+        return None
 
 
 def strip_spans(text: str, spans: Sequence[Tuple[int, int]]) -> str:
     if not spans:
         return text
+    ordered = sorted(spans, key=lambda s: s[0])
+    pieces: List[str] = []
+    pos = 0
+    for start, end in ordered:
+        if start < pos:
+            return _strip_overlapping_spans(text, spans)
+        pieces.append(text[pos:start])
+        pos = end
+    pieces.append(text[pos:])
+    return "".join(pieces)
+
+
+def _strip_overlapping_spans(text: str, spans: Sequence[Tuple[int, int]]) -> str:
     # Remove from the end to preserve indices
     cleaned = text
     for start, end in sorted(spans, key=lambda s: s[0], reverse=True):
@@ -94,25 +273,12 @@ def strip_spans(text: str, spans: Sequence[Tuple[int, int]]) -> str:
     return cleaned
 
 
-def _merge_spans(spans: Sequence[Tuple[int, int]]) -> List[Tuple[int, int]]:
-    if not spans:
-        return []
-    sorted_spans = sorted(spans, key=lambda s: s[0])
+def _merge_sorted_spans(spans: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
     merged: List[Tuple[int, int]] = []
-    current_start, current_end = sorted_spans[0]
-    for start, end in sorted_spans[1:]:
-        if start <= current_end:
-            current_end = max(current_end, end)
+    for start, end in spans:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
         else:
-            merged.append((current_start, current_end))
-            current_start, current_end = start, end
-    merged.append((current_start, current_end))
+            merged.append((start, end))
     return merged
-
-
-def _is_span_covered(span: Tuple[int, int], covered_spans: Sequence[Tuple[int, int]]) -> bool:
-    s, e = span
-    for cs, ce in covered_spans:
-        if s >= cs and e <= ce:
-            return True
-    return False
\ No newline at end of file
@@ -1,23 +1,89 @@
 from __future__ import annotations
 
-from typing import List
+import threading
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
+from .assembler import ContextAssembler
+from .metrics import metrics
 from .models import ContextBlock, MemoryCommand, MemoryCommandType, ProcessResult
-from .parsing import extract_memory_commands, strip_spans
-from .storage import JsonStorage
+from .parsing import DEFAULT_SEARCH_K, extract_memory_commands, stream_boundary, strip_spans
+from .retention import AccessTracker
+from .storage import Storage, open_storage
 from .utils import iso_timestamp
 
+if TYPE_CHECKING:
+    from .vector_index import VectorIndex
+
 
 class ACTProcessor:
-    def __init__(self, storage: JsonStorage | None = None) -> None:
-        self.storage = storage or JsonStorage()
+    def __init__(self, storage: Storage | None = None) -> None:
+        self.storage = storage or open_storage()
+        self._search_index: Optional[VectorIndex] = None
+        self._search_lock = threading.Lock()
+        self._assembler: Optional[ContextAssembler] = None
+        # Retrieval times for least-recently-retrieved eviction (see act.retention)
+        self.access = AccessTracker()
+
+    def search_index(self) -> VectorIndex:
+        """The similarity index over the store, built on first use and then kept
+        current through a storage subscription."""
+        if self._search_index is None:
+            with self._search_lock:
+                if self._search_index is None:
+                    # numpy is only imported once something searches
+                    from .vector_index import VectorIndex
+
+                    index = VectorIndex()
+                    self.storage.subscribe(index.apply)
+                    for block in self.storage.list_blocks():
+                        index.add(block)
+                    self._search_index = index
+        return self._search_index
+
+    def search(self, query: str, k: int = DEFAULT_SEARCH_K) -> List[Tuple[ContextBlock, float]]:
+        """The ``k`` blocks most similar to ``query``, with cosine scores, best first."""
+        index = self.search_index()
+        # Merge in other processes' writes so the index sees them too
+        self.storage.refresh()
+        hits = []
+        for block_id, score in index.search(query, k):
+            block = self.storage.get_block(block_id)
+            if block is not None:
+                hits.append((block, score))
+        return hits
 
+    def assembler(self) -> ContextAssembler:
+        """The context assembler over the store, drawing candidates from ``search``."""
+        if self._assembler is None:
+            with self._search_lock:
+                if self._assembler is None:
+                    self._assembler = ContextAssembler(self.storage, search=self.search)
+        return self._assembler
+
+    @metrics.timed("process_model_output")
     def process_model_output(self, model_output_text: str) -> ProcessResult:
         commands, spans = extract_memory_commands(model_output_text)
+        result = self.execute_commands(commands)
+        result.cleaned_text = strip_spans(model_output_text, spans).strip()
+        return result
+
+    def process_many(self, model_output_texts: List[str]) -> List[ProcessResult]:
+        """Process several outputs, committing all of their STOREs together."""
+        with self.storage.batch():
+            return [self.process_model_output(text) for text in model_output_texts]
+
+    def execute_commands(self, commands: List[MemoryCommand]) -> ProcessResult:
+        """Run parsed commands against storage as one batch. ``cleaned_text`` is left empty."""
+        with self.storage.batch():
+            return self._execute(commands)
+
+    def _execute(self, commands: List[MemoryCommand]) -> ProcessResult:
         stored_blocks: List[ContextBlock] = []
         retrieved_blocks: List[ContextBlock] = []
+        searched_blocks: List[ContextBlock] = []
 
         for cmd in commands:
+            metrics.inc("act_commands_total", type=cmd.type.value.lower())
             if cmd.type == MemoryCommandType.STORE:
                 block = ContextBlock(
                     id=cmd.block_id or "",
@@ -27,19 +93,73 @@ class ACTProcessor:
                     timestamp=iso_timestamp(),
                     tags=cmd.tags,
                 )
-                self.storage.upsert_block(block)
-                stored_blocks.append(block)
+                # The stored block, which keeps its payload when only the timestamp moved
+                stored_blocks.append(self.storage.upsert_block(block))
             elif cmd.type == MemoryCommandType.RETRIEVE:
-                if not cmd.block_id:
+                block_ids = cmd.block_ids or ([cmd.block_id] if cmd.block_id else [])
+                if not block_ids:
                     continue
-                block = self.storage.get_block(cmd.block_id)
-                if block is not None:
-                    retrieved_blocks.append(block)
+                found = [b for b in self.storage.get_many(block_ids) if b is not None]
+                self.access.touch(b.id for b in found)
+                retrieved_blocks.extend(found)
+            elif cmd.type == MemoryCommandType.SEARCH:
+                if not cmd.query:
+                    continue
+                hits = [block for block, _ in self.search(cmd.query, cmd.top_k or DEFAULT_SEARCH_K)]
+                self.access.touch(b.id for b in hits)
+                searched_blocks.extend(hits)
 
-        cleaned = strip_spans(model_output_text, spans)
         return ProcessResult(
-            cleaned_text=cleaned.strip(),
+            cleaned_text="",
             stored_blocks=stored_blocks,
             retrieved_blocks=retrieved_blocks,
+            searched_blocks=searched_blocks,
             commands=commands,
-        )
\ No newline at end of file
+        )
+
+
+class StreamingACTProcessor:
+    """Processes model output chunk by chunk as it is generated.
+
+    ``feed`` returns the cleaned text that is final so far and runs every command
+    that has closed; only an unfinished line, an open fence or a line that a later
+    command could still absorb is held back. Concatenating the ``cleaned_text`` of
+    every ``feed`` and the final ``close`` gives the same text as
+    ``ACTProcessor.process_model_output`` on the whole output. Commands run in the
+    order their segment completes rather than grouped by syntax.
+    """
+
+    def __init__(self, processor: ACTProcessor | None = None) -> None:
+        self.processor = processor or ACTProcessor()
+        self._buffer = ""
+        self._started = False
+        self._pending_whitespace = ""
+
+    def feed(self, chunk: str) -> ProcessResult:
+        self._buffer += chunk
+        # Nothing can become final until a line is completed
+        cut = stream_boundary(self._buffer) if "\n" in chunk else 0
+        if cut == 0:
+            return ProcessResult(cleaned_text="")
+        segment, self._buffer = self._buffer[:cut], self._buffer[cut:]
+        return self._process(segment, final=False)
+
+    def close(self) -> ProcessResult:
+        segment, self._buffer = self._buffer, ""
+        return self._process(segment, final=True)
+
+    def _process(self, segment: str, final: bool) -> ProcessResult:
+        commands, spans = extract_memory_commands(segment)
+        result = self.processor.execute_commands(commands)
+        cleaned = strip_spans(segment, spans)
+        # Reproduce the batch path's final strip(): drop leading whitespace, and hold
+        # trailing whitespace back until we know more text follows it.
+        if not self._started:
+            cleaned = cleaned.lstrip()
+            self._started = bool(cleaned)
+        else:
+            cleaned = self._pending_whitespace + cleaned
+        text = cleaned.rstrip()
+        self._pending_whitespace = "" if final else cleaned[len(text) :]
+        result.cleaned_text = text
+        return result
@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import ContextBlock, utf8_len
+from .storage import Storage
+from .transfer import iter_blocks
+
+DEFAULT_SWEEP_BATCH = 500
+DEFAULT_SWEEP_INTERVAL = 60.0
+# Breathing room between delete batches, so writers queued on the store lock get in
+DEFAULT_SWEEP_PAUSE = 0.01
+
+_DURATION = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*$")
+_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_duration(value: object) -> float:
+    """Seconds for a number of seconds or a string such as ``"90s"``, ``"12h"`` or ``"30d"``."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        seconds = float(value)
+    else:
+        m = _DURATION.match(str(value))
+        if not m:
+            raise ValueError(f"Invalid duration {value!r}: use seconds or a number with s, m, h, d or w")
+        seconds = float(m.group(1)) * _UNITS[m.group(2)]
+    if seconds <= 0:
+        raise ValueError(f"Duration must be positive: {value!r}")
+    return seconds
+
+
+@dataclass
+class Limits:
+    """Limits on one scope of blocks; ``None`` means unlimited."""
+
+    max_age: Optional[float] = None
+    max_blocks: Optional[int] = None
+    max_bytes: Optional[int] = None
+
+    @staticmethod
+    def from_dict(data: dict) -> "Limits":
+        unknown = set(data) - {"max_age", "max_blocks", "max_bytes"}
+        if unknown:
+            raise ValueError(f"Unknown retention limits: {', '.join(sorted(unknown))}")
+        limits = Limits(
+            max_age=parse_duration(data["max_age"]) if data.get("max_age") is not None else None,
+            max_blocks=data.get("max_blocks"),
+            max_bytes=data.get("max_bytes"),
+        )
+        for name in ("max_blocks", "max_bytes"):
+            value = getattr(limits, name)
+            if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < 0):
+                raise ValueError(f"{name} must be a non-negative integer, not {value!r}")
+        return limits
+
+
+@dataclass
+class RetentionPolicy:
+    """Limits for the whole store (``default``) and for blocks of a type or with a tag.
+
+    Read from JSON such as::
+
+        {"default": {"max_blocks": 100000, "max_bytes": 500000000},
+         "types": {"scratch": {"max_age": "1d"}},
+         "tags": {"ephemeral": {"max_age": "2h", "max_blocks": 100}}}
+
+    A block must satisfy every scope it falls in.
+    """
+
+    default: Optional[Limits] = None
+    types: Dict[str, Limits] = field(default_factory=dict)
+    tags: Dict[str, Limits] = field(default_factory=dict)
+
+    @staticmethod
+    def from_dict(data: dict) -> "RetentionPolicy":
+        unknown = set(data) - {"default", "types", "tags"}
+        if unknown:
+            raise ValueError(f"Unknown retention sections: {', '.join(sorted(unknown))}")
+        return RetentionPolicy(
+            default=Limits.from_dict(data["default"]) if data.get("default") else None,
+            types={t: Limits.from_dict(v) for t, v in data.get("types", {}).items()},
+            tags={t.lower(): Limits.from_dict(v) for t, v in data.get("tags", {}).items()},
+        )
+
+    @staticmethod
+    def load(path: Path) -> "RetentionPolicy":
+        return RetentionPolicy.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+    @staticmethod
+    def from_env() -> Optional["RetentionPolicy"]:
+        """The policy in the file named by ``ACT_RETENTION``, if set."""
+        path = os.environ.get("ACT_RETENTION")
+        return RetentionPolicy.load(Path(path)) if path else None
+
+
+class AccessTracker:
+    """When each block was last retrieved by this process, in epoch seconds.
+
+    Kept in memory only, so recording a retrieval never turns a read into a write;
+    blocks not retrieved since the process started count as last used when written.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._last: Dict[str, float] = {}
+
+    def touch(self, block_ids: Iterable[str], now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        with self._lock:
+            for block_id in block_ids:
+                self._last[block_id] = now
+
+    def last_used(self, block_id: str, written: float) -> float:
+        return max(self._last.get(block_id, written), written)
+
+    def forget(self, block_ids: Iterable[str]) -> None:
+        with self._lock:
+            for block_id in block_ids:
+                self._last.pop(block_id, None)
+
+
+@dataclass
+class _Entry:
+    # What a plan needs of a block, so planning a large store does not hold its content
+    id: str
+    timestamp: str
+    epoch: float
+    type: str
+    tags: Tuple[str, ...]
+    size: int
+
+
+def block_size(block: ContextBlock) -> int:
+    """UTF-8 bytes of id and summary plus the content as the store keeps it, which
+    for compressed and memory-mapped blocks is known without decoding the content."""
+    return utf8_len(block.id) + utf8_len(block.summary) + block.stored_size
+
+
+def _entry(block: ContextBlock) -> _Entry:
+    return _Entry(
+        block.id, block.timestamp, block.epoch, block.type, tuple(t.lower() for t in block.tags), block_size(block)
+    )
+
+
+def plan(
+    entries: List[_Entry], policy: RetentionPolicy, now: float, access: Optional[AccessTracker] = None
+) -> Dict[str, str]:
+    """Ids to delete, each with the limit it broke. Expired blocks go first; then, while
+    a scope is over its count or byte limit, its least recently retrieved blocks."""
+    scopes: List[Tuple[str, Limits, List[_Entry]]] = []
+    if policy.default is not None:
+        scopes.append(("store", policy.default, entries))
+    for type_name, limits in policy.types.items():
+        scopes.append((f"type={type_name}", limits, [e for e in entries if e.type == type_name]))
+    for tag, limits in policy.tags.items():
+        scopes.append((f"tag={tag}", limits, [e for e in entries if tag in e.tags]))
+
+    doomed: Dict[str, str] = {}
+    for scope, limits, members in scopes:
+        if limits.max_age is None:
+            continue
+        cutoff = now - limits.max_age
+        for e in members:
+            # Blocks without a parseable timestamp have no age to judge
+            if math.isfinite(e.epoch) and e.epoch < cutoff:
+                doomed.setdefault(e.id, f"{scope} max_age")
+
+    last_used = access.last_used if access is not None else (lambda _id, written: written)
+    for scope, limits, members in scopes:
+        alive = [e for e in members if e.id not in doomed]
+        excess_blocks = len(alive) - limits.max_blocks if limits.max_blocks is not None else 0
+        excess_bytes = sum(e.size for e in alive) - limits.max_bytes if limits.max_bytes is not None else 0
+        if excess_blocks <= 0 and excess_bytes <= 0:
+            continue
+        alive.sort(key=lambda e: (last_used(e.id, e.epoch), e.timestamp, e.id))
+        for e in alive:
+            if excess_blocks <= 0 and excess_bytes <= 0:
+                break
+            doomed[e.id] = f"{scope} {'max_blocks' if excess_blocks > 0 else 'max_bytes'}"
+            excess_blocks -= 1
+            excess_bytes -= e.size
+    return doomed
+
+
+@dataclass
+class SweepResult:
+    scanned: int = 0
+    deleted: int = 0
+    freed_bytes: int = 0
+    reasons: Counter = field(default_factory=Counter)
+
+
+def sweep(
+    storage: Storage,
+    policy: RetentionPolicy,
+    access: Optional[AccessTracker] = None,
+    batch_size: int = DEFAULT_SWEEP_BATCH,
+    now: Optional[float] = None,
+    dry_run: bool = False,
+    pause: float = 0.0,
+    cancel: Optional[threading.Event] = None,
+) -> SweepResult:
+    """Delete the blocks ``policy`` does not allow, at most ``batch_size`` per commit.
+
+    The store is read a page at a time to plan. A block rewritten since the plan, or
+    retrieved since then when it was picked for space rather than age, is kept.
+    ``pause`` sleeps between batches so other writers are not held off; setting
+    ``cancel`` stops the sweep after the current batch.
+    """
+    now = time.time() if now is None else now
+    entries = [_entry(b) for b in iter_blocks(storage)]
+    doomed = plan(entries, policy, now, access)
+    result = SweepResult(scanned=len(entries))
+    planned = {e.id: e for e in entries if e.id in doomed}
+    if dry_run:
+        result.deleted = len(doomed)
+        result.freed_bytes = sum(e.size for e in planned.values())
+        result.reasons.update(doomed.values())
+        return result
+
+    ids = list(doomed)
+    for start in range(0, len(ids), batch_size):
+        chunk = ids[start : start + batch_size]
+        deleted = []
+        with storage.batch():
+            for block_id, block in zip(chunk, storage.get_many(chunk)):
+                entry = planned[block_id]
+                if block is None or block.timestamp != entry.timestamp:
+                    continue
+                reason = doomed[block_id]
+                if not reason.endswith("max_age") and access is not None and access.last_used(block_id, 0) > now:
+                    continue
+                if storage.delete_block(block_id):
+                    deleted.append(block_id)
+                    result.freed_bytes += entry.size
+                    result.reasons[reason] += 1
+        result.deleted += len(deleted)
+        if access is not None:
+            access.forget(deleted)
+        if cancel is not None and cancel.wait(pause):
+            break
+        if cancel is None and pause:
+            time.sleep(pause)
+    return result
+
+
+class Sweeper:
+    """Runs ``sweep`` on a daemon thread every ``interval`` seconds until ``stop()``.
+
+    An error in one sweep is kept in ``last_error`` and the next sweep runs as usual.
+    """
+
+    def __init__(
+        self,
+        storage: Storage,
+        policy: RetentionPolicy,
+        access: Optional[AccessTracker] = None,
+        interval: float = DEFAULT_SWEEP_INTERVAL,
+        batch_size: int = DEFAULT_SWEEP_BATCH,
+        pause: float = DEFAULT_SWEEP_PAUSE,
+    ) -> None:
+        self.storage = storage
+        self.policy = policy
+        self.access = access
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+        self.sweeps = 0
+        self.deleted = 0
+        self.last_result: Optional[SweepResult] = None
+        self.last_error: Optional[BaseException] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="act-retention", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                result = sweep(
+                    self.storage, self.policy, self.access, self.batch_size, pause=self.pause, cancel=self._stop
+                )
+            except Exception as exc:  # keep sweeping; the next run may well succeed
+                self.last_error = exc
+                continue
+            self.sweeps += 1
+            self.deleted += result.deleted
+            self.last_result = result
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -1,19 +1,46 @@
 from __future__ import annotations
 
-from typing import List, Optional
+import argparse
+import codecs
+import contextlib
+import json
+import os
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Union
 
-from fastapi import FastAPI, HTTPException
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
-from .models import ContextBlock
-from .processor import ACTProcessor
-from .storage import JsonStorage
+from .assembler import DEFAULT_SEARCH_K as DEFAULT_ASSEMBLE_K
+from .async_storage import AsyncStorage
+from .cached_storage import CachedStorage
+from .metrics import SamplingProfiler, metrics
+from .models import ContextBlock, ProcessResult
+from .namespaces import DEFAULT_MAX_OPEN, NamespacePool, namespace_path, validate_namespace
+from .pagination import encode_cursor
+from .parsing import DEFAULT_SEARCH_K
+from .processor import ACTProcessor, StreamingACTProcessor
+from .retention import DEFAULT_SWEEP_INTERVAL, RetentionPolicy, Sweeper
+from .storage import open_storage
+from .transfer import DEFAULT_BATCH_SIZE, IMPORT_MODES, ImportStats, block_line, commit_batch, parse_line
+from .utils import get_default_store_path, iso_timestamp
+
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
 
 
 class ProcessOutputRequest(BaseModel):
     text: str = Field(..., description="Raw model output text to process")
 
 
+class ProcessBatchRequest(BaseModel):
+    texts: List[str] = Field(..., description="Raw model outputs to process in one storage commit")
+
+
 class StoreRequest(BaseModel):
     id: str
     summary: str
@@ -22,6 +49,14 @@ class StoreRequest(BaseModel):
     tags: List[str] = []
 
 
+class BatchGetRequest(BaseModel):
+    ids: List[str] = Field(..., max_length=10_000)
+
+
+class BatchPutRequest(BaseModel):
+    blocks: List[StoreRequest] = Field(..., max_length=10_000)
+
+
 class BlockResponse(BaseModel):
     id: str
     summary: str
@@ -46,11 +81,183 @@ class ProcessOutputResponse(BaseModel):
     cleaned_text: str
     stored_blocks: List[BlockResponse]
     retrieved_blocks: List[BlockResponse]
+    searched_blocks: List[BlockResponse]
+
+
+class BatchGetResponse(BaseModel):
+    blocks: List[BlockResponse]
+    missing: List[str]
+
+
+class ImportResponse(BaseModel):
+    read: int
+    stored: int
+    skipped: int
+
 
+class SearchHit(BaseModel):
+    score: float
+    block: BlockResponse
 
-app = FastAPI(title="Active Context Transformer (ACT)", version="0.1.0")
-_storage = JsonStorage()
-_processor = ACTProcessor(storage=_storage)
+
+class AssembleRequest(BaseModel):
+    budget: int = Field(..., ge=0, description="Token budget for the whole context")
+    conversation: List[str] = Field([], description="Recent turns, oldest first")
+    block_ids: Optional[List[str]] = Field(None, description="Candidate blocks, most valuable first")
+    query: Optional[str] = Field(None, description="Search text for candidates when block_ids is omitted")
+    k: int = Field(DEFAULT_ASSEMBLE_K, ge=1, le=1000)
+
+
+class AssembledBlockResponse(BaseModel):
+    id: str
+    full: bool
+    tokens: int
+    text: str
+
+
+class AssembleResponse(BaseModel):
+    budget: int
+    tokens: int
+    conversation: List[str]
+    blocks: List[AssembledBlockResponse]
+    text: str
+
+
+@contextlib.asynccontextmanager
+async def _lifespan(_: FastAPI) -> AsyncIterator[None]:
+    # ACT_PROFILE=path samples stacks for the life of the process; "{pid}" in the
+    # path keeps workers from overwriting each other's output
+    profile = os.environ.get("ACT_PROFILE")
+    profiler = None
+    if profile:
+        profiler = SamplingProfiler(Path(profile.format(pid=os.getpid())))
+        profiler.start()
+    try:
+        yield
+    finally:
+        for sweeper in list(_sweepers.values()):
+            sweeper.stop()
+        if profiler is not None:
+            profiler.stop()
+
+
+app = FastAPI(title="Active Context Transformer (ACT)", version="0.1.0", lifespan=_lifespan)
+
+
+@app.middleware("http")
+async def _time_requests(request: Request, call_next):  # type: ignore[no-untyped-def]
+    if not metrics.enabled:
+        return await call_next(request)
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    metrics.observe(
+        "act_request_seconds",
+        time.perf_counter() - start,
+        method=request.method,
+        # The route template, so /retrieve/{block_id} is one series rather than one per id
+        route=getattr(route, "path", "unmatched"),
+    )
+    return response
+
+
+router = APIRouter()
+_processor: Optional[ACTProcessor] = None
+_processor_lock = threading.Lock()
+_namespaces: "Optional[NamespacePool[ACTProcessor]]" = None
+_sweepers: "weakref.WeakKeyDictionary[ACTProcessor, Sweeper]" = weakref.WeakKeyDictionary()
+
+
+def _new_processor(path: Optional[Path] = None) -> ACTProcessor:
+    """A processor over the store at ``path``, swept in the background when
+    ``ACT_RETENTION`` names a retention policy file."""
+    processor = ACTProcessor(storage=open_storage(path))
+    policy = RetentionPolicy.from_env()
+    if policy is not None:
+        interval = float(os.environ.get("ACT_RETENTION_INTERVAL", DEFAULT_SWEEP_INTERVAL))
+        sweeper = Sweeper(processor.storage, policy, processor.access, interval=interval)
+        sweeper.start()
+        _sweepers[processor] = sweeper
+    return processor
+
+
+def _open_namespace(namespace: str) -> ACTProcessor:
+    return _new_processor(namespace_path(get_default_store_path(), namespace))
+
+
+def _close_namespace(processor: ACTProcessor) -> None:
+    sweeper = _sweepers.pop(processor, None)
+    if sweeper is not None:
+        sweeper.stop()
+    with _processor_lock:
+        store = _async_stores.pop(processor, None)
+    if store is not None:
+        store.close()
+    processor.storage.close()
+
+
+def namespace_pool() -> "NamespacePool[ACTProcessor]":
+    """Open namespace stores, at most ``ACT_MAX_NAMESPACES`` (default 64) of them idle at once."""
+    global _namespaces
+    if _namespaces is None:
+        with _processor_lock:
+            if _namespaces is None:
+                max_open = int(os.environ.get("ACT_MAX_NAMESPACES", DEFAULT_MAX_OPEN))
+                _namespaces = NamespacePool(_open_namespace, _close_namespace, max_open=max_open)
+    return _namespaces
+
+
+def get_processor(request: Request) -> Iterator[ACTProcessor]:
+    """The default store's processor, or under ``/ns/{namespace}`` that namespace's,
+    held open until the response has been sent. Streamed responses rely on FastAPI
+    0.118 or later, which tears yield dependencies down after the body is streamed."""
+    namespace = request.path_params.get("namespace")
+    if namespace is None:
+        # Opened on first request so `act-server --store-path` can take effect first
+        global _processor
+        if _processor is None:
+            with _processor_lock:
+                if _processor is None:
+                    _processor = _new_processor()
+        yield _processor
+        return
+    try:
+        validate_namespace(namespace)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    with namespace_pool().lease(namespace) as processor:
+        yield processor
+
+
+_async_stores: "weakref.WeakKeyDictionary[ACTProcessor, AsyncStorage]" = weakref.WeakKeyDictionary()
+
+
+def get_store(processor: ACTProcessor = Depends(get_processor)) -> AsyncStorage:
+    """Async facade over the processor's storage; handlers never block the event loop on it."""
+    with _processor_lock:
+        store = _async_stores.get(processor)
+        if store is None:
+            store = _async_stores[processor] = AsyncStorage(processor.storage)
+    return store
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(processor: ACTProcessor = Depends(get_processor)) -> str:
+    """Counters and latency histograms of this worker process in the Prometheus text format."""
+    text = metrics.render()
+    if isinstance(processor.storage, CachedStorage):
+        for name, value in processor.storage.stats().items():
+            kind = "counter" if name in ("hits", "misses", "evictions") else "gauge"
+            suffix = "_total" if kind == "counter" else ""
+            text += f"# TYPE act_cache_{name}{suffix} {kind}\nact_cache_{name}{suffix} {value}\n"
+    sweeper = _sweepers.get(processor)
+    if sweeper is not None:
+        text += f"# TYPE act_retention_sweeps_total counter\nact_retention_sweeps_total {sweeper.sweeps}\n"
+        text += f"# TYPE act_retention_deleted_total counter\nact_retention_deleted_total {sweeper.deleted}\n"
+    if _namespaces is not None:
+        text += f"# TYPE act_namespaces_open gauge\nact_namespaces_open {len(_namespaces)}\n"
+        text += f"# TYPE act_namespaces_evicted_total counter\nact_namespaces_evicted_total {_namespaces.evicted}\n"
+    return text
 
 
 @app.get("/health")
@@ -58,49 +265,405 @@ async def health() -> dict:
     return {"status": "ok"}
 
 
-@app.post("/process_output", response_model=ProcessOutputResponse)
-async def process_output(req: ProcessOutputRequest) -> ProcessOutputResponse:
-    result = _processor.process_model_output(req.text)
+def _process_output_response(result: ProcessResult) -> ProcessOutputResponse:
     return ProcessOutputResponse(
         cleaned_text=result.cleaned_text,
         stored_blocks=[BlockResponse.from_block(b) for b in result.stored_blocks],
         retrieved_blocks=[BlockResponse.from_block(b) for b in result.retrieved_blocks],
+        searched_blocks=[BlockResponse.from_block(b) for b in result.searched_blocks],
     )
 
 
-@app.post("/store", response_model=BlockResponse)
-async def store_block(req: StoreRequest) -> BlockResponse:
+@router.post("/process_output", response_model=ProcessOutputResponse)
+async def process_output(
+    req: ProcessOutputRequest,
+    processor: ACTProcessor = Depends(get_processor),
+    store: AsyncStorage = Depends(get_store),
+) -> ProcessOutputResponse:
+    result = await store.write(processor.process_model_output, req.text)
+    return _process_output_response(result)
+
+
+@router.post("/process_output/batch", response_model=List[ProcessOutputResponse])
+async def process_output_batch(
+    req: ProcessBatchRequest,
+    processor: ACTProcessor = Depends(get_processor),
+    store: AsyncStorage = Depends(get_store),
+) -> List[ProcessOutputResponse]:
+    results = await store.write(processor.process_many, req.texts)
+    return [_process_output_response(r) for r in results]
+
+
+class _DuplexStreamingResponse(StreamingResponse):
+    # The body iterator reads the request stream itself, so Starlette's background
+    # disconnect listener must not compete with it for receive() messages; a client
+    # disconnect surfaces from request.stream() instead.
+    async def __call__(self, scope, receive, send) -> None:  # type: ignore[no-untyped-def]
+        await self.stream_response(send)
+
+
+def _sse(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+def _result_events(result: ProcessResult) -> Iterator[str]:
+    if result.cleaned_text:
+        yield _sse("text", json.dumps({"text": result.cleaned_text}, ensure_ascii=False))
+    for block in result.stored_blocks:
+        yield _sse("stored", BlockResponse.from_block(block).model_dump_json())
+    for block in result.retrieved_blocks:
+        yield _sse("retrieved", BlockResponse.from_block(block).model_dump_json())
+    for block in result.searched_blocks:
+        yield _sse("searched", BlockResponse.from_block(block).model_dump_json())
+
+
+@router.post("/process_output/stream")
+async def process_output_stream(
+    request: Request,
+    processor: ACTProcessor = Depends(get_processor),
+    store: AsyncStorage = Depends(get_store),
+) -> _DuplexStreamingResponse:
+    """Process a model output streamed in the request body, replying with Server-Sent Events.
+
+    Emits ``text`` events with cleaned text as soon as it is final, ``stored``,
+    ``retrieved`` and ``searched`` events as each command closes, and a final
+    ``done`` event.
+    """
+    stream = StreamingACTProcessor(processor)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    async def events() -> AsyncIterator[str]:
+        async for chunk in request.stream():
+            text = decoder.decode(chunk)
+            result = await store.write(stream.feed, text) if "\n" in text else stream.feed(text)
+            for event in _result_events(result):
+                yield event
+        for event in _result_events(await store.write(stream.feed, decoder.decode(b"", final=True))):
+            yield event
+        for event in _result_events(await store.write(stream.close)):
+            yield event
+        yield _sse("done", "{}")
+
+    return _DuplexStreamingResponse(events(), media_type="text/event-stream")
+
+
+@router.post("/store", response_model=BlockResponse)
+async def store_block(
+    req: StoreRequest,
+    processor: ACTProcessor = Depends(get_processor),
+    store: AsyncStorage = Depends(get_store),
+) -> BlockResponse:
     # Reuse processor path to keep behavior consistent
     cmd_text = f"STORE|{req.id}|{req.summary}|{req.type}|{req.content}|{','.join(req.tags)}"
-    result = _processor.process_model_output(cmd_text)
+    result = await store.write(processor.process_model_output, cmd_text)
     if not result.stored_blocks:
         raise HTTPException(status_code=400, detail="Failed to store block")
     return BlockResponse.from_block(result.stored_blocks[0])
 
 
-@app.get("/retrieve/{block_id}", response_model=BlockResponse)
-async def retrieve_block(block_id: str) -> BlockResponse:
-    block = _storage.get_block(block_id)
+@router.get("/retrieve/{block_id}", response_model=BlockResponse)
+async def retrieve_block(
+    block_id: str,
+    processor: ACTProcessor = Depends(get_processor),
+    store: AsyncStorage = Depends(get_store),
+) -> BlockResponse:
+    block = await store.get_block(block_id)
     if not block:
         raise HTTPException(status_code=404, detail="Block not found")
+    processor.access.touch([block.id])
     return BlockResponse.from_block(block)
 
 
-@app.get("/blocks", response_model=List[BlockResponse])
-async def list_blocks(query: Optional[str] = None, tag: Optional[str] = None) -> List[BlockResponse]:
-    blocks = _storage.list_blocks(query=query, tag=tag)
+@router.post("/blocks:batchGet", response_model=BatchGetResponse)
+async def batch_get(
+    req: BatchGetRequest,
+    processor: ACTProcessor = Depends(get_processor),
+    store: AsyncStorage = Depends(get_store),
+) -> BatchGetResponse:
+    """Fetch many blocks in one read; ids that are not stored are listed in ``missing``."""
+    found = await store.get_many(req.ids)
+    processor.access.touch(b.id for b in found if b is not None)
+    return BatchGetResponse(
+        blocks=[BlockResponse.from_block(b) for b in found if b is not None],
+        missing=[block_id for block_id, b in zip(req.ids, found) if b is None],
+    )
+
+
+@router.post("/blocks:batchPut", response_model=List[BlockResponse])
+async def batch_put(req: BatchPutRequest, store: AsyncStorage = Depends(get_store)) -> List[BlockResponse]:
+    """Store many blocks in one commit."""
+    timestamp = iso_timestamp()
+    blocks = [
+        ContextBlock(id=b.id, content=b.content, summary=b.summary, type=b.type, timestamp=timestamp, tags=b.tags)
+        for b in req.blocks
+    ]
+    if any(not b.id.strip() for b in blocks):
+        raise HTTPException(status_code=400, detail="Block ids must not be empty")
+    await store.put_many(blocks)
     return [BlockResponse.from_block(b) for b in blocks]
 
 
-@app.delete("/blocks/{block_id}")
-async def delete_block(block_id: str) -> dict:
-    removed = _storage.delete_block(block_id)
+BLOCK_FIELDS = ("id", "summary", "type", "content", "timestamp", "tags")
+NDJSON = "application/x-ndjson"
+# Blocks fetched per storage call while streaming an unbounded NDJSON listing
+_STREAM_PAGE = 1000
+# A listed block carries only the fields asked for, so none of them is required
+_LISTED_BLOCK = {"type": "object", "properties": BlockResponse.model_json_schema()["properties"]}
+_LIST_BLOCKS_RESPONSES: Dict[Union[int, str], Dict[str, Any]] = {
+    200: {
+        "description": "Blocks newest first, each with the fields selected by `fields` and `view`. "
+        f"A full page sets `{NEXT_CURSOR_HEADER}`.",
+        "content": {
+            "application/json": {"schema": {"type": "array", "items": _LISTED_BLOCK}},
+            NDJSON: {"schema": {"type": "string", "description": "One block object per line"}},
+        },
+    },
+    400: {"description": "Unknown field, summary view with content, or a bad cursor"},
+}
+
+
+def _parse_fields(fields: Optional[str], view: str) -> tuple:
+    if fields is None:
+        return BLOCK_FIELDS if view == "full" else tuple(f for f in BLOCK_FIELDS if f != "content")
+    wanted = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = wanted - set(BLOCK_FIELDS)
+    if unknown or not wanted:
+        raise HTTPException(
+            status_code=400, detail=f"fields must be a comma-separated subset of {', '.join(BLOCK_FIELDS)}"
+        )
+    if view == "summary" and "content" in wanted:
+        raise HTTPException(status_code=400, detail="view=summary cannot include content")
+    return tuple(f for f in BLOCK_FIELDS if f in wanted)
+
+
+def _project(block: ContextBlock, fields: tuple) -> dict:
+    # Plain dicts straight to json.dumps: the listing's hot path skips pydantic entirely
+    return {f: list(block.tags) if f == "tags" else getattr(block, f) for f in fields}
+
+
+@router.get("/blocks", responses=_LIST_BLOCKS_RESPONSES)
+async def list_blocks(
+    request: Request,
+    query: Optional[str] = None,
+    tag: Optional[str] = None,
+    top_k: Optional[int] = Query(None, ge=1),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,summary"),
+    view: str = Query("full", pattern="^(full|summary)$", description="'summary' leaves out content"),
+    store: AsyncStorage = Depends(get_store),
+) -> Response:
+    """Blocks newest first. Send ``Accept: application/x-ndjson`` to stream one JSON
+    object per line instead of a single array."""
+    selected = _parse_fields(fields, view)
+    stream = NDJSON in request.headers.get("accept", "")
+    kwargs = dict(query=query, tag=tag, top_k=top_k, since=since, until=until)
+    # Unbounded NDJSON listings are fetched a page at a time as the response is written
+    paged = stream and top_k is None and limit is None
+    try:
+        blocks = await store.list_blocks(limit=_STREAM_PAGE if paged else limit, cursor=cursor, **kwargs)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    headers = {}
+    if top_k is None and limit is not None and len(blocks) == limit:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(blocks[-1])
+    if not stream:
+        body = json.dumps([_project(b, selected) for b in blocks], ensure_ascii=False)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    async def lines() -> AsyncIterator[str]:
+        page = blocks
+        while True:
+            yield "".join(json.dumps(_project(b, selected), ensure_ascii=False) + "\n" for b in page)
+            if not paged or len(page) < _STREAM_PAGE:
+                return
+            page = await store.list_blocks(limit=_STREAM_PAGE, cursor=encode_cursor(page[-1]), **kwargs)
+
+    return StreamingResponse(lines(), media_type=NDJSON, headers=headers)
+
+
+@router.get("/blocks:export")
+async def export_blocks(
+    query: Optional[str] = None,
+    tag: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    store: AsyncStorage = Depends(get_store),
+) -> StreamingResponse:
+    """Every matching block as NDJSON, newest first, read from the store a page at a
+    time; the format ``POST /blocks:import`` and ``act import`` read."""
+    kwargs = dict(query=query, tag=tag, since=since, until=until)
+    try:
+        first = await store.list_blocks(limit=_STREAM_PAGE, **kwargs)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    async def lines() -> AsyncIterator[str]:
+        page = first
+        while True:
+            yield "".join(block_line(b) for b in page)
+            if len(page) < _STREAM_PAGE:
+                return
+            page = await store.list_blocks(limit=_STREAM_PAGE, cursor=encode_cursor(page[-1]), **kwargs)
+
+    return StreamingResponse(lines(), media_type=NDJSON)
+
+
+@router.post("/blocks:import", response_model=ImportResponse)
+async def import_blocks(
+    request: Request,
+    mode: str = Query("upsert", pattern=f"^({'|'.join(IMPORT_MODES)})$", description="'skip' keeps stored blocks"),
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=100_000),
+    store: AsyncStorage = Depends(get_store),
+) -> ImportResponse:
+    """Store NDJSON blocks streamed in the request body, committing every ``batch_size``.
+
+    Only one batch is held in memory. A malformed line fails the request with 400;
+    the batches before it stay committed.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    timestamp = iso_timestamp()
+    stats = ImportStats()
+    batch: List[ContextBlock] = []
+    pending = ""
+    lineno = 0
+
+    async def add(line: str) -> None:
+        nonlocal lineno
+        lineno += 1
+        block = parse_line(line, lineno, timestamp)
+        if block is None:
+            return
+        batch.append(block)
+        stats.read += 1
+        if len(batch) >= batch_size:
+            await flush()
+
+    async def flush() -> None:
+        stored = await store.write(commit_batch, store.storage, list(batch), mode)
+        stats.stored += stored
+        stats.skipped += len(batch) - stored
+        batch.clear()
+
+    try:
+        async for chunk in request.stream():
+            *lines, pending = (pending + decoder.decode(chunk)).split("\n")
+            for line in lines:
+                await add(line)
+        await add(pending + decoder.decode(b"", final=True))
+    except ValueError as exc:
+        detail = f"{exc} ({stats.stored} blocks were stored before it)"
+        raise HTTPException(status_code=400, detail=detail)
+    if batch:
+        await flush()
+    return ImportResponse(read=stats.read, stored=stats.stored, skipped=stats.skipped)
+
+
+@router.get("/search", response_model=List[SearchHit])
+async def search(
+    q: str = Query(..., min_length=1),
+    k: int = Query(DEFAULT_SEARCH_K, ge=1, le=1000),
+    processor: ACTProcessor = Depends(get_processor),
+    store: AsyncStorage = Depends(get_store),
+) -> List[SearchHit]:
+    """Blocks most similar to ``q`` by cosine similarity of hashed term vectors."""
+    hits = await store.read(processor.search, q, k)
+    return [SearchHit(score=score, block=BlockResponse.from_block(block)) for block, score in hits]
+
+
+@router.post("/assemble", response_model=AssembleResponse)
+async def assemble(
+    req: AssembleRequest,
+    processor: ACTProcessor = Depends(get_processor),
+    store: AsyncStorage = Depends(get_store),
+) -> AssembleResponse:
+    """Pack recent conversation and the most valuable blocks into ``budget`` tokens."""
+    candidates = None
+    if req.block_ids is not None:
+        found = await store.get_many(req.block_ids)
+        missing = [block_id for block_id, block in zip(req.block_ids, found) if block is None]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Blocks not found: {', '.join(missing)}")
+        candidates = found
+    context = await store.read(
+        processor.assembler().assemble, req.budget, req.conversation, candidates, req.query, req.k
+    )
+    processor.access.touch(b.block.id for b in context.blocks)
+    return AssembleResponse(
+        budget=context.budget,
+        tokens=context.tokens,
+        conversation=context.conversation,
+        blocks=[
+            AssembledBlockResponse(id=b.block.id, full=b.full, tokens=b.tokens, text=b.text) for b in context.blocks
+        ],
+        text=context.render(),
+    )
+
+
+@router.delete("/blocks/{block_id}")
+async def delete_block(block_id: str, store: AsyncStorage = Depends(get_store)) -> dict:
+    removed = await store.delete_block(block_id)
     if not removed:
         raise HTTPException(status_code=404, detail="Block not found")
     return {"deleted": True, "id": block_id}
 
 
+app.include_router(router)
+# Every store route again, scoped to one namespace's store
+app.include_router(router, prefix="/ns/{namespace}")
+
+
 def main() -> None:
     import uvicorn
 
-    uvicorn.run("act.server:app", host="0.0.0.0", port=8000, reload=False)
\ No newline at end of file
+    parser = argparse.ArgumentParser(prog="act-server", description="Run the ACT HTTP server.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--uds", default=None, help="Listen on this Unix domain socket instead of host and port (see act --remote)."
+    )
+    parser.add_argument("--store-path", default=None, help="Storage file (.db for SQLite). Defaults to ACT_STORE_PATH.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes sharing the store.")
+    parser.add_argument(
+        "--max-namespaces",
+        type=int,
+        default=None,
+        help=f"Idle namespace stores kept open per worker (default {DEFAULT_MAX_OPEN}). Sets ACT_MAX_NAMESPACES.",
+    )
+    parser.add_argument(
+        "--retention",
+        default=None,
+        help="Retention policy JSON file enforced by a background sweeper in every store. Sets ACT_RETENTION.",
+    )
+    parser.add_argument(
+        "--retention-interval",
+        type=float,
+        default=None,
+        help=f"Seconds between retention sweeps (default {DEFAULT_SWEEP_INTERVAL:g}). Sets ACT_RETENTION_INTERVAL.",
+    )
+    parser.add_argument(
+        "--profile",
+        default=None,
+        help="Write sampled stacks (collapsed format) here on shutdown; '{pid}' is replaced per worker. Sets ACT_PROFILE.",
+    )
+    args = parser.parse_args()
+    if args.store_path:
+        os.environ["ACT_STORE_PATH"] = args.store_path
+    if args.profile:
+        os.environ["ACT_PROFILE"] = args.profile
+    if args.retention:
+        try:
+            RetentionPolicy.load(Path(args.retention))
+        except (OSError, ValueError) as exc:
+            parser.error(f"--retention: {exc}")
+        os.environ["ACT_RETENTION"] = args.retention
+    if args.retention_interval:
+        os.environ["ACT_RETENTION_INTERVAL"] = str(args.retention_interval)
+    if args.max_namespaces:
+        os.environ["ACT_MAX_NAMESPACES"] = str(args.max_namespaces)
+
+    uvicorn.run(
+        "act.server:app", host=args.host, port=args.port, uds=args.uds, reload=False, workers=args.workers
+    )
\ No newline at end of file
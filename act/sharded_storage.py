@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import zlib
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from filelock import FileLock
+
+from .index import relevance
+from .models import ContextBlock
+from .pagination import sort_key
+from .storage import JsonStorage, Listener, Storage, open_storage
+from .utils import dump_json_file, get_default_store_path, load_json_file
+
+
+DEFAULT_SHARDS = 16
+MANIFEST_NAME = "manifest.json"
+
+
+def shard_for(block_id: str, shards: int) -> int:
+    # crc32 rather than hash(): the mapping must agree across processes and restarts
+    return zlib.crc32(block_id.encode("utf-8")) % shards
+
+
+class ShardedStorage:
+    """Blocks partitioned across ``shards`` JSON stores in one directory by a hash of their id.
+
+    Each shard has its own file and its own lock, so a mutation rewrites (or appends
+    to) one shard and writers touching different shards do not wait on each other.
+    Reads and listings fan out over every shard. The shard count is fixed when the
+    directory is created and recorded in its manifest; use ``reshard_store`` to change it.
+    """
+
+    def __init__(
+        self,
+        storage_path: Optional[Path] = None,
+        shards: Optional[int] = None,
+        shard_factory: Callable[[Path], Storage] = JsonStorage,
+    ) -> None:
+        self._path: Path = (storage_path or get_default_store_path()).resolve()
+        if shards is not None and shards < 1:
+            raise ValueError("shards must be at least 1")
+        self._path.mkdir(parents=True, exist_ok=True)
+        with FileLock(str(self._path / "manifest.lock")):
+            manifest = load_json_file(self._path / MANIFEST_NAME)
+            if manifest is None:
+                count = shards or DEFAULT_SHARDS
+                dump_json_file(self._path / MANIFEST_NAME, {"version": 1, "shards": count, "hash": "crc32"})
+            else:
+                count = int(manifest["shards"])
+                if shards is not None and shards != count:
+                    raise ValueError(f"{self._path} has {count} shards, not {shards}; use reshard to change it")
+        self._shards: List[Storage] = [shard_factory(self._path / f"shard-{i:03d}.json") for i in range(count)]
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def shard_count(self) -> int:
+        return len(self._shards)
+
+    def _shard(self, block_id: str) -> Storage:
+        return self._shards[shard_for(block_id, len(self._shards))]
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Batch every shard; only the shards actually written are flushed."""
+        with ExitStack() as stack:
+            for shard in self._shards:
+                stack.enter_context(shard.batch())
+            yield
+
+    def refresh(self) -> None:
+        for shard in self._shards:
+            shard.refresh()
+
+    def subscribe(self, listener: Listener) -> None:
+        # A clear is reported once per shard; listeners treat repeats as no-ops
+        for shard in self._shards:
+            shard.subscribe(listener)
+
+    def upsert_block(self, block: ContextBlock) -> ContextBlock:
+        return self._shard(block.id).upsert_block(block)
+
+    def get_block(self, block_id: str) -> Optional[ContextBlock]:
+        return self._shard(block_id).get_block(block_id)
+
+    def get_many(self, block_ids: Sequence[str]) -> List[Optional[ContextBlock]]:
+        by_shard: Dict[int, List[str]] = {}
+        for block_id in block_ids:
+            by_shard.setdefault(shard_for(block_id, len(self._shards)), []).append(block_id)
+        found: Dict[str, ContextBlock] = {}
+        for i, ids in by_shard.items():
+            for block in self._shards[i].get_many(ids):
+                if block is not None:
+                    found[block.id] = block
+        return [found.get(block_id) for block_id in block_ids]
+
+    def put_many(self, blocks: Iterable[ContextBlock]) -> None:
+        by_shard: Dict[int, List[ContextBlock]] = {}
+        for block in blocks:
+            by_shard.setdefault(shard_for(block.id, len(self._shards)), []).append(block)
+        for i, group in by_shard.items():
+            self._shards[i].put_many(group)
+
+    def delete_block(self, block_id: str) -> bool:
+        return self._shard(block_id).delete_block(block_id)
+
+    def list_blocks(
+        self,
+        query: Optional[str] = None,
+        tag: Optional[str] = None,
+        top_k: Optional[int] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> List[ContextBlock]:
+        if cursor and top_k is not None:
+            raise ValueError("cursor cannot be combined with top_k")
+        # Each shard returns its own best candidates; merging those gives the global answer
+        per_shard = [
+            shard.list_blocks(query=query, tag=tag, top_k=top_k, limit=limit, cursor=cursor, since=since, until=until)
+            for shard in self._shards
+        ]
+        if query and top_k is not None:
+            q = query.lower()
+            return heapq.nlargest(
+                top_k, itertools.chain.from_iterable(per_shard), key=lambda b: (relevance(b, q), sort_key(b))
+            )
+        if top_k is not None:
+            limit = top_k if limit is None else min(limit, top_k)
+        merged = heapq.merge(*per_shard, key=sort_key, reverse=True)
+        return list(itertools.islice(merged, limit))
+
+    def clear(self) -> None:
+        with self.batch():
+            for shard in self._shards:
+                shard.clear()
+
+    def close(self) -> None:
+        for shard in self._shards:
+            shard.close()
+
+
+def reshard_store(source: Path, dest: Path, shards: int = DEFAULT_SHARDS) -> int:
+    """Copy every block from the store at ``source`` (any backend, including another
+    sharded store) into a new sharded store at ``dest``. Returns the number copied."""
+    if dest.exists() and any(dest.iterdir()):
+        raise ValueError(f"{dest} already exists and is not empty")
+    src = open_storage(source)
+    target = ShardedStorage(storage_path=dest, shards=shards)
+    try:
+        blocks = src.list_blocks()
+        with target.batch():
+            for block in blocks:
+                target.upsert_block(block)
+    finally:
+        src.close()
+        target.close()
+    return len(blocks)
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .models import ContextBlock, parse_epoch
+from .pagination import time_key, upper_bound
+from .utils import get_default_store_path
+
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+# FTS5's trigram tokenizer answers substring queries of three or more characters
+# from the index; shorter needles fall back to a scan, same as JsonStorage.
+_MIN_FTS_QUERY = 3
+# bm25 column weights for (id, summary, content), weighted like act.index.relevance.
+# bm25 also scales by term rarity and field length, so top_k order can differ from JsonStorage.
+_BM25_WEIGHTS = "4.0, 2.0, 1.0"
+# Stays under SQLITE_MAX_VARIABLE_NUMBER on builds older than 3.32
+_MAX_VARIABLES = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    id TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    type TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    epoch REAL NOT NULL DEFAULT 0
+);
+-- Listing order, mirroring act.pagination.sort_key
+CREATE INDEX IF NOT EXISTS blocks_time ON blocks(epoch, timestamp, id);
+
+CREATE TABLE IF NOT EXISTS block_tags (
+    tag TEXT NOT NULL,
+    block_id TEXT NOT NULL REFERENCES blocks(id) ON DELETE CASCADE,
+    PRIMARY KEY (tag, block_id)
+);
+CREATE INDEX IF NOT EXISTS block_tags_block ON block_tags(block_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS blocks_fts USING fts5(
+    id, summary, content, content='blocks', content_rowid='rowid', tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS blocks_ai AFTER INSERT ON blocks BEGIN
+    INSERT INTO blocks_fts(rowid, id, summary, content) VALUES (new.rowid, new.id, new.summary, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS blocks_ad AFTER DELETE ON blocks BEGIN
+    INSERT INTO blocks_fts(blocks_fts, rowid, id, summary, content)
+    VALUES ('delete', old.rowid, old.id, old.summary, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS blocks_au AFTER UPDATE OF id, summary, content ON blocks BEGIN
+    INSERT INTO blocks_fts(blocks_fts, rowid, id, summary, content)
+    VALUES ('delete', old.rowid, old.id, old.summary, old.content);
+    INSERT INTO blocks_fts(rowid, id, summary, content) VALUES (new.rowid, new.id, new.summary, new.content);
+END;
+"""
+
+_COLUMNS = "b.id, b.summary, b.type, b.content, b.timestamp, b.tags"
+
+
+def _row_to_block(row: sqlite3.Row) -> ContextBlock:
+    return ContextBlock(
+        id=row[0],
+        summary=row[1],
+        type=row[2],
+        content=row[3],
+        timestamp=row[4],
+        tags=json.loads(row[5]),
+    )
+
+
+def _fts_phrase(query: str) -> str:
+    return '"' + query.replace('"', '""') + '"'
+
+
+class SqliteStorage:
+    """Storage backed by a SQLite database in WAL mode with an FTS5 trigram index."""
+
+    def __init__(self, storage_path: Optional[Path] = None) -> None:
+        self._path: Path = (storage_path or get_default_store_path()).resolve()
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self._path), check_same_thread=False, isolation_level=None)
+        self._conn_lock = threading.RLock()
+        self._listeners: List[Callable[[str, object], None]] = []
+        with self._conn_lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._migrate()
+            self._conn.executescript(_SCHEMA)
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def _migrate(self) -> None:
+        # Stores created before blocks carried an epoch: add and backfill it. The
+        # old update trigger re-indexed text on any update; _SCHEMA recreates it
+        # narrowed to the text columns.
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(blocks)")}
+        if columns and "epoch" not in columns:
+            self._conn.create_function("act_epoch", 1, parse_epoch, deterministic=True)
+            with self._transaction():
+                self._conn.execute("DROP TRIGGER IF EXISTS blocks_au")
+                self._conn.execute("DROP INDEX IF EXISTS blocks_timestamp_id")
+                self._conn.execute("ALTER TABLE blocks ADD COLUMN epoch REAL NOT NULL DEFAULT 0")
+                self._conn.execute("UPDATE blocks SET epoch = act_epoch(timestamp)")
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        # Joins the enclosing transaction when called inside batch()
+        with self._conn_lock:
+            if self._conn.in_transaction:
+                yield
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Run the block as one SQLite transaction, rolled back if it raises. A batch
+        nested in another runs under a savepoint, so if it raises only its own writes
+        are rolled back.
+
+        Other threads using this store wait until the batch commits.
+        """
+        with self._conn_lock:
+            if not self._conn.in_transaction:
+                with self._transaction():
+                    yield
+                return
+            self._conn.execute("SAVEPOINT batch")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK TO batch")
+                self._conn.execute("RELEASE batch")
+                raise
+            self._conn.execute("RELEASE batch")
+
+    def refresh(self) -> None:
+        """Queries always read the database, so there is nothing to reload."""
+
+    def subscribe(self, listener: Callable[[str, object], None]) -> None:
+        """See ``Storage.subscribe``. Only changes made through this instance are
+        reported; other connections' writes are not seen."""
+        self._listeners.append(listener)
+
+    def _notify(self, op: str, arg: object = None) -> None:
+        for listener in self._listeners:
+            listener(op, arg)
+
+    def upsert_block(self, block: ContextBlock) -> ContextBlock:
+        with self._transaction():
+            self._write_block(block)
+            self._notify("upsert", block)
+        return block
+
+    def _write_block(self, block: ContextBlock) -> None:
+        self._conn.execute(
+            "INSERT INTO blocks(id, summary, type, content, timestamp, tags, epoch) VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET summary=excluded.summary, type=excluded.type, "
+            "content=excluded.content, timestamp=excluded.timestamp, tags=excluded.tags, epoch=excluded.epoch",
+            (block.id, block.summary, block.type, block.content, block.timestamp, json.dumps(block.tags), block.epoch),
+        )
+        self._conn.execute("DELETE FROM block_tags WHERE block_id = ?", (block.id,))
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO block_tags(tag, block_id) VALUES (?, ?)",
+            [(t.lower(), block.id) for t in block.tags],
+        )
+
+    def get_block(self, block_id: str) -> Optional[ContextBlock]:
+        with self._conn_lock:
+            row = self._conn.execute(f"SELECT {_COLUMNS} FROM blocks b WHERE b.id = ?", (block_id,)).fetchone()
+        return _row_to_block(row) if row else None
+
+    def get_many(self, block_ids: Sequence[str]) -> List[Optional[ContextBlock]]:
+        found: Dict[str, ContextBlock] = {}
+        unique = list(dict.fromkeys(block_ids))
+        with self._conn_lock:
+            for i in range(0, len(unique), _MAX_VARIABLES):
+                chunk = unique[i : i + _MAX_VARIABLES]
+                rows = self._conn.execute(
+                    f"SELECT {_COLUMNS} FROM blocks b WHERE b.id IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for row in rows:
+                    block = _row_to_block(row)
+                    found[block.id] = block
+        return [found.get(block_id) for block_id in block_ids]
+
+    def put_many(self, blocks: Iterable[ContextBlock]) -> None:
+        with self._transaction():
+            for block in blocks:
+                self._write_block(block)
+                self._notify("upsert", block)
+
+    def delete_block(self, block_id: str) -> bool:
+        with self._conn_lock:
+            cur = self._conn.execute("DELETE FROM blocks WHERE id = ?", (block_id,))
+            if cur.rowcount > 0:
+                self._notify("delete", block_id)
+        return cur.rowcount > 0
+
+    def list_blocks(
+        self,
+        query: Optional[str] = None,
+        tag: Optional[str] = None,
+        top_k: Optional[int] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> List[ContextBlock]:
+        if cursor and top_k is not None:
+            raise ValueError("cursor cannot be combined with top_k")
+        sql = f"SELECT {_COLUMNS} FROM blocks b"
+        where: List[str] = []
+        params: List[object] = []
+        order = "b.epoch DESC, b.timestamp DESC, b.id DESC"
+        if query:
+            if len(query) >= _MIN_FTS_QUERY:
+                sql += " JOIN blocks_fts ON blocks_fts.rowid = b.rowid"
+                where.append("blocks_fts MATCH ?")
+                params.append(_fts_phrase(query))
+                if top_k is not None:
+                    order = f"bm25(blocks_fts, {_BM25_WEIGHTS}), b.epoch DESC, b.timestamp DESC, b.id DESC"
+            else:
+                q = query.lower()
+                where.append("(instr(lower(b.id), ?) OR instr(lower(b.summary), ?) OR instr(lower(b.content), ?))")
+                params.extend([q, q, q])
+        if tag:
+            where.append("b.id IN (SELECT block_id FROM block_tags WHERE tag = ?)")
+            params.append(tag.lower())
+        if since:
+            where.append("(b.epoch, b.timestamp) >= (?, ?)")
+            params.extend(time_key(since))
+        before = upper_bound(cursor, until)
+        if before:
+            where.append("(b.epoch, b.timestamp, b.id) < (?, ?, ?)")
+            params.extend(before)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order}"
+        if top_k is not None:
+            limit = top_k if limit is None else min(limit, top_k)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._conn_lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [_row_to_block(r) for r in rows]
+
+    def clear(self) -> None:
+        with self._transaction():
+            self._conn.execute("DELETE FROM block_tags")
+            self._conn.execute("DELETE FROM blocks")
+            self._notify("clear")
+
+    def close(self) -> None:
+        with self._conn_lock:
+            self._conn.close()
@@ -1,85 +1,742 @@
 from __future__ import annotations
 
+import copy
+import functools
+import heapq
+import json
+import os
 import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional
-
-from filelock import FileLock
+from typing import Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Protocol, Sequence, Tuple
 
+from .compression import DEFAULT_DICT_SIZE, DEFAULT_MIN_BYTES, ContentCodec, train_dictionary
+from .dedup import ContentPool, join_payload, split_payload
+from .index import BlockIndex, relevance
+from .metrics import TimedLock, metrics
 from .models import ContextBlock
+from .pagination import sort_key, time_key, upper_bound
+from .sqlite_storage import SQLITE_SUFFIXES, SqliteStorage
 from .utils import dump_json_file, get_default_store_path, load_json_file
 
 
+DEFAULT_COMPACT_THRESHOLD = 4 * 1024 * 1024
+
+# A mutation waiting to be persisted: ("upsert", block), ("retime", block) for an upsert
+# that only moved the timestamp, ("delete", block_id) or ("clear", None)
+Mutation = Tuple[str, object]
+Listener = Callable[[str, object], None]
+
+
+class Storage(Protocol):
+    """Interface shared by every storage backend."""
+
+    @property
+    def path(self) -> Path: ...
+
+    def upsert_block(self, block: ContextBlock) -> ContextBlock:
+        """Store ``block``, replacing any block with its id, and return the block as stored."""
+
+    def get_block(self, block_id: str) -> Optional[ContextBlock]: ...
+
+    def get_many(self, block_ids: Sequence[str]) -> List[Optional[ContextBlock]]:
+        """The blocks for ``block_ids`` in the same order, ``None`` where missing."""
+        ...
+
+    def put_many(self, blocks: Iterable[ContextBlock]) -> None:
+        """Upsert ``blocks`` as one commit."""
+        ...
+
+    def delete_block(self, block_id: str) -> bool: ...
+
+    def list_blocks(
+        self,
+        query: Optional[str] = None,
+        tag: Optional[str] = None,
+        top_k: Optional[int] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> List[ContextBlock]: ...
+
+    def clear(self) -> None: ...
+
+    def batch(self) -> ContextManager[None]:
+        """Group the mutations made inside the ``with`` block into one commit."""
+        ...
+
+    def refresh(self) -> None:
+        """Pick up changes other processes made to the store, notifying listeners."""
+        ...
+
+    def subscribe(self, listener: Listener) -> None:
+        """Call ``listener(op, arg)`` after every change to the stored blocks, with
+        ``(op, arg)`` shaped like a ``Mutation``. Listeners run synchronously on the
+        writing thread and must not call back into the store."""
+        ...
+
+    def close(self) -> None: ...
+
+
 class JsonStorage:
-    def __init__(self, storage_path: Optional[Path] = None) -> None:
+    # Whether the text index covers block content; subclasses that keep content out
+    # of memory turn this off and scan content on demand instead.
+    _index_content = True
+    # Whether identical content is kept once in memory and written once per snapshot;
+    # subclasses whose content lives outside the snapshot turn this off.
+    _dedup_content = True
+
+    def __init__(self, storage_path: Optional[Path] = None, compress_min_bytes: Optional[int] = None) -> None:
         self._path: Path = (storage_path or get_default_store_path()).resolve()
+        # Content of at least compress_min_bytes is kept deflated in memory and on disk
+        self._codec = ContentCodec(self._path, min_bytes=compress_min_bytes)
+        self._pool = ContentPool()
         self._lock_path: Path = self._path.with_suffix(self._path.suffix + ".lock")
-        self._lock = FileLock(str(self._lock_path))
+        # filelock pulls in asyncio; importing it here keeps `import act.storage` cheap
+        from filelock import FileLock
+
+        self._lock = TimedLock(FileLock(str(self._lock_path)), "lock_wait")
         self._in_memory_cache: Dict[str, ContextBlock] = {}
+        # Built on the first listing, so commands that only read or write by id skip it
+        self._index: Optional[BlockIndex] = None
+        self._index_has_content = False
+        self._text_queries = 0
         self._cache_lock = threading.Lock()
+        self._listeners: List[Listener] = []
+        self._batch_state = threading.local()
+        # Mutations applied to the cache but not yet persisted, keyed by sequence number.
+        # They take precedence over anything read back from disk.
+        self._unpersisted: Dict[int, Mutation] = {}
+        self._seq = 0
+        # What the files looked like when we last synced with them
+        self._refresh_lock = threading.Lock()
+        self._seen_state: Optional[tuple] = None
         self._load_into_cache()
 
     @property
     def path(self) -> Path:
         return self._path
 
+    @metrics.timed("load")
     def _load_into_cache(self) -> None:
         with self._lock:
-            data = load_json_file(self._path) or {"version": 1, "blocks": {}}
-            blocks = data.get("blocks", {})
-            parsed: Dict[str, ContextBlock] = {}
-            for block_id, block_data in blocks.items():
-                try:
-                    parsed[block_id] = ContextBlock.from_dict(block_data)
-                except Exception:
-                    # Skip malformed entries
-                    continue
-            with self._cache_lock:
-                self._in_memory_cache = parsed
+            parsed = self._read_snapshot()
+            self._set_cache(parsed)
+            self._mark_synced()
+
+    def _set_cache(self, blocks: Dict[str, ContextBlock]) -> None:
+        with self._cache_lock:
+            if self._dedup_content:
+                # Like the snapshot reader, drop entries whose content cannot be stored
+                for block_id in self._pool.rebuild(blocks.values()):
+                    del blocks[block_id]
+            self._in_memory_cache = blocks
+            if self._index is not None:
+                self._index.rebuild(blocks.values())
 
+    def _built_index(self, text_query: bool = False) -> BlockIndex:
+        # Caller holds _cache_lock. Content trigrams cost far more to build than one
+        # scan, so the first text query scans and the second builds them: a one-shot
+        # CLI process never pays for the trigram index, a long-lived server pays once.
+        if text_query and self._index_content and not self._index_has_content:
+            self._text_queries += 1
+            if self._text_queries > 1:
+                self._index = None
+                self._index_has_content = True
+        if self._index is None:
+            index = BlockIndex(index_content=self._index_has_content)
+            index.rebuild(self._in_memory_cache.values())
+            self._index = index
+        return self._index
+
+    def _read_snapshot(self) -> Dict[str, ContextBlock]:
+        data = load_json_file(self._path) or {"version": 1, "blocks": {}}
+        if data.get("zdict"):
+            self._codec.dict_id = data["zdict"]
+        blocks = data.get("blocks", {})
+        payloads = data.get("payloads", {})
+        parsed: Dict[str, ContextBlock] = {}
+        for block_id, block_data in blocks.items():
+            try:
+                parsed[block_id] = self._codec.from_dict(join_payload(block_data, payloads))
+            except Exception:
+                # Skip malformed entries
+                continue
+        return parsed
+
+    @metrics.timed("save")
     def _save_cache(self) -> None:
         with self._lock:
+            # Hold the cache lock only for the copy so readers are not stalled by serialization
             with self._cache_lock:
-                serializable = {
-                    "version": 1,
-                    "blocks": {bid: block.to_dict() for bid, block in self._in_memory_cache.items()},
-                }
+                blocks = list(self._in_memory_cache.values())
+                shared = {b.id: digest for b in blocks for digest in [self._pool.shared(b.id)] if digest}
+            # Content used by several blocks is written once, in "payloads", and referenced by digest
+            payloads: Dict[str, dict] = {}
+            entries = {}
+            for block in blocks:
+                entry = self._codec.to_dict(block)
+                digest = shared.get(block.id)
+                entries[block.id] = entry if digest is None else split_payload(entry, digest, payloads)
+            serializable: dict = {"version": 1, "blocks": entries}
+            if payloads:
+                serializable["payloads"] = payloads
+            if self._codec.dict_id:
+                serializable["zdict"] = self._codec.dict_id
             dump_json_file(self._path, serializable)
 
-    def upsert_block(self, block: ContextBlock) -> None:
+    def compact(self) -> None:
+        """Rewrite the snapshot from the current contents."""
+        with self._lock:
+            self._refresh()
+            self._save_cache()
+            self._mark_synced()
+
+    def train_dictionary(self, size: int = DEFAULT_DICT_SIZE) -> int:
+        """Train a shared compression dictionary on the stored content and recompress
+        every block against it. Returns the dictionary's size in bytes (0 if the
+        content has too little in common to build one). Raises ``ValueError`` if the
+        store does not compress content."""
+        if self._codec.min_bytes is None:
+            raise ValueError("compression is off for this store; set ACT_COMPRESSION=zlib to use a dictionary")
+        with self._lock:
+            self._refresh()
+            with self._cache_lock:
+                blocks = list(self._in_memory_cache.values())
+            zdict = train_dictionary((b.content for b in blocks), size=size)
+            if not zdict:
+                return 0
+            self._codec.use_dictionary(zdict)
+            repacked = [self._codec.pack(_unpacked(b)) for b in blocks]
+            with self._cache_lock:
+                for old, new in zip(blocks, repacked):
+                    if self._in_memory_cache.get(old.id) is old:
+                        self._in_memory_cache[old.id] = new
+                if self._dedup_content:
+                    self._pool.rebuild(self._in_memory_cache.values())
+            self.compact()
+        return len(zdict)
+
+    # Change detection: another process (a second server worker, the CLI) may write
+    # the same files. A stat() tells us cheaply whether anything changed since we
+    # last synced; only then is the store re-read and merged entry by entry.
+    def _disk_state(self) -> tuple:
+        return (_stat_key(self._path),)
+
+    def _mark_synced(self) -> None:
+        with self._refresh_lock:
+            self._seen_state = self._disk_state()
+
+    def _refresh(self) -> None:
+        with self._refresh_lock:
+            state = self._disk_state()
+            if state == self._seen_state:
+                return
+            self._merge_snapshot(self._read_snapshot())
+            self._seen_state = state
+
+    def _overlay(self) -> Tuple[bool, set]:
+        # (pending clear?, ids touched) of unpersisted mutations; caller holds the cache lock
+        cleared = False
+        touched = set()
+        for op, arg in self._unpersisted.values():
+            if op == "clear":
+                cleared = True
+            else:
+                touched.add(arg.id if op in ("upsert", "retime") else arg)  # type: ignore[union-attr]
+        return cleared, touched
+
+    def _merge_snapshot(self, disk: Dict[str, ContextBlock]) -> None:
         with self._cache_lock:
+            cleared, touched = self._overlay()
+            if cleared:
+                # Our pending clear is ordered after everything already on disk
+                return
+            stale = [bid for bid in self._in_memory_cache if bid not in disk and bid not in touched]
+            for bid in stale:
+                self._apply("delete", bid)
+            for bid, block in disk.items():
+                current = self._in_memory_cache.get(bid)
+                if bid not in touched and (current is None or not self._same(current, block)):
+                    try:
+                        self._apply("upsert", block)
+                    except (TypeError, AttributeError):
+                        # Skip malformed entries
+                        continue
+
+    def _same(self, current: ContextBlock, incoming: ContextBlock) -> bool:
+        return current == incoming
+
+    def refresh(self) -> None:
+        self._refresh()
+
+    def subscribe(self, listener: Listener) -> None:
+        """See ``Storage.subscribe``; changes merged in from other processes are reported too."""
+        self._listeners.append(listener)
+
+    def _apply(self, op: str, arg: object = None) -> bool:
+        # Caller holds the cache lock
+        if not self._change(op, arg):
+            return False
+        for listener in self._listeners:
+            listener("upsert" if op == "retime" else op, arg)
+        return True
+
+    def _change(self, op: str, arg: object) -> bool:
+        if op in ("upsert", "retime"):
+            block: ContextBlock = arg  # type: ignore[assignment]
+            # Pool first: it rejects content it cannot key before anything has changed.
+            # A retimed block shares its predecessor's payload, so its pool entry stands.
+            if self._dedup_content and op == "upsert":
+                self._pool.add(block)
+            previous = self._in_memory_cache.get(block.id)
             self._in_memory_cache[block.id] = block
+            if self._index is not None:
+                if previous is not None:
+                    self._index.remove(previous)
+                self._index.add(block)
+            return True
+        if op == "delete":
+            removed = self._in_memory_cache.pop(arg, None)  # type: ignore[arg-type]
+            if removed is None:
+                return False
+            self._pool.remove(arg)  # type: ignore[arg-type]
+            if self._index is not None:
+                self._index.remove(removed)
+            return True
+        self._in_memory_cache.clear()
+        self._pool.clear()
+        if self._index is not None:
+            self._index.clear()
+        return True
+
+    def _mutate(self, op: str, arg: object = None, refresh: bool = True) -> bool:
+        if refresh:
+            self._refresh()
+        if op == "upsert":
+            arg = self._codec.pack(arg)  # type: ignore[arg-type]
+        with self._cache_lock:
+            current = self._in_memory_cache.get(arg.id) if op == "upsert" else None  # type: ignore[union-attr]
+            if current is not None and self._unchanged(current, arg):  # type: ignore[arg-type]
+                if current.timestamp == arg.timestamp:  # type: ignore[union-attr]
+                    return False
+                # Same content and metadata: keep the stored payload and persist only the timestamp
+                op, arg = "retime", _retimed(current, arg.timestamp)  # type: ignore[union-attr]
+            if not self._apply(op, arg):
+                return False
+            self._seq += 1
+            seq = self._seq
+            self._unpersisted[seq] = (op, arg)
+        pending = getattr(self._batch_state, "pending", None)
+        if pending is not None:
+            pending.append(seq)
+        else:
+            self._commit([seq])
+        return True
+
+    def _unchanged(self, current: ContextBlock, block: ContextBlock) -> bool:
+        # Caller holds the cache lock. Whether ``block`` differs from ``current`` at most
+        # in its timestamp, so re-storing the same content need not rewrite it.
+        if (current.summary, current.type, current.tags) != (block.summary, block.type, block.tags):
+            return False
+        if self._dedup_content:
+            digest = self._pool.digest(block)
+            if digest is not None:
+                return self._pool.ref(block.id) == digest
+        return current.content == block.content
+
+    def _commit(self, seqs: List[int]) -> None:
+        with self._lock:
+            # Merge what other processes wrote since we last looked before writing,
+            # rather than overwriting the file with our possibly stale view.
+            self._refresh()
+            with self._cache_lock:
+                mutations = [self._unpersisted[seq] for seq in seqs]
+            self._persist(mutations)
+            self._mark_synced()
+            with self._cache_lock:
+                for seq in seqs:
+                    del self._unpersisted[seq]
+
+    def _persist(self, mutations: List[Mutation]) -> None:
         self._save_cache()
 
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Persist every mutation made by this thread inside the block with one
+        lock acquisition and one flush when the outermost batch exits.
+
+        Changes are visible in memory immediately and are persisted even if the
+        block raises; this groups writes, it does not roll them back.
+        """
+        if getattr(self._batch_state, "pending", None) is not None:
+            yield
+            return
+        self._batch_state.pending = []
+        try:
+            yield
+        finally:
+            seqs = self._batch_state.pending
+            self._batch_state.pending = None
+            if seqs:
+                self._commit(seqs)
+
+    def upsert_block(self, block: ContextBlock) -> ContextBlock:
+        self._mutate("upsert", block)
+        with self._cache_lock:
+            return self._in_memory_cache.get(block.id, block)
+
     def get_block(self, block_id: str) -> Optional[ContextBlock]:
+        self._refresh()
         with self._cache_lock:
             return self._in_memory_cache.get(block_id)
 
-    def delete_block(self, block_id: str) -> bool:
-        removed = False
+    def get_many(self, block_ids: Sequence[str]) -> List[Optional[ContextBlock]]:
+        self._refresh()
         with self._cache_lock:
-            if block_id in self._in_memory_cache:
-                del self._in_memory_cache[block_id]
-                removed = True
-        if removed:
-            self._save_cache()
-        return removed
+            return [self._in_memory_cache.get(block_id) for block_id in block_ids]
+
+    def put_many(self, blocks: Iterable[ContextBlock]) -> None:
+        with self.batch():
+            # One stat of the store files for the whole batch; the commit merges under the lock anyway
+            self._refresh()
+            for block in blocks:
+                self._mutate("upsert", block, refresh=False)
 
-    def list_blocks(self, query: Optional[str] = None, tag: Optional[str] = None) -> List[ContextBlock]:
+    def delete_block(self, block_id: str) -> bool:
+        return self._mutate("delete", block_id)
+
+    def list_blocks(
+        self,
+        query: Optional[str] = None,
+        tag: Optional[str] = None,
+        top_k: Optional[int] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> List[ContextBlock]:
+        """Blocks matching ``query`` and ``tag``, newest first.
+
+        ``since`` (inclusive) and ``until`` (exclusive) bound the timestamp, and
+        ``limit``/``cursor`` page through the result; pass ``encode_cursor(last_block)``
+        to fetch the next page. With ``top_k`` and a query, returns the ``top_k`` most
+        relevant matches instead.
+        """
+        if cursor and top_k is not None:
+            raise ValueError("cursor cannot be combined with top_k")
+        self._refresh()
+        q = query.lower() if query else None
+        before = upper_bound(cursor, until)
+        after = time_key(since) if since else None
         with self._cache_lock:
-            blocks = list(self._in_memory_cache.values())
-        if query:
-            q = query.lower()
+            index = self._built_index(text_query=bool(q))
+            ids: Optional[set] = None
+            if tag:
+                ids = set(index.tag_ids(tag))
+            if q:
+                candidates = index.query_candidates(q)
+                if candidates is not None:
+                    ids = candidates if ids is None else ids & candidates
+            if ids is None and top_k is None:
+                # Walk the time index so the newest `limit` blocks cost O(limit)
+                blocks = []
+                for bid in index.newest_ids(before, after):
+                    block = self._in_memory_cache[bid]
+                    if q and not _matches(block, q):
+                        continue
+                    blocks.append(block)
+                    if limit is not None and len(blocks) >= limit:
+                        break
+                return blocks
+            if ids is None:
+                blocks = list(self._in_memory_cache.values())
+            else:
+                blocks = [self._in_memory_cache[bid] for bid in ids]
+        if q:
+            blocks = [b for b in blocks if _matches(b, q)]
+        if after or before:
             blocks = [
-                b for b in blocks if q in b.id.lower() or q in b.summary.lower() or q in b.content.lower()
+                b
+                for b in blocks
+                if (not after or (b.epoch, b.timestamp) >= after) and (not before or sort_key(b) < before)
             ]
-        if tag:
-            t = tag.lower()
-            blocks = [b for b in blocks if any(t == tg.lower() for tg in b.tags)]
-        # Sort by timestamp descending
-        return sorted(blocks, key=lambda b: b.timestamp, reverse=True)
+        if q and top_k is not None:
+            return heapq.nlargest(top_k, blocks, key=lambda b: (relevance(b, q), sort_key(b)))
+        if top_k is not None:
+            limit = top_k if limit is None else min(limit, top_k)
+        if limit is not None:
+            return heapq.nlargest(limit, blocks, key=sort_key)
+        return sorted(blocks, key=sort_key, reverse=True)
 
     def clear(self) -> None:
+        self._mutate("clear")
+
+    def dedup_stats(self) -> Dict[str, int]:
+        """Distinct content payloads held, and what sharing them saves (see ``ContentPool.stats``)."""
+        with self._cache_lock:
+            return self._pool.stats()
+
+    def close(self) -> None:
+        """Release background resources. The store stays readable from memory."""
+
+
+class WalJsonStorage(JsonStorage):
+    """JSON snapshot plus an append-only write-ahead log.
+
+    Each mutation appends one JSON line to ``<store>.wal`` instead of rewriting the
+    snapshot. The log is replayed over the snapshot at startup and folded back into
+    it by a background compaction once it grows past ``compact_threshold`` bytes.
+    Other processes' appends are picked up by reading only the new tail of the log.
+    """
+
+    def __init__(
+        self,
+        storage_path: Optional[Path] = None,
+        compact_threshold: int = DEFAULT_COMPACT_THRESHOLD,
+        compress_min_bytes: Optional[int] = None,
+    ) -> None:
+        path = (storage_path or get_default_store_path()).resolve()
+        self._log_path: Path = path.with_suffix(path.suffix + ".wal")
+        self._log_offset = 0
+        self._compact_threshold = compact_threshold
+        self._compactor: Optional[threading.Thread] = None
+        self._compactor_lock = threading.Lock()
+        super().__init__(storage_path=path, compress_min_bytes=compress_min_bytes)
+
+    @property
+    def log_path(self) -> Path:
+        return self._log_path
+
+    @metrics.timed("load")
+    def _load_into_cache(self) -> None:
+        with self._lock:
+            parsed = self._read_snapshot()
+            offset = self._replay_log(parsed, 0)
+            if self._log_path.exists() and self._log_path.stat().st_size > offset:
+                # Drop a torn tail left by a crash mid-append so new records start on a fresh line
+                with self._log_path.open("r+b") as f:
+                    f.truncate(offset)
+            self._set_cache(parsed)
+            self._log_offset = offset
+            self._mark_synced()
+
+    def _read_log(self, start: int) -> Tuple[List[dict], int]:
+        """Records from complete lines at or after byte ``start``, and the offset after them."""
+        if not self._log_path.exists():
+            return [], start
+        with self._log_path.open("rb") as f:
+            f.seek(start)
+            data = f.read()
+        # A concurrent appender may be mid-line; leave the partial line for next time
+        complete = data[: data.rfind(b"\n") + 1]
+        records = []
+        for line in complete.splitlines():
+            try:
+                records.append(json.loads(line))
+            except Exception:
+                # A torn line from a crash mid-append; everything before it is intact
+                continue
+        return records, start + len(complete)
+
+    def _replay_log(self, blocks: Dict[str, ContextBlock], start: int) -> int:
+        records, offset = self._read_log(start)
+        for record in records:
+            try:
+                op = record["op"]
+                if op == "upsert":
+                    block = self._codec.from_dict(record["block"])
+                    blocks[block.id] = block
+                elif op == "retime":
+                    if record["id"] in blocks:
+                        blocks[record["id"]] = _retimed(blocks[record["id"]], record["timestamp"])
+                elif op == "delete":
+                    blocks.pop(record["id"], None)
+                elif op == "clear":
+                    blocks.clear()
+            except Exception:
+                continue
+        return offset
+
+    def _disk_state(self) -> tuple:
+        return (_stat_key(self._path), _stat_key(self._log_path))
+
+    def _refresh(self) -> None:
+        with self._refresh_lock:
+            state = self._disk_state()
+            if state == self._seen_state:
+                return
+            log_key = state[1]
+            seen_log = self._seen_state[1] if self._seen_state else None
+            if (
+                state[0] == (self._seen_state[0] if self._seen_state else None)
+                and log_key is not None
+                and seen_log is not None
+                and log_key[0] == seen_log[0]
+                and log_key[2] >= self._log_offset
+            ):
+                # Same snapshot and the log only grew: replay just the new tail
+                records, self._log_offset = self._read_log(self._log_offset)
+                self._merge_records(records)
+            else:
+                # Another process compacted: re-read everything and merge the differences
+                parsed = self._read_snapshot()
+                self._log_offset = self._replay_log(parsed, 0)
+                self._merge_snapshot(parsed)
+            self._seen_state = state
+
+    def _merge_records(self, records: List[dict]) -> None:
         with self._cache_lock:
-            self._in_memory_cache.clear()
-        self._save_cache()
\ No newline at end of file
+            cleared, touched = self._overlay()
+            if cleared:
+                return
+            for record in records:
+                try:
+                    op = record["op"]
+                    if op == "upsert":
+                        block = self._codec.from_dict(record["block"])
+                        if block.id not in touched:
+                            self._apply(op, block)
+                    elif op == "retime":
+                        current = self._in_memory_cache.get(record["id"])
+                        if current is not None and record["id"] not in touched:
+                            self._apply(op, _retimed(current, record["timestamp"]))
+                    elif op == "delete":
+                        if record["id"] not in touched:
+                            self._apply(op, record["id"])
+                    elif op == "clear":
+                        for bid in [bid for bid in self._in_memory_cache if bid not in touched]:
+                            self._apply("delete", bid)
+                except Exception:
+                    continue
+
+    def _mark_synced(self) -> None:
+        with self._refresh_lock:
+            self._seen_state = self._disk_state()
+            log_key = self._seen_state[1]
+            self._log_offset = log_key[2] if log_key is not None else 0
+
+    def _persist(self, mutations: List[Mutation]) -> None:
+        lines = []
+        with metrics.stage("serialize"):
+            for op, arg in mutations:
+                if op == "upsert":
+                    record = {"op": op, "block": self._codec.to_dict(arg)}  # type: ignore[arg-type]
+                elif op == "retime":
+                    record = {"op": op, "id": arg.id, "timestamp": arg.timestamp}  # type: ignore[union-attr]
+                elif op == "delete":
+                    record = {"op": op, "id": arg}
+                else:
+                    record = {"op": op}
+                lines.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        with self._lock, metrics.stage("write"):
+            self._log_path.parent.mkdir(parents=True, exist_ok=True)
+            with self._log_path.open("a", encoding="utf-8") as f:
+                f.write("".join(lines))
+                size = f.tell()
+        if size >= self._compact_threshold:
+            self._schedule_compaction()
+
+    def _schedule_compaction(self) -> None:
+        with self._compactor_lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                return
+            self._compactor = threading.Thread(target=self.compact, name="act-wal-compactor", daemon=True)
+            self._compactor.start()
+
+    def compact(self) -> None:
+        """Fold the log into the snapshot and truncate it."""
+        with self._lock:
+            # Pick up other processes' records first so the snapshot does not drop them.
+            # Replaying a record that is already in the snapshot is idempotent, so a
+            # mutation racing with this is safe whichever side of the swap it lands on.
+            self._refresh()
+            self._save_cache()
+            with open(self._log_path, "w", encoding="utf-8"):
+                pass
+            self._mark_synced()
+
+    def close(self) -> None:
+        with self._compactor_lock:
+            compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+
+
+def _stat_key(path: Path) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _retimed(block: ContextBlock, timestamp: str) -> ContextBlock:
+    # A copy of ``block`` (compressed or mapped content included) with a new timestamp
+    retimed = copy.copy(block)
+    retimed.timestamp = timestamp
+    return retimed
+
+
+def _unpacked(block: ContextBlock) -> ContextBlock:
+    return ContextBlock(
+        id=block.id,
+        content=block.content,
+        summary=block.summary,
+        type=block.type,
+        timestamp=block.timestamp,
+        tags=block.tags,
+    )
+
+
+def _matches(block: ContextBlock, q: str) -> bool:
+    return q in block.id.lower() or q in block.summary.lower() or q in block.content.lower()
+
+
+def open_storage(storage_path: Optional[Path] = None) -> Storage:
+    """Open the backend for ``storage_path``.
+
+    Paths ending in ``.db``, ``.sqlite`` or ``.sqlite3`` use SQLite. Paths ending in
+    ``.shards`` are a directory of hash-partitioned JSON stores, ``ACT_STORAGE_SHARDS``
+    of them when the directory is new. JSON stores use the mode selected by
+    ``ACT_STORAGE_MODE``: ``json``, ``wal``, or ``mmap`` for a metadata-only JSON
+    index over a memory-mapped content file. ``ACT_COMPRESSION=zlib`` compresses
+    JSON and WAL content of at least ``ACT_COMPRESS_MIN_BYTES`` bytes.
+    ``ACT_CACHE_BYTES`` puts a hot-block cache of that many bytes in front of the
+    backend (see ``CachedStorage``).
+    """
+    storage = _open_backend(storage_path or get_default_store_path())
+    cache_bytes = os.environ.get("ACT_CACHE_BYTES")
+    if cache_bytes:
+        from .cached_storage import CachedStorage
+
+        return CachedStorage(storage, max_bytes=int(cache_bytes))
+    return storage
+
+
+def _open_backend(path: Path) -> Storage:
+    if path.suffix.lower() in SQLITE_SUFFIXES:
+        return SqliteStorage(storage_path=path)
+    mode = os.environ.get("ACT_STORAGE_MODE", "json").strip().lower()
+    backend: Callable[..., Storage]
+    compression = os.environ.get("ACT_COMPRESSION", "none").strip().lower()
+    if compression not in ("none", "zlib"):
+        raise ValueError(f"Unknown ACT_COMPRESSION: {compression}")
+    min_bytes = int(os.environ.get("ACT_COMPRESS_MIN_BYTES", DEFAULT_MIN_BYTES)) if compression == "zlib" else None
+    if mode == "json":
+        backend = functools.partial(JsonStorage, compress_min_bytes=min_bytes)
+    elif mode == "wal":
+        backend = functools.partial(WalJsonStorage, compress_min_bytes=min_bytes)
+    elif mode == "mmap":
+        from .mapped_storage import MappedStorage
+
+        backend = MappedStorage
+    else:
+        raise ValueError(f"Unknown ACT_STORAGE_MODE: {mode}")
+    if path.suffix.lower() == ".shards":
+        from .sharded_storage import ShardedStorage
+
+        shards = os.environ.get("ACT_STORAGE_SHARDS")
+        return ShardedStorage(storage_path=path, shards=int(shards) if shards else None, shard_factory=backend)
+    return backend(storage_path=path)
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Optional, TextIO
+
+from .models import ContextBlock
+from .pagination import encode_cursor
+from .storage import Storage
+from .utils import iso_timestamp
+
+DEFAULT_BATCH_SIZE = 1000
+IMPORT_MODES = ("upsert", "skip")
+
+Progress = Callable[[int], None]
+
+
+@dataclass
+class ImportStats:
+    read: int = 0
+    stored: int = 0
+    skipped: int = 0
+
+
+def block_from_dict(entry: dict, timestamp: str) -> ContextBlock:
+    """A block from an ``{id, summary, type, content, tags, timestamp}`` object;
+    blocks without a timestamp get ``timestamp``. Raises ``ValueError`` if a field
+    has the wrong type."""
+    block_id = _text(entry, "id")
+    if not block_id.strip():
+        raise ValueError("block ids must not be empty")
+    tags = entry.get("tags", [])
+    if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+        raise ValueError("'tags' must be a list of strings")
+    return ContextBlock(
+        id=block_id,
+        content=_text(entry, "content"),
+        summary=_text(entry, "summary", ""),
+        type=_text(entry, "type", "generic"),
+        timestamp=_text(entry, "timestamp", "") or timestamp,
+        tags=list(tags),
+    )
+
+
+def _text(entry: dict, key: str, default: Optional[str] = None) -> str:
+    value = entry[key] if default is None else entry.get(key, default)
+    if not isinstance(value, str):
+        raise ValueError(f"{key!r} must be a string, not {type(value).__name__}")
+    return value
+
+
+def block_line(block: ContextBlock) -> str:
+    return json.dumps(block.to_dict(), ensure_ascii=False) + "\n"
+
+
+def iter_blocks(
+    storage: Storage, page_size: int = DEFAULT_BATCH_SIZE, **filters: Optional[str]
+) -> Iterator[ContextBlock]:
+    """Every block matching ``filters`` (query, tag, since, until), newest first,
+    read from the store a page at a time."""
+    cursor = None
+    while True:
+        page = storage.list_blocks(limit=page_size, cursor=cursor, **filters)
+        yield from page
+        if len(page) < page_size:
+            return
+        cursor = encode_cursor(page[-1])
+
+
+def export_blocks(
+    storage: Storage,
+    out: TextIO,
+    page_size: int = DEFAULT_BATCH_SIZE,
+    progress: Optional[Progress] = None,
+    **filters: Optional[str],
+) -> int:
+    """Write blocks to ``out`` as NDJSON, one page in memory at a time. Returns the count."""
+    count = 0
+    for block in iter_blocks(storage, page_size, **filters):
+        out.write(block_line(block))
+        count += 1
+        if progress is not None and count % page_size == 0:
+            progress(count)
+    return count
+
+
+def commit_batch(storage: Storage, blocks: List[ContextBlock], mode: str = "upsert") -> int:
+    """Store ``blocks`` in one commit. In ``skip`` mode, blocks whose id is already
+    stored (or came earlier in the batch) are left out. Returns how many were stored."""
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"Unknown import mode {mode!r}: use one of {', '.join(IMPORT_MODES)}")
+    if mode == "skip":
+        existing = storage.get_many([b.id for b in blocks])
+        seen = set()
+        kept = []
+        for block, found in zip(blocks, existing):
+            if found is None and block.id not in seen:
+                seen.add(block.id)
+                kept.append(block)
+        blocks = kept
+    if blocks:
+        storage.put_many(blocks)
+    return len(blocks)
+
+
+def parse_line(line: str, lineno: int, timestamp: str) -> Optional[ContextBlock]:
+    """The block on one NDJSON line, or None if it is blank. A malformed line
+    raises ``ValueError`` naming ``lineno``."""
+    if not line.strip():
+        return None
+    try:
+        return block_from_dict(json.loads(line), timestamp)
+    except (ValueError, KeyError, TypeError, AttributeError) as exc:
+        raise ValueError(f"line {lineno}: {exc}") from exc
+
+
+def parse_lines(lines: Iterable[str], timestamp: Optional[str] = None) -> Iterator[ContextBlock]:
+    timestamp = timestamp or iso_timestamp()
+    for lineno, line in enumerate(lines, 1):
+        block = parse_line(line, lineno, timestamp)
+        if block is not None:
+            yield block
+
+
+def import_blocks(
+    storage: Storage,
+    lines: Iterable[str],
+    mode: str = "upsert",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: Optional[Progress] = None,
+) -> ImportStats:
+    """Store blocks read from NDJSON ``lines``, committing every ``batch_size`` blocks.
+
+    Only one batch is held in memory. If a line is malformed, the batches before it
+    stay committed and ``ValueError`` is raised.
+    """
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"Unknown import mode {mode!r}: use one of {', '.join(IMPORT_MODES)}")
+    stats = ImportStats()
+    batch: List[ContextBlock] = []
+
+    def flush() -> None:
+        stored = commit_batch(storage, batch, mode)
+        stats.stored += stored
+        stats.skipped += len(batch) - stored
+        batch.clear()
+        if progress is not None:
+            progress(stats.read)
+
+    try:
+        for block in parse_lines(lines):
+            batch.append(block)
+            stats.read += 1
+            if len(batch) >= batch_size:
+                flush()
+    except ValueError as exc:
+        raise ValueError(f"{exc} ({stats.stored} blocks were stored before it)") from exc
+    if batch:
+        flush()
+    return stats
@@ -6,10 +6,7 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
-from rich.console import Console
-
-
-console = Console()
+from .metrics import metrics
 
 
 def iso_timestamp() -> str:
@@ -20,10 +17,8 @@ def get_default_store_path() -> Path:
     env_path = os.environ.get("ACT_STORE_PATH")
     if env_path:
         return Path(env_path).expanduser().resolve()
-    cwd = Path.cwd()
-    data_dir = cwd / "data"
-    data_dir.mkdir(parents=True, exist_ok=True)
-    return data_dir / "context_store.json"
+    # Not created here: the backends create the directory when they first write
+    return Path.cwd() / "data" / "context_store.json"
 
 
 def load_json_file(path: Path) -> Any:
@@ -35,5 +30,12 @@ def load_json_file(path: Path) -> Any:
 
 def dump_json_file(path: Path, data: Any) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
\ No newline at end of file
+    # Write to a sibling temp file and swap it in so readers never see a torn file
+    tmp_path = path.with_name(path.name + ".tmp")
+    # Encode to a string first so serialization and disk time are measured apart
+    with metrics.stage("serialize"):
+        text = json.dumps(data, ensure_ascii=False, indent=2)
+    with metrics.stage("write"):
+        with tmp_path.open("w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
\ No newline at end of file
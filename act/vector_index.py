@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import math
+import re
+import threading
+import zlib
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .models import ContextBlock
+
+
+DEFAULT_DIM = 256
+_TOKEN = re.compile(r"\w+")
+# A hit in the summary says more about a block than one in its content (cf. act.index)
+_SUMMARY_WEIGHT = 2.0
+
+
+@lru_cache(maxsize=1 << 16)
+def _bucket(feature: str, dim: int) -> int:
+    # Unsigned hashing: colliding features add up rather than risk cancelling out
+    return zlib.crc32(feature.encode("utf-8")) % dim
+
+
+def _features(text: str) -> List[str]:
+    tokens = _TOKEN.findall(text.lower())
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def embed(text: str, dim: int = DEFAULT_DIM, summary: str = "") -> np.ndarray:
+    """Unit-length feature-hashing embedding of word unigrams and bigrams.
+
+    Deterministic and offline: the same text always maps to the same vector, in
+    any process. Term counts are log-scaled and ``summary`` terms count double.
+    """
+    counts: Counter = Counter(_features(text))
+    for feature, n in Counter(_features(summary)).items():
+        counts[feature] += _SUMMARY_WEIGHT * n
+    vec = np.zeros(dim, dtype=np.float32)
+    for feature, n in counts.items():
+        vec[_bucket(feature, dim)] += 1.0 + math.log(n)
+    norm = float(np.linalg.norm(vec))
+    if norm:
+        vec /= norm
+    return vec
+
+
+class VectorIndex:
+    """In-memory cosine similarity index over block summaries and content.
+
+    Vectors are stored dimension-major (``dim`` rows of one float32 per block), so
+    scoring a query touches only the rows of the few dimensions its terms hash
+    to. Blocks are added, replaced and removed in place; removed slots are zeroed
+    and reused. Thread-safe.
+    """
+
+    def __init__(self, dim: int = DEFAULT_DIM) -> None:
+        self.dim = dim
+        self._vectors = np.zeros((dim, 0), dtype=np.float32)
+        self._ids: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add(self, block: ContextBlock) -> None:
+        vec = embed(block.content, self.dim, summary=block.summary)
+        with self._lock:
+            slot = self._rows.get(block.id)
+            if slot is None:
+                slot = self._free.pop() if self._free else self._grow()
+                self._rows[block.id] = slot
+                self._ids[slot] = block.id
+            self._vectors[:, slot] = vec
+
+    def _grow(self) -> int:
+        slot = len(self._ids)
+        if slot == self._vectors.shape[1]:
+            grown = np.zeros((self.dim, max(64, slot * 2)), dtype=np.float32)
+            grown[:, :slot] = self._vectors
+            self._vectors = grown
+        self._ids.append(None)
+        return slot
+
+    def remove(self, block_id: str) -> None:
+        with self._lock:
+            slot = self._rows.pop(block_id, None)
+            if slot is None:
+                return
+            self._vectors[:, slot] = 0.0
+            self._ids[slot] = None
+            self._free.append(slot)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vectors = np.zeros((self.dim, 0), dtype=np.float32)
+            self._ids = []
+            self._rows = {}
+            self._free = []
+
+    def rebuild(self, blocks: Iterable[ContextBlock]) -> None:
+        self.clear()
+        for block in blocks:
+            self.add(block)
+
+    def apply(self, op: str, arg: object = None) -> None:
+        """Storage listener: mirror a mutation (see ``Storage.subscribe``)."""
+        if op == "upsert":
+            self.add(arg)  # type: ignore[arg-type]
+        elif op == "delete":
+            self.remove(arg)  # type: ignore[arg-type]
+        elif op == "clear":
+            self.clear()
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """The ``k`` ids most similar to ``query`` with their cosine scores, best first."""
+        return self.search_many([query], k)[0]
+
+    def search_many(self, queries: Sequence[str], k: int) -> List[List[Tuple[str, float]]]:
+        """Top-``k`` results for each of several queries, scored under one lock hold."""
+        q = [embed(text, self.dim) for text in queries]
+        results = []
+        with self._lock:
+            n = len(self._ids)
+            scores = np.empty(n, dtype=np.float32)
+            term = np.empty(n, dtype=np.float32)
+            for vec in q:
+                # Queries hash to a handful of dimensions: accumulate just those rows
+                # instead of multiplying the whole matrix
+                scores.fill(0.0)
+                for d in np.flatnonzero(vec):
+                    np.multiply(self._vectors[d, :n], vec[d], out=term)
+                    scores += term
+                results.append(_top_k(scores, self._ids, k))
+        return results
+
+
+def _top_k(scores: np.ndarray, ids: List[Optional[str]], k: int) -> List[Tuple[str, float]]:
+    # Empty slots and blocks sharing no term with the query score zero. Dropping
+    # them first also keeps argpartition off long runs of ties, where it is slow.
+    candidates = np.flatnonzero(scores > 0)
+    if k <= 0 or len(candidates) == 0:
+        return []
+    if k < len(candidates):
+        candidates = candidates[np.argpartition(scores[candidates], -k)[-k:]]
+    best = candidates[np.argsort(-scores[candidates], kind="stable")]
+    return [(ids[i], float(scores[i])) for i in best]  # type: ignore[misc]
@@ -0,0 +1,71 @@
+"""Bytes of Python heap per ContextBlock, against the previous dataclass layout.
+
+    python benchmarks/block_memory.py --counts 100000 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from typing import Callable, List
+
+from act.models import ContextBlock
+
+
+@dataclass
+class LegacyContextBlock:
+    id: str
+    content: str
+    summary: str
+    type: str
+    timestamp: str
+    tags: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+TYPES = ["note", "code", "decision", "fact"]
+TAGS = ["project", "todo", "design", "bug", "user", "api", "perf", "docs"]
+
+
+def _fresh(s: str) -> str:
+    # A new string object with the same value, as json.load produces for every field
+    return s[:1] + s[1:]
+
+
+def _make(factory: Callable[..., object], i: int) -> object:
+    return factory(
+        id=f"block-{i}",
+        content=f"content of block {i}",
+        summary=f"summary {i}",
+        type=_fresh(TYPES[i % len(TYPES)]),
+        timestamp=f"2024-01-{i % 28 + 1:02d}T{i % 24:02d}:00:00+00:00",
+        tags=[_fresh(TAGS[(i + k) % len(TAGS)]) for k in range(2)],
+    )
+
+
+def bytes_per_block(factory: Callable[..., object], count: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    blocks = [_make(factory, i) for i in range(count)]
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del blocks
+    return used / count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+    print(f"{'blocks':>10} {'legacy B/block':>15} {'slotted B/block':>16} {'saved':>7}")
+    for count in args.counts:
+        legacy = bytes_per_block(LegacyContextBlock, count)
+        slotted = bytes_per_block(ContextBlock, count)
+        print(f"{count:>10} {legacy:>15.0f} {slotted:>16.0f} {1 - slotted / legacy:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
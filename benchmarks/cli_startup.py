@@ -0,0 +1,124 @@
+"""CLI import time and cold-start latency, against the store and against a running server.
+
+    python benchmarks/cli_startup.py --size 100000
+    python benchmarks/cli_startup.py --compare benchmarks/results/cli-<old>.json
+
+Every measurement is a fresh ``act`` process, the way scripts invoke it. The
+``--remote`` runs go to an ``act-server`` on a Unix domain socket that already
+has the store loaded. Results go to ``benchmarks/results/cli-<commit>.json``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from suite import RESULTS_DIR, _commit, compare, make_block
+
+from act.storage import JsonStorage
+from act.utils import iso_timestamp
+
+CLI = "from act.cli import main; main()"
+
+
+def run_ms(argv: List[str], env: Dict[str, str], repeat: int) -> Dict[str, float]:
+    """Wall-clock milliseconds per process over ``repeat`` runs."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(argv, env=env, check=True, stdout=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {"median_ms": statistics.median(samples), "min_ms": samples[0], "runs": repeat}
+
+
+def start_server(sock: Path, env: Dict[str, str]) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "-c", "from act.server import main; main()", "--uds", str(sock)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 120
+    while not sock.exists():
+        if server.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError("act-server did not start")
+        time.sleep(0.05)
+    # The store is loaded by the first request, not at startup
+    warm = [sys.executable, "-c", CLI, "--remote", f"unix:{sock}", "retrieve", "block-0"]
+    subprocess.run(warm, env=env, check=True, stdout=subprocess.DEVNULL)
+    return server
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000, help="Blocks in the store")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--output", type=Path, default=None, help="Where to write the results JSON")
+    parser.add_argument("--compare", type=Path, default=None, help="Baseline results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    results: List[dict] = []
+    base_env = {k: v for k, v in os.environ.items() if k not in ("ACT_REMOTE", "ACT_NAMESPACE", "ACT_CACHE_BYTES")}
+    results.append({"name": "python", **run_ms([sys.executable, "-c", "pass"], base_env, args.repeat)})
+    results.append({"name": "import_act_cli", **run_ms([sys.executable, "-c", "import act.cli"], base_env, args.repeat)})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = Path(tmp) / "store.json"
+        rng = random.Random(0)
+        print(f"Writing {args.size} blocks...", file=sys.stderr)
+        JsonStorage(store).put_many(make_block(i, rng) for i in range(args.size))
+        env = dict(base_env, ACT_STORE_PATH=str(store))
+        commands = {
+            "path": ["path"],
+            "retrieve": ["retrieve", f"block-{args.size // 2}"],
+            "list": ["list", "--limit", "20"],
+        }
+        for name, command in commands.items():
+            entry = run_ms([sys.executable, "-c", CLI, *command], env, args.repeat)
+            results.append({"name": f"cli_{name}_local", "size": args.size, **entry})
+
+        sock = Path(tmp) / "act.sock"
+        server = start_server(sock, env)
+        try:
+            for name, command in commands.items():
+                if name == "path":
+                    continue
+                entry = run_ms([sys.executable, "-c", CLI, "--remote", f"unix:{sock}", *command], env, args.repeat)
+                results.append({"name": f"cli_{name}_remote", "size": args.size, **entry})
+        finally:
+            server.terminate()
+            server.wait()
+
+    for entry in results:
+        print(f"{entry['name']:<24} {entry['median_ms']:>10.1f} ms", file=sys.stderr)
+    commit = _commit()
+    payload = {
+        "meta": {
+            "commit": commit,
+            "created": iso_timestamp(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "size": args.size,
+        },
+        "results": results,
+    }
+    output = args.output or RESULTS_DIR / f"cli-{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    print(f"Wrote {output}", file=sys.stderr)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Parser, storage and server benchmarks on synthetic data, saved as JSON.
+
+    python benchmarks/suite.py --sizes 1000 100000 1000000 --backends json sqlite
+    python benchmarks/suite.py --compare benchmarks/results/<old>.json
+
+Each run writes ``benchmarks/results/<commit>.json`` (or ``--output``). With
+``--compare``, the median of every measurement is printed next to the baseline's.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from act.mapped_storage import MappedStorage
+from act.models import ContextBlock
+from act.parsing import extract_memory_commands
+from act.processor import ACTProcessor
+from act.sharded_storage import ShardedStorage
+from act.sqlite_storage import SqliteStorage
+from act.storage import JsonStorage, Storage, WalJsonStorage
+from act.utils import iso_timestamp
+
+BACKENDS: Dict[str, Callable[[Path], Storage]] = {
+    "json": lambda d: JsonStorage(d / "store.json"),
+    "wal": lambda d: WalJsonStorage(d / "store.json"),
+    "mmap": lambda d: MappedStorage(d / "store.json"),
+    "sqlite": lambda d: SqliteStorage(d / "store.db"),
+    "shards": lambda d: ShardedStorage(d / "store.shards"),
+}
+TYPES = ["note", "code", "decision", "fact"]
+TAGS = ["project", "todo", "design", "bug", "user", "api", "perf", "docs"]
+WORDS = "the deploy cache index query worker budget schema token latency migration replica".split()
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def make_block(i: int, rng: random.Random) -> ContextBlock:
+    return ContextBlock(
+        id=f"block-{i}",
+        content=" ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 120))),
+        summary=f"summary {i} " + " ".join(rng.choice(WORDS) for _ in range(4)),
+        type=TYPES[i % len(TYPES)],
+        timestamp=f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}T{i % 24:02d}:{i % 60:02d}:00+00:00",
+        tags=[TAGS[(i + k) % len(TAGS)] for k in range(2)],
+    )
+
+
+def make_output(commands: int, rng: random.Random, size: int) -> str:
+    """A model response with ``commands`` memory commands in all three syntaxes among prose."""
+    parts = []
+    for n in range(commands):
+        parts.append(" ".join(rng.choice(WORDS) for _ in range(30)) + ".")
+        block_id = f"block-{rng.randrange(size)}"
+        if n % 3 == 0:
+            parts.append(f"```MEMORY_CMD\nSTORE|{block_id}|updated {n}|note|{' '.join(WORDS)}|perf\n```")
+        elif n % 3 == 1:
+            parts.append(f"MEMORY_CMD: RETRIEVE|{block_id}")
+        else:
+            parts.append(f"RETRIEVE|{block_id},block-{rng.randrange(size)}")
+    return "\n".join(parts)
+
+
+def timed(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Wall-clock milliseconds per call over ``repeat`` calls."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "median_ms": statistics.median(samples),
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "min_ms": samples[0],
+        "runs": repeat,
+    }
+
+
+def bench_parser(results: List[dict], rng: random.Random) -> None:
+    for commands in (10, 100, 1000):
+        text = make_output(commands, rng, 1000)
+        entry = timed(lambda: extract_memory_commands(text), 20)
+        results.append({"name": "extract_memory_commands", "commands": commands, "chars": len(text), **entry})
+
+
+def bench_storage(results: List[dict], backend: str, size: int, rng: random.Random) -> None:
+    # Slow operations get fewer repeats at scale so a 1M run still finishes
+    repeat = 50 if size <= 10_000 else 5
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        key = {"backend": backend, "size": size}
+        storage = BACKENDS[backend](root)
+        blocks = [make_block(i, rng) for i in range(size)]
+        start = time.perf_counter()
+        storage.put_many(blocks)
+        results.append({"name": "bulk_load", **key, "median_ms": (time.perf_counter() - start) * 1000, "runs": 1})
+        storage.close()
+        del blocks, storage
+        gc.collect()
+
+        start = time.perf_counter()
+        storage = BACKENDS[backend](root)
+        results.append({"name": "startup", **key, "median_ms": (time.perf_counter() - start) * 1000, "runs": 1})
+        storage.close()
+        del storage
+        gc.collect()
+        tracemalloc.start()
+        storage = BACKENDS[backend](root)
+        used, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results.append({"name": "memory", **key, "bytes": used, "peak_bytes": peak})
+
+        counter = iter(range(10**9))
+        results.append(
+            {"name": "upsert_block", **key, **timed(lambda: storage.upsert_block(make_block(next(counter) % size, rng)), repeat)}
+        )
+        results.append(
+            {"name": "get_block", **key, **timed(lambda: storage.get_block(f"block-{rng.randrange(size)}"), 200)}
+        )
+        results.append(
+            {"name": "list_query", **key, **timed(lambda: storage.list_blocks(query="summary 42", limit=20), repeat)}
+        )
+        results.append({"name": "list_tag", **key, **timed(lambda: storage.list_blocks(tag="perf", limit=20), repeat)})
+        results.append({"name": "list_newest", **key, **timed(lambda: storage.list_blocks(limit=50), repeat)})
+
+        processor = ACTProcessor(storage=storage)
+        text = make_output(15, rng, size)
+        results.append({"name": "process_model_output", **key, **timed(lambda: processor.process_model_output(text), repeat)})
+        results.append({"name": "server", **key, **asyncio.run(bench_server(processor, size, rng))})
+        storage.close()
+
+
+async def bench_server(processor: ACTProcessor, size: int, rng: random.Random, requests: int = 500) -> Dict[str, float]:
+    """Requests per second through an in-process ASGI client, reads and writes mixed 4:1."""
+    import httpx
+
+    from act.server import app, get_processor, get_store
+
+    app.dependency_overrides[get_processor] = lambda: processor
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+            async def one(n: int) -> None:
+                if n % 5 == 4:
+                    body = {"id": f"block-{rng.randrange(size)}", "summary": "s", "content": "bench write"}
+                    resp = await client.post("/store", json=body)
+                else:
+                    resp = await client.get(f"/retrieve/block-{rng.randrange(size)}")
+                resp.raise_for_status()
+
+            start = time.perf_counter()
+            for offset in range(0, requests, 50):
+                await asyncio.gather(*(one(n) for n in range(offset, min(requests, offset + 50))))
+            elapsed = time.perf_counter() - start
+    finally:
+        app.dependency_overrides.clear()
+        get_store(processor).close()
+    return {"requests": requests, "requests_per_s": requests / elapsed}
+
+
+def _commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _key(entry: dict) -> tuple:
+    return (entry["name"], entry.get("backend"), entry.get("size"), entry.get("commands"))
+
+
+def compare(current: List[dict], baseline_path: Path) -> None:
+    baseline = {_key(e): e for e in json.loads(baseline_path.read_text(encoding="utf-8"))["results"]}
+    print(f"{'benchmark':<48} {'baseline':>12} {'current':>12} {'change':>8}")
+    for entry in current:
+        old = baseline.get(_key(entry))
+        metric = next((m for m in ("median_ms", "requests_per_s", "bytes") if m in entry), None)
+        if old is None or metric is None or not old.get(metric):
+            continue
+        label = " ".join(str(p) for p in _key(entry) if p is not None)
+        print(f"{label:<48} {old[metric]:>12.3f} {entry[metric]:>12.3f} {entry[metric] / old[metric] - 1:>+8.0%}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--backends", nargs="+", choices=sorted(BACKENDS), default=["json", "sqlite"])
+    parser.add_argument("--output", type=Path, default=None, help="Where to write the results JSON")
+    parser.add_argument("--compare", type=Path, default=None, help="Baseline results JSON to compare against")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    results: List[dict] = []
+    bench_parser(results, rng)
+    for size in args.sizes:
+        for backend in args.backends:
+            print(f"{backend} at {size} blocks...", file=sys.stderr)
+            bench_storage(results, backend, size, rng)
+
+    commit = _commit()
+    payload = {
+        "meta": {
+            "commit": commit,
+            "created": iso_timestamp(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": args.sizes,
+            "backends": args.backends,
+        },
+        "results": results,
+    }
+    output = args.output or RESULTS_DIR / f"{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    print(f"Wrote {output}", file=sys.stderr)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
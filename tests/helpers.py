@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from typing import Iterable
+
+from act.models import ContextBlock
+
+
+def make_block(
+    block_id: str,
+    content: str = "content",
+    summary: str = "summary",
+    type: str = "note",
+    timestamp: str = "2020-01-01T00:00:00Z",
+    tags: Iterable[str] = ("a",),
+) -> ContextBlock:
+    """A block for tests; pass only what the test cares about."""
+    return ContextBlock(id=block_id, content=content, summary=summary, type=type, timestamp=timestamp, tags=list(tags))
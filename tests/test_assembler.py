@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from act.assembler import ContextAssembler, approx_token_count
+from act.processor import ACTProcessor
+from act.server import app, get_processor
+from act.storage import JsonStorage
+from helpers import make_block
+
+
+def test_assemble_falls_back_to_summaries(tmp_path: Path) -> None:
+    storage = JsonStorage(tmp_path / "store.json")
+    big = make_block("big", "word " * 50, "long notes")
+    small = make_block("small", "just a few words", "short note")
+    assembler = ContextAssembler(storage)
+
+    # Header "[big] long notes" is 5 tokens; its content does not fit in 20
+    context = assembler.assemble(20, ["an old turn " * 10, "hi there"], [big, small])
+    assert context.conversation == ["hi there"]
+    assert [(b.block.id, b.full) for b in context.blocks] == [("big", False), ("small", True)]
+    assert context.tokens == 2 + 5 + 9
+    assert context.render().startswith("[big] long notes\n\n[small] short note\njust a few words")
+
+    assert [b.block.id for b in assembler.assemble(3, [], [big, small]).blocks] == []
+
+
+def test_token_counts_cached_until_upsert(tmp_path: Path) -> None:
+    storage = JsonStorage(tmp_path / "store.json")
+    calls = []
+
+    def count(text: str) -> int:
+        calls.append(text)
+        return approx_token_count(text)
+
+    assembler = ContextAssembler(storage, count_tokens=count)
+    block = make_block("a", "one two three", "notes")
+    storage.upsert_block(block)
+    assert assembler.block_tokens(block) == (4, 3)
+    assert assembler.block_tokens(block) == (4, 3)
+    assert len(calls) == 2
+
+    changed = make_block("a", "one two three four", "notes")
+    storage.upsert_block(changed)
+    assert assembler.block_tokens(changed) == (4, 4)
+    storage.clear()
+    assembler.block_tokens(changed)
+    assert len(calls) == 6
+
+
+def test_count_racing_an_upsert_is_not_cached(tmp_path: Path) -> None:
+    storage = JsonStorage(tmp_path / "store.json")
+    old = make_block("a", "one two three", "notes")
+    new = make_block("a", "one two three four", "notes")
+    storage.upsert_block(old)
+
+    def count(text: str) -> int:
+        if text == old.content:
+            storage.upsert_block(new)  # the block changes while its old version is counted
+        return approx_token_count(text)
+
+    assembler = ContextAssembler(storage, count_tokens=count)
+    assert assembler.block_tokens(old) == (4, 3)
+    assert assembler.block_tokens(new) == (4, 4)
+
+
+def test_assemble_endpoint(tmp_path: Path) -> None:
+    processor = ACTProcessor(storage=JsonStorage(tmp_path / "store.json"))
+    processor.storage.upsert_block(make_block("pasta", "boil the pasta and stir in the tomato sauce", "dinner recipe"))
+    processor.storage.upsert_block(make_block("db", "raise the connection pool size", "database tuning"))
+    app.dependency_overrides[get_processor] = lambda: processor
+    try:
+        with TestClient(app) as client:
+            resp = client.post("/assemble", json={"budget": 100, "conversation": ["how do I cook pasta?"]})
+            assert resp.status_code == 200
+            body = resp.json()
+            assert [b["id"] for b in body["blocks"]] == ["pasta"]
+            assert body["blocks"][0]["full"] is True
+            assert body["tokens"] <= 100
+
+            resp = client.post("/assemble", json={"budget": 100, "block_ids": ["db", "pasta"]})
+            assert [b["id"] for b in resp.json()["blocks"]] == ["db", "pasta"]
+            assert client.post("/assemble", json={"budget": 10, "block_ids": ["nope"]}).status_code == 404
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from pathlib import Path
+
+import httpx
+import pytest
+
+from act.async_storage import AsyncStorage
+from act.processor import ACTProcessor
+from act.server import app, get_processor
+from act.sqlite_storage import SqliteStorage
+from act.storage import JsonStorage
+from helpers import make_block
+
+
+def test_async_storage_reads_its_writes(tmp_path: Path) -> None:
+    storage = JsonStorage(storage_path=tmp_path / "store.json")
+    store = AsyncStorage(storage)
+
+    async def scenario() -> None:
+        blocks = [make_block(f"b{i}", timestamp=str(i)) for i in range(20)]
+        await asyncio.gather(*(store.upsert_block(b) for b in blocks))
+        assert (await store.get_block("b7")) is not None
+        assert len(await store.list_blocks(limit=5)) == 5
+        assert await store.delete_block("b7") is True
+        assert (await store.get_block("b7")) is None
+
+    asyncio.run(scenario())
+    store.close()
+    assert len(JsonStorage(storage_path=tmp_path / "store.json").list_blocks()) == 19
+
+
+def test_concurrent_store_requests(tmp_path: Path) -> None:
+    processor = ACTProcessor(storage=JsonStorage(storage_path=tmp_path / "store.json"))
+    app.dependency_overrides[get_processor] = lambda: processor
+
+    async def scenario() -> None:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = await asyncio.gather(
+                *(client.post("/store", json={"id": f"k{i}", "summary": "s", "content": "c"}) for i in range(30))
+            )
+            assert all(r.status_code == 200 for r in responses)
+            listed = await client.get("/blocks")
+            assert len(listed.json()) == 30
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_failed_write_in_a_group_discards_only_its_own_changes(tmp_path: Path) -> None:
+    storage = SqliteStorage(tmp_path / "store.db")
+    store = AsyncStorage(storage)
+    release = threading.Event()
+
+    def failing() -> None:
+        storage.upsert_block(make_block("partial"))
+        raise RuntimeError("boom")
+
+    async def scenario() -> None:
+        # Hold the writer so the next three writes are committed as one group
+        held = asyncio.ensure_future(store.write(release.wait))
+        await asyncio.sleep(0.05)
+        writes = [store.upsert_block(make_block("a")), store.write(failing), store.upsert_block(make_block("b"))]
+        futures = [asyncio.ensure_future(w) for w in writes]
+        await asyncio.sleep(0.05)
+        release.set()
+        await held
+        await futures[0]
+        with pytest.raises(RuntimeError):
+            await futures[1]
+        await futures[2]
+
+    asyncio.run(scenario())
+    store.close()
+    assert storage.get_block("partial") is None
+    assert {b.id for b in storage.list_blocks()} == {"a", "b"}
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+import act.storage
+from act.processor import ACTProcessor
+from act.sqlite_storage import SqliteStorage
+from act.storage import JsonStorage, WalJsonStorage
+from helpers import make_block
+
+_OUTPUT = "\n".join(f"STORE|b{i}|s|note|c{i}|" for i in range(20)) + "\nRETRIEVE|b3\nDone."
+
+
+def test_json_output_is_flushed_once(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    writes = []
+    original = act.storage.dump_json_file
+    monkeypatch.setattr(act.storage, "dump_json_file", lambda path, data: writes.append(path) or original(path, data))
+
+    storage = JsonStorage(storage_path=tmp_path / "store.json")
+    result = ACTProcessor(storage=storage).process_model_output(_OUTPUT)
+    assert len(result.stored_blocks) == 20
+    assert [b.id for b in result.retrieved_blocks] == ["b3"]
+    assert len(writes) == 1
+    assert len(JsonStorage(storage_path=tmp_path / "store.json").list_blocks()) == 20
+
+
+def test_wal_batch_appends_together(tmp_path: Path) -> None:
+    storage = WalJsonStorage(storage_path=tmp_path / "store.json")
+    processor = ACTProcessor(storage=storage)
+    with storage.batch():
+        processor.process_many(["STORE|a|s|t|c|", "STORE|b|s|t|c|"])
+        assert not storage.log_path.exists()
+    assert len(storage.log_path.read_text(encoding="utf-8").splitlines()) == 2
+
+
+def test_sqlite_batch_rolls_back_on_error(tmp_path: Path) -> None:
+    storage = SqliteStorage(tmp_path / "store.db")
+    block = make_block("x")
+    with pytest.raises(RuntimeError):
+        with storage.batch():
+            storage.upsert_block(block)
+            raise RuntimeError("boom")
+    assert storage.get_block("x") is None
+
+    ACTProcessor(storage=storage).process_many([_OUTPUT, "STORE|z|s|t|c|"])
+    assert len(storage.list_blocks()) == 21
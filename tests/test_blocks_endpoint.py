@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+import act.server
+from act.processor import ACTProcessor
+from act.server import app, get_processor
+from act.storage import JsonStorage
+from helpers import make_block
+
+
+@pytest.fixture
+def client(tmp_path: Path):
+    storage = JsonStorage(tmp_path / "store.json")
+    storage.put_many(
+        make_block(f"b{i}", f"content {i}", summary=f"s{i}", timestamp=f"2024-01-01T00:00:{i:02d}+00:00", tags=["x"])
+        for i in range(10)
+    )
+    processor = ACTProcessor(storage=storage)
+    app.dependency_overrides[get_processor] = lambda: processor
+    try:
+        with TestClient(app) as c:
+            yield c
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_full_listing_matches_block_response(client: TestClient) -> None:
+    body = client.get("/blocks", params={"limit": 2}).json()
+    assert body[0] == {
+        "id": "b9",
+        "summary": "s9",
+        "type": "note",
+        "content": "content 9",
+        "timestamp": "2024-01-01T00:00:09+00:00",
+        "tags": ["x"],
+    }
+
+
+def test_fields_projection_and_summary_view(client: TestClient) -> None:
+    assert client.get("/blocks", params={"fields": "id,summary", "limit": 1}).json() == [{"id": "b9", "summary": "s9"}]
+    summary = client.get("/blocks", params={"view": "summary", "limit": 1}).json()[0]
+    assert "content" not in summary and summary["id"] == "b9"
+    assert client.get("/blocks", params={"fields": "id,secret"}).status_code == 400
+    assert client.get("/blocks", params={"view": "summary", "fields": "id,content"}).status_code == 400
+    assert client.get("/blocks", params={"view": "summary", "fields": "id", "limit": 1}).json() == [{"id": "b9"}]
+    assert client.get("/blocks", params={"view": "tiny"}).status_code == 422
+
+
+def test_ndjson_streams_every_page(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(act.server, "_STREAM_PAGE", 3)
+    headers = {"Accept": "application/x-ndjson"}
+    resp = client.get("/blocks", params={"fields": "id"}, headers=headers)
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["id"] for line in resp.text.splitlines()] == [f"b{i}" for i in range(9, -1, -1)]
+
+    resp = client.get("/blocks", params={"fields": "id", "limit": 4}, headers=headers)
+    assert len(resp.text.splitlines()) == 4
+    assert "X-Next-Cursor" in resp.headers
+
+
+def test_openapi_describes_projected_and_ndjson_listings(client: TestClient) -> None:
+    content = client.get("/openapi.json").json()["paths"]["/blocks"]["get"]["responses"]["200"]["content"]
+    assert "required" not in content["application/json"]["schema"]["items"]
+    assert "application/x-ndjson" in content
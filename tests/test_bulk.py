@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from typer.testing import CliRunner
+
+from act.cli import app as cli_app
+from act.models import MemoryCommandType
+from act.parsing import extract_memory_commands
+from act.processor import ACTProcessor
+from act.server import app, get_processor
+from act.storage import open_storage
+from helpers import make_block
+
+
+@pytest.mark.parametrize("name", ["store.json", "store.db", "store.shards"])
+def test_get_many_and_put_many(tmp_path: Path, name: str) -> None:
+    storage = open_storage(tmp_path / name)
+    storage.put_many([make_block(f"b{i}") for i in range(5)])
+    found = storage.get_many(["b3", "nope", "b0", "b3"])
+    assert [b.id if b else None for b in found] == ["b3", None, "b0", "b3"]
+    assert len(open_storage(tmp_path / name).list_blocks()) == 5
+
+
+def test_retrieve_accepts_several_ids(tmp_path: Path) -> None:
+    commands, _ = extract_memory_commands("RETRIEVE|a, b,,c")
+    assert [(c.type, c.block_id, c.block_ids) for c in commands] == [
+        (MemoryCommandType.RETRIEVE, "a", ["a", "b", "c"])
+    ]
+
+    processor = ACTProcessor(storage=open_storage(tmp_path / "store.json"))
+    processor.storage.put_many([make_block("a"), make_block("c")])
+    result = processor.process_model_output("RETRIEVE|c,missing,a")
+    assert [b.id for b in result.retrieved_blocks] == ["c", "a"]
+
+
+def test_batch_endpoints(tmp_path: Path) -> None:
+    processor = ACTProcessor(storage=open_storage(tmp_path / "store.json"))
+    app.dependency_overrides[get_processor] = lambda: processor
+    try:
+        with TestClient(app) as client:
+            blocks = [{"id": "a", "summary": "s", "content": "x|y"}, {"id": "b", "summary": "s", "content": "z"}]
+            resp = client.post("/blocks:batchPut", json={"blocks": blocks})
+            assert resp.status_code == 200
+            assert [b["id"] for b in resp.json()] == ["a", "b"]
+
+            resp = client.post("/blocks:batchGet", json={"ids": ["b", "nope", "a"]})
+            body = resp.json()
+            assert [b["id"] for b in body["blocks"]] == ["b", "a"]
+            assert body["blocks"][1]["content"] == "x|y"
+            assert body["missing"] == ["nope"]
+
+            resp = client.post("/blocks:batchPut", json={"blocks": [{"id": " ", "summary": "s", "content": "c"}]})
+            assert resp.status_code == 400
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_cli_store_from_file(tmp_path: Path) -> None:
+    source = tmp_path / "blocks.jsonl"
+    source.write_text(
+        "\n".join(json.dumps({"id": f"b{i}", "summary": "s", "content": f"c{i}", "tags": ["x"]}) for i in range(3)),
+        encoding="utf-8",
+    )
+    store = tmp_path / "store.json"
+    result = CliRunner().invoke(cli_app, ["store", "--from-file", str(source), "--store-path", str(store)])
+    assert result.exit_code == 0, result.output
+    assert sorted(b.id for b in open_storage(store).list_blocks()) == ["b0", "b1", "b2"]
+
+    listed = tmp_path / "blocks.json"
+    listed.write_text(json.dumps([{"id": "b9", "content": "c"}]), encoding="utf-8")
+    result = CliRunner().invoke(cli_app, ["store", "-f", str(listed), "--store-path", str(store)])
+    assert result.exit_code == 0 and open_storage(store).get_block("b9").summary == ""
+
+    result = CliRunner().invoke(cli_app, ["store", "only-id", "--store-path", str(store)])
+    assert result.exit_code == 1
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from act.cached_storage import CachedStorage, block_weight
+from act.mapped_storage import MappedStorage
+from act.sqlite_storage import SqliteStorage
+from act.storage import open_storage
+from helpers import make_block
+
+
+@pytest.mark.parametrize("backend", [SqliteStorage, MappedStorage])
+def test_lru_eviction_is_bounded_by_bytes(tmp_path: Path, backend) -> None:
+    suffix = ".db" if backend is SqliteStorage else ".json"
+    budget = 3 * block_weight(make_block("a", "x" * 100))
+    storage = CachedStorage(backend(storage_path=tmp_path / f"store{suffix}"), max_bytes=budget)
+    for block_id in "abcd":
+        storage.upsert_block(make_block(block_id, "x" * 100))
+
+    for block_id in "abc":
+        assert storage.get_block(block_id).content == "x" * 100
+    storage.get_block("a")  # a is now the most recently used
+    storage.get_block("d")  # evicts b
+    stats = storage.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 4, 1)
+    assert stats["bytes"] <= budget and stats["blocks"] == 3
+
+    storage.get_block("a")
+    storage.get_block("b")
+    assert storage.stats()["hits"] == 2 and storage.stats()["misses"] == 5
+    assert storage.get_block("missing") is None
+
+
+def test_writes_invalidate_cached_blocks(tmp_path: Path) -> None:
+    storage = CachedStorage(SqliteStorage(storage_path=tmp_path / "store.db"), max_bytes=1 << 20)
+    storage.upsert_block(make_block("a", "old"))
+    assert storage.get_block("a").content == "old"
+    storage.upsert_block(make_block("a", "new"))
+    assert storage.get_block("a").content == "new"
+    storage.delete_block("a")
+    assert storage.get_block("a") is None
+    storage.upsert_block(make_block("b"))
+    storage.get_block("b")
+    storage.clear()
+    assert storage.get_block("b") is None
+    assert storage.stats()["bytes"] == 0
+
+
+def test_cache_sees_other_process_writes_to_mapped_store(tmp_path: Path) -> None:
+    storage = CachedStorage(MappedStorage(storage_path=tmp_path / "store.json"))
+    storage.upsert_block(make_block("a", "old"))
+    assert storage.get_block("a").content == "old"
+    MappedStorage(storage_path=tmp_path / "store.json").upsert_block(make_block("a", "new"))
+    assert storage.get_block("a").content == "new"
+
+
+def test_open_storage_wraps_with_cache(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("ACT_CACHE_BYTES", "4096")
+    storage = open_storage(tmp_path / "store.db")
+    assert isinstance(storage, CachedStorage) and storage.max_bytes == 4096
+    assert isinstance(storage.backend, SqliteStorage)
+
+
+def test_writes_during_a_miss_only_block_caching_the_written_block(tmp_path: Path) -> None:
+    backend = SqliteStorage(storage_path=tmp_path / "store.db")
+    storage = CachedStorage(backend, max_bytes=1 << 20)
+    storage.put_many([make_block("a", "old"), make_block("b")])
+    get_many = backend.get_many
+    write = []
+
+    def racing_get_many(block_ids):
+        found = get_many(block_ids)
+        for block in write:
+            backend.upsert_block(block)  # lands after the read, before the result is cached
+        return found
+
+    backend.get_many = racing_get_many  # type: ignore[method-assign]
+    write[:] = [make_block("b", "changed")]
+    storage.get_block("a")
+    assert storage.stats()["blocks"] == 1  # a write to b does not keep a out of the cache
+
+    storage.clear()
+    storage.upsert_block(make_block("a", "old"))
+    write[:] = [make_block("a", "new")]
+    assert storage.get_block("a").content == "old"  # the read raced the write...
+    write.clear()
+    assert storage.get_block("a").content == "new"  # ...so it was not cached
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+import uvicorn
+from typer.testing import CliRunner
+
+import act.server
+from act.cli import app as cli_app
+from act.client import ACTClient
+from act.storage import JsonStorage
+from helpers import make_block
+
+
+@pytest.fixture
+def server_url(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("ACT_STORE_PATH", str(tmp_path / "store.json"))
+    monkeypatch.setattr(act.server, "_processor", None)
+    monkeypatch.setattr(act.server, "_namespaces", None)
+    # AF_UNIX paths are limited to about 100 bytes, which tmp_path can exceed
+    with tempfile.TemporaryDirectory() as sock_dir:
+        sock = Path(sock_dir) / "act.sock"
+        server = uvicorn.Server(uvicorn.Config(act.server.app, uds=str(sock), log_level="warning"))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        deadline = time.monotonic() + 10
+        while not server.started and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert server.started
+        try:
+            yield f"unix:{sock}"
+        finally:
+            server.should_exit = True
+            thread.join(timeout=10)
+
+
+def test_remote_commands_go_through_the_server(server_url: str, tmp_path: Path) -> None:
+    runner = CliRunner()
+    remote = ["--remote", server_url]
+    assert runner.invoke(cli_app, remote + ["store", "a", "-s", "first", "-c", "alpha", "--tags", "x,y"]).exit_code == 0
+    blocks_file = tmp_path / "blocks.jsonl"
+    blocks_file.write_text('{"id": "b", "summary": "second", "content": "beta"}\n', encoding="utf-8")
+    assert runner.invoke(cli_app, remote + ["store", "-f", str(blocks_file)]).exit_code == 0
+
+    result = runner.invoke(cli_app, remote + ["retrieve", "a"])
+    assert result.exit_code == 0 and json.loads(result.stdout)["tags"] == ["x", "y"]
+    assert runner.invoke(cli_app, remote + ["retrieve", "missing"]).exit_code == 1
+    listed = runner.invoke(cli_app, remote + ["list", "--limit", "1"])
+    assert "second" in listed.stdout and "Next page: --cursor" in listed.stdout
+    result = runner.invoke(cli_app, remote + ["process-output", "--text", "Hi\nRETRIEVE|b"])
+    assert result.stdout.strip() == "Hi"
+    assert "Deleted block" in runner.invoke(cli_app, remote + ["delete", "a"]).stdout
+
+    # The server's store holds what the CLI sent; a namespace goes to its own store
+    assert runner.invoke(cli_app, remote + ["-N", "n1", "store", "c", "-s", "s", "-c", "c"]).exit_code == 0
+    with ACTClient(server_url) as client:
+        assert [b["id"] for b in client.list_blocks()[0]] == ["b"]
+    with ACTClient(server_url, namespace="n1") as client:
+        assert client.get_block("c")["content"] == "c"
+    assert runner.invoke(cli_app, remote + ["clear", "--yes"]).exit_code == 1
+
+
+def test_remote_export_and_import(server_url: str, tmp_path: Path) -> None:
+    runner = CliRunner()
+    remote = ["--remote", server_url]
+    dump = tmp_path / "dump.ndjson"
+    dump.write_text("".join(json.dumps({"id": f"b{i}", "content": f"c{i}"}) + "\n" for i in range(5)), encoding="utf-8")
+    result = runner.invoke(cli_app, remote + ["import", str(dump), "--batch-size", "2"])
+    assert result.exit_code == 0 and "Imported 5 of 5 blocks" in result.stdout
+    result = runner.invoke(cli_app, remote + ["import", str(dump), "--mode", "skip"])
+    assert "(5 skipped)" in result.stdout
+
+    out = tmp_path / "out.ndjson"
+    assert runner.invoke(cli_app, remote + ["export", "-o", str(out)]).exit_code == 0
+    assert sorted(json.loads(line)["id"] for line in out.read_text(encoding="utf-8").splitlines()) == [
+        f"b{i}" for i in range(5)
+    ]
+    assert runner.invoke(cli_app, ["--remote", f"unix:{tmp_path}/missing.sock", "export"]).exit_code == 1
+
+
+def test_cli_import_defers_heavy_modules() -> None:
+    heavy = ["rich.console", "filelock", "numpy", "act.storage", "act.processor", "http.client"]
+    code = f"import sys, act.cli; print([m for m in {heavy!r} if m in sys.modules])"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "[]"
+
+
+def test_path_does_not_create_data_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    result = CliRunner().invoke(cli_app, ["path"])
+    assert result.exit_code == 0 and "context_store.json" in result.stdout
+    assert not (tmp_path / "data").exists()
+
+
+def test_json_index_is_built_on_first_listing(tmp_path: Path) -> None:
+    JsonStorage(tmp_path / "store.json").upsert_block(make_block("a", "alpha"))
+    reopened = JsonStorage(tmp_path / "store.json")
+    assert reopened.get_block("a") is not None and reopened._index is None
+    assert [b.id for b in reopened.list_blocks(tag="a")] == ["a"]
+    reopened.upsert_block(make_block("b", "beta"))
+    assert [b.id for b in reopened.list_blocks(tag="a", query="beta")] == ["b"]
+    # The first text query scans; the second builds the trigram index
+    assert not reopened._index_has_content
+    assert [b.id for b in reopened.list_blocks(query="alph")] == ["a"]
+    assert reopened._index_has_content
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from act.cli import app
+from act.compression import CompressedContextBlock, store_stats
+from act.storage import JsonStorage, WalJsonStorage, open_storage
+from helpers import make_block
+
+
+def _transcript(i: int) -> str:
+    return "".join(f"[tool] running pytest -q in /srv/app for step {i}\nresult: ok {j}\n" for j in range(4))
+
+
+@pytest.mark.parametrize("cls", [JsonStorage, WalJsonStorage])
+def test_large_content_is_stored_compressed(tmp_path: Path, cls: type) -> None:
+    path = tmp_path / "store.json"
+    store = cls(path, compress_min_bytes=64)
+    big = "def handler(event):\n    return event\n" * 50
+    store.upsert_block(make_block("big", big))
+    store.upsert_block(make_block("small", "tiny"))
+
+    assert isinstance(store.get_block("big"), CompressedContextBlock)
+    assert store.get_block("big").content == big
+    assert not isinstance(store.get_block("small"), CompressedContextBlock)
+    on_disk = path.read_text(encoding="utf-8") if path.exists() else store.log_path.read_text(encoding="utf-8")
+    assert "def handler" not in on_disk
+
+    # Stored content stays readable with compression switched off
+    reopened = cls(path)
+    assert reopened.get_block("big") == make_block("big", big)
+    assert [b.id for b in reopened.list_blocks(query="HANDLER")] == ["big"]
+
+
+def test_trained_dictionary_shrinks_small_blocks(tmp_path: Path) -> None:
+    path = tmp_path / "store.json"
+    store = JsonStorage(path, compress_min_bytes=32)
+    for i in range(30):
+        store.upsert_block(make_block(f"b{i}", _transcript(i)))
+    before = store_stats(store.list_blocks(), path)["stored_content_bytes"]
+
+    assert store.train_dictionary(size=4096) > 0
+    after = store_stats(store.list_blocks(), path)
+    assert after["stored_content_bytes"] < before
+    assert after["compressed_blocks"] == 30
+
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert data["zdict"] and all(entry["zdict"] == data["zdict"] for entry in data["blocks"].values())
+    assert JsonStorage(path).get_block("b7").content == _transcript(7)
+
+
+def test_stats_and_train_commands(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("ACT_COMPRESSION", "zlib")
+    monkeypatch.setenv("ACT_COMPRESS_MIN_BYTES", "32")
+    path = tmp_path / "store.json"
+    store = open_storage(path)
+    for i in range(10):
+        store.upsert_block(make_block(f"b{i}", _transcript(i)))
+
+    runner = CliRunner()
+    result = runner.invoke(app, ["train-dict", "--store-path", str(path)])
+    assert result.exit_code == 0, result.output
+    result = runner.invoke(app, ["stats", "--store-path", str(path)])
+    assert result.exit_code == 0, result.output
+    assert "Compression ratio" in result.output and "Blocks" in result.output
+
+
+@pytest.mark.parametrize("mode", ["json", "mmap"])
+def test_train_command_refuses_stores_without_compression(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, mode: str
+) -> None:
+    monkeypatch.setenv("ACT_STORAGE_MODE", mode)
+    if mode == "mmap":
+        monkeypatch.setenv("ACT_COMPRESSION", "zlib")
+    path = tmp_path / "store.json"
+    store = open_storage(path)
+    for i in range(10):
+        store.upsert_block(make_block(f"b{i}", _transcript(i)))
+    before = sorted(p.name for p in tmp_path.iterdir())
+
+    result = CliRunner().invoke(app, ["train-dict", "--store-path", str(path)])
+    assert result.exit_code == 1 and "recompressed" not in result.output
+    assert sorted(p.name for p in tmp_path.iterdir()) == before
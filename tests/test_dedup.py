@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from act.mapped_storage import MappedStorage
+from act.processor import ACTProcessor
+from act.retention import RetentionPolicy, sweep
+from act.storage import JsonStorage, WalJsonStorage
+from helpers import make_block
+
+BIG = "Traceback (most recent call last):\n  File \"app.py\", line 3\n" * 20
+
+
+@pytest.mark.parametrize("compress", [None, 64])
+def test_identical_content_is_kept_once(tmp_path: Path, compress) -> None:
+    path = tmp_path / "store.json"
+    store = JsonStorage(path, compress_min_bytes=compress)
+    store.put_many([make_block("a", BIG), make_block("b", BIG), make_block("c", BIG), make_block("other", BIG + "!")])
+    assert store.dedup_stats()["shared_blocks"] == 3
+    a, b = store.get_block("a"), store.get_block("b")
+    if compress:
+        assert a._data is b._data  # type: ignore[attr-defined]
+    else:
+        assert a.content is b.content
+
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert len(data["payloads"]) == 1
+    assert data["blocks"]["a"]["content_ref"] == data["blocks"]["c"]["content_ref"]
+    assert "content_ref" not in data["blocks"]["other"]
+    assert JsonStorage(path).get_block("c") == make_block("c", BIG)
+
+    # Reference counts follow deletes and clear
+    store.delete_block("a")
+    store.delete_block("b")
+    assert store.dedup_stats() == {"payloads": 2, "shared_blocks": 0, "deduplicated_bytes": 0}
+    assert "payloads" not in json.loads(path.read_text(encoding="utf-8"))
+    assert JsonStorage(path).get_block("c") == make_block("c", BIG)
+    store.clear()
+    assert store.dedup_stats()["payloads"] == 0
+
+
+def test_wal_compaction_and_mmap_conversion_read_shared_payloads(tmp_path: Path) -> None:
+    path = tmp_path / "store.json"
+    wal = WalJsonStorage(path)
+    wal.put_many([make_block("a", BIG), make_block("b", BIG)])
+    wal.compact()
+    assert "payloads" in json.loads(path.read_text(encoding="utf-8"))
+    assert WalJsonStorage(path).get_block("b") == make_block("b", BIG)
+    assert MappedStorage(path).get_block("a") == make_block("a", BIG)
+
+
+def test_upsert_of_unchanged_content_skips_the_write(tmp_path: Path) -> None:
+    path = tmp_path / "store.json"
+    store = JsonStorage(path)
+    events = []
+    store.subscribe(lambda op, arg: events.append(op))
+    store.upsert_block(make_block("a", BIG))
+    before = path.stat().st_mtime_ns, path.read_text(encoding="utf-8")
+    assert store.upsert_block(make_block("a", BIG)) is store.get_block("a")
+    assert (path.stat().st_mtime_ns, path.read_text(encoding="utf-8")) == before
+    assert events == ["upsert"]
+
+    store.upsert_block(make_block("a", BIG, summary="new summary"))
+    store.upsert_block(make_block("small", "tiny"))
+    store.upsert_block(make_block("small", "changed"))
+    assert events == ["upsert"] * 4
+    assert JsonStorage(path).get_block("small").content == "changed"
+
+
+@pytest.mark.parametrize("cls", [JsonStorage, WalJsonStorage, MappedStorage])
+def test_restored_block_gets_the_new_timestamp(tmp_path: Path, cls: type) -> None:
+    path = tmp_path / "store.json"
+    store = cls(path)
+    line = "ValueError: invalid literal for int() with base 10 " * 4
+    store.upsert_block(make_block("a", line, timestamp="2000-01-01T00:00:00+00:00"))
+    store.upsert_block(make_block("b", BIG, timestamp="2001-01-01T00:00:00+00:00"))
+    processor = ACTProcessor(storage=store)
+    result = processor.process_model_output(f"STORE|a|summary|note|{line}|a")
+    stored = result.stored_blocks[0]
+    assert stored.timestamp != "2000-01-01T00:00:00+00:00"
+    assert store.get_block("a") == stored and cls(path).get_block("a") == stored
+    if cls is WalJsonStorage:
+        assert '"op":"retime"' in store.log_path.read_text(encoding="utf-8")
+    assert [b.id for b in store.list_blocks()] == ["a", "b"]
+
+    # Re-storing keeps a block alive under max_age
+    policy = RetentionPolicy.from_dict({"default": {"max_age": "1h"}})
+    assert sweep(store, policy, processor.access).deleted == 1
+    assert [b.id for b in store.list_blocks()] == ["a"]
+
+
+@pytest.mark.parametrize("cls", [JsonStorage, WalJsonStorage])
+def test_entry_with_bad_content_is_skipped_on_open(tmp_path: Path, cls: type) -> None:
+    path = tmp_path / "store.json"
+    writer = cls(path)
+    writer.put_many([make_block("a", BIG), make_block("b", BIG)])
+    writer.compact()
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["blocks"]["bad"] = {**make_block("bad").to_dict(), "content": 5}
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+    store = cls(path)
+    assert store.get_block("bad") is None and store.get_block("a") == make_block("a", BIG)
+    with pytest.raises(TypeError):
+        store.upsert_block(make_block("c", 5))  # type: ignore[arg-type]
+    assert store.get_block("c") is None
+    assert [b.id for b in store.list_blocks()] == ["b", "a"]
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from act.mapped_storage import MappedContextBlock, MappedStorage
+from act.storage import JsonStorage
+from helpers import make_block
+
+
+def test_content_lives_in_data_file(tmp_path: Path) -> None:
+    store = MappedStorage(tmp_path / "store.json")
+    store.upsert_block(make_block("b1", "héllo wörld"))
+    store.upsert_block(make_block("b2", "second", tags=("b",)))
+
+    assert "héllo" not in store.path.read_text(encoding="utf-8")
+    reopened = MappedStorage(tmp_path / "store.json")
+    block = reopened.get_block("b1")
+    assert isinstance(block, MappedContextBlock)
+    assert block == make_block("b1", "héllo wörld")
+    assert [b.id for b in reopened.list_blocks(tag="b")] == ["b2"]
+    assert [b.id for b in reopened.list_blocks(query="WÖRLD")] == ["b1"]
+    assert [b.id for b in reopened.list_blocks(query="sec", top_k=1)] == ["b2"]
+
+
+def test_sees_appends_from_other_instance(tmp_path: Path) -> None:
+    a = MappedStorage(tmp_path / "store.json")
+    b = MappedStorage(tmp_path / "store.json")
+    a.upsert_block(make_block("b1", "first"))
+    assert b.get_block("b1").content == "first"
+    a.upsert_block(make_block("b1", "updated"))
+    assert b.get_block("b1").content == "updated"
+
+
+def test_garbage_is_compacted_into_new_data_file(tmp_path: Path) -> None:
+    store = MappedStorage(tmp_path / "store.json", compact_threshold=50)
+    store.upsert_block(make_block("b1", "a" * 30))
+    store.upsert_block(make_block("b1", "b" * 30))
+    old = store.data_path
+    assert old.stat().st_size == 60
+
+    # The superseded 60 bytes now pass the threshold and outweigh the live ones
+    store.upsert_block(make_block("b1", "c" * 30))
+    assert store.data_path != old and not old.exists()
+    assert store.data_path.stat().st_size == 30
+    assert MappedStorage(tmp_path / "store.json").get_block("b1").content == "c" * 30
+
+
+def test_converts_plain_json_store(tmp_path: Path) -> None:
+    JsonStorage(tmp_path / "store.json").upsert_block(make_block("b1", "legacy"))
+    store = MappedStorage(tmp_path / "store.json")
+    assert store.get_block("b1").content == "legacy"
+    store.upsert_block(make_block("b2"))
+    assert "legacy" not in store.path.read_text(encoding="utf-8")
+    assert MappedStorage(tmp_path / "store.json").get_block("b1").content == "legacy"
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from act.metrics import Registry, SamplingProfiler, metrics, parse_histograms, quantile
+from act.processor import ACTProcessor
+from act.server import app, get_processor
+from act.storage import JsonStorage
+
+
+def test_registry_renders_prometheus_text_and_parses_back() -> None:
+    registry = Registry()
+    registry.observe("act_stage_seconds", 0.003, stage="parse")
+    registry.observe("act_stage_seconds", 0.2, stage="parse")
+    registry.observe("act_stage_seconds", 30.0, stage="parse")
+    registry.inc("act_commands_total", type="store")
+    text = registry.render()
+    assert "# TYPE act_stage_seconds histogram" in text
+    assert 'act_stage_seconds_bucket{stage="parse",le="0.005"} 1' in text
+    assert 'act_stage_seconds_bucket{stage="parse",le="+Inf"} 3' in text
+    assert 'act_commands_total{type="store"} 1' in text
+
+    counts, total, count = parse_histograms(text)[("act_stage_seconds", (("stage", "parse"),))]
+    assert count == 3 and sum(counts) == 2 and abs(total - 30.203) < 1e-9
+    assert quantile(counts, count, 0.5) == 0.25
+    assert quantile(counts, count, 0.95) == float("inf")
+
+
+def test_disabled_registry_records_nothing() -> None:
+    registry = Registry(enabled=False)
+    with registry.stage("parse"):
+        pass
+    registry.timed("save")(lambda: None)()
+    registry.inc("act_commands_total")
+    assert registry.snapshot() == {}
+
+
+def test_metrics_endpoint_reports_stages(tmp_path: Path) -> None:
+    processor = ACTProcessor(storage=JsonStorage(tmp_path / "store.json"))
+    app.dependency_overrides[get_processor] = lambda: processor
+    metrics.reset()
+    try:
+        with TestClient(app) as client:
+            client.post("/process_output", json={"text": "Hi\nSTORE|a|s|note|c|\nRETRIEVE|a"})
+            client.get("/retrieve/a")
+            resp = client.get("/metrics")
+    finally:
+        app.dependency_overrides.clear()
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    series = parse_histograms(resp.text)
+    stages = {dict(labels)["stage"] for name, labels in series if name == "act_stage_seconds"}
+    assert {"parse", "process_model_output", "lock_wait", "save", "serialize", "write"} <= stages
+    assert ("act_request_seconds", (("method", "GET"), ("route", "/retrieve/{block_id}"))) in series
+    assert 'act_commands_total{type="retrieve"} 1' in resp.text
+
+
+def test_sampling_profiler_writes_collapsed_stacks(tmp_path: Path) -> None:
+    profiler = SamplingProfiler(tmp_path / "profile.txt", interval=0.001)
+    profiler.start()
+    deadline = time.perf_counter() + 0.1
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+    profiler.stop()
+    lines = (tmp_path / "profile.txt").read_text(encoding="utf-8").splitlines()
+    assert lines and any("test_sampling_profiler_writes_collapsed_stacks" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import math
+
+from act.models import ContextBlock, parse_epoch
+
+
+def test_context_block_is_compact_and_round_trips() -> None:
+    data = {"id": "b1", "content": "c", "summary": "s", "type": "note", "timestamp": "2020-01-01T00:00:00Z"}
+    block = ContextBlock.from_dict(data)
+    assert not hasattr(block, "__dict__")
+    assert block.tags == []
+    assert block.to_dict() == {**data, "tags": []}
+
+    other = ContextBlock.from_dict({**data, "type": "".join(["no", "te"]), "tags": ["".join(["t", "ag"])]})
+    assert other.type is block.type
+    assert other.tags[0] is ContextBlock.from_dict({**data, "tags": ["tag"]}).tags[0]
+
+    # to_dict is shallow but must not hand out the block's own tag list
+    other.to_dict()["tags"].append("x")
+    assert other.tags == ["tag"]
+
+
+def test_epoch_tracks_timestamp() -> None:
+    block = ContextBlock(id="b", content="", summary="", type="t", timestamp="1970-01-01T00:01:00Z")
+    assert block.epoch == 60
+    block.timestamp = "1970-01-01T01:00:00+01:00"
+    assert block.epoch == 0
+    assert parse_epoch("1970-01-01T00:00:10") == 10
+    assert math.isinf(parse_epoch("not a timestamp"))
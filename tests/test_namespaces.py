@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from typer.testing import CliRunner
+
+import act.server
+from act.cli import app as cli_app
+from act.namespaces import NamespacePool, namespace_path
+from act.server import app
+
+
+def test_namespace_path_and_validation(tmp_path: Path) -> None:
+    assert namespace_path(tmp_path / "store.json", "conv-1") == tmp_path / "store.ns" / "conv-1.json"
+    assert namespace_path(tmp_path / "store.db", "a.b_c") == tmp_path / "store.ns" / "a.b_c.db"
+    for bad in ["", "../x", "a/b", ".hidden", "a..b", "x" * 200]:
+        with pytest.raises(ValueError):
+            namespace_path(tmp_path / "store.json", bad)
+
+
+def test_pool_evicts_least_recently_used_idle_namespaces() -> None:
+    closed = []
+    pool = NamespacePool(lambda ns: f"store:{ns}", closed.append, max_open=2)
+    with pool.lease("a") as value:
+        assert value == "store:a"
+    with pool.lease("b"):
+        pass
+    with pool.lease("a"):
+        pass
+    with pool.lease("c"):
+        pass
+    assert closed == ["store:b"]
+    assert pool.open_namespaces() == ["a", "c"]
+
+    # A namespace in use is never closed, even when over the bound; d is released
+    # first, while a and c are still held, so it is the one to go
+    with pool.lease("a"), pool.lease("c"), pool.lease("d"):
+        assert len(pool) == 3
+    assert closed == ["store:b", "store:d"] and pool.open_namespaces() == ["a", "c"]
+    assert pool.opened == 4 and pool.evicted == 2
+
+
+def test_namespace_routes_are_isolated(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("ACT_STORE_PATH", str(tmp_path / "store.json"))
+    monkeypatch.setenv("ACT_MAX_NAMESPACES", "1")
+    monkeypatch.setattr(act.server, "_processor", None)
+    monkeypatch.setattr(act.server, "_namespaces", None)
+    with TestClient(app) as client:
+        client.post("/ns/alice/store", json={"id": "a", "summary": "s", "content": "from alice"})
+        client.post("/ns/bob/store", json={"id": "b", "summary": "s", "content": "from bob"})
+        client.post("/store", json={"id": "d", "summary": "s", "content": "default"})
+        assert [b["id"] for b in client.get("/ns/alice/blocks").json()] == ["a"]
+        assert [b["id"] for b in client.get("/ns/bob/blocks").json()] == ["b"]
+        assert [b["id"] for b in client.get("/blocks").json()] == ["d"]
+        assert client.get("/ns/bob/retrieve/a").status_code == 404
+        assert client.get("/ns/bad..name/blocks").status_code == 400
+        pool = act.server.namespace_pool()
+        assert len(pool) == 1 and pool.evicted >= 2
+    assert (tmp_path / "store.ns" / "alice.json").exists()
+    act.server.namespace_pool().close()
+
+
+def test_cli_namespace_flag(tmp_path: Path) -> None:
+    store = tmp_path / "store.json"
+    args = ["--namespace", "conv-7", "store", "x", "-s", "s", "-c", "c", "--store-path", str(store)]
+    assert CliRunner().invoke(cli_app, args).exit_code == 0
+    assert (tmp_path / "store.ns" / "conv-7.json").exists()
+    listed = CliRunner().invoke(cli_app, ["-N", "conv-7", "retrieve", "x", "--store-path", str(store)])
+    assert listed.exit_code == 0
+    assert CliRunner().invoke(cli_app, ["retrieve", "x", "--store-path", str(store)]).exit_code == 1
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from act.pagination import encode_cursor
+from act.storage import open_storage
+from helpers import make_block
+
+
+@pytest.mark.parametrize("name", ["store.json", "store.db", "store.shards"])
+def test_paging_walks_newest_first(tmp_path: Path, name: str) -> None:
+    store = open_storage(tmp_path / name)
+    for i in range(7):
+        store.upsert_block(
+            make_block(
+                f"b{i}",
+                "even" if i % 2 == 0 else "odd",
+                # b5 and b6 share a timestamp; ties are broken by id
+                timestamp=f"2020-01-0{min(i, 5) + 1}T00:00:00+00:00",
+            )
+        )
+
+    seen = []
+    cursor = None
+    while True:
+        page = store.list_blocks(limit=3, cursor=cursor)
+        seen.extend(b.id for b in page)
+        if len(page) < 3:
+            break
+        cursor = encode_cursor(page[-1])
+    assert seen == ["b6", "b5", "b4", "b3", "b2", "b1", "b0"]
+
+    window = store.list_blocks(since="2020-01-02T00:00:00+00:00", until="2020-01-05T00:00:00+00:00")
+    assert [b.id for b in window] == ["b3", "b2", "b1"]
+    assert [b.id for b in store.list_blocks(query="even", limit=2)] == ["b6", "b4"]
+
+    with pytest.raises(ValueError):
+        store.list_blocks(cursor="not-a-cursor")
+
+
+@pytest.mark.parametrize("name", ["store.json", "store.db"])
+def test_ordering_follows_instant_across_utc_offsets(tmp_path: Path, name: str) -> None:
+    store = open_storage(tmp_path / name)
+    # Lexically "05:30" sorts after "02:00", but 05:30+05:30 is 00:00 UTC
+    for block_id, timestamp in [
+        ("early", "2020-01-01T05:30:00+05:30"),
+        ("middle", "2020-01-01T01:00:00Z"),
+        ("late", "2020-01-01T02:00:00+00:00"),
+    ]:
+        store.upsert_block(make_block(block_id, timestamp=timestamp))
+
+    assert [b.id for b in store.list_blocks()] == ["late", "middle", "early"]
+    assert [b.id for b in store.list_blocks(since="2020-01-01T06:00:00+05:30")] == ["late", "middle"]
+    page = store.list_blocks(limit=1)
+    assert [b.id for b in store.list_blocks(cursor=encode_cursor(page[-1]))] == ["middle", "early"]
@@ -1,6 +1,11 @@
 from __future__ import annotations
 
-from act.parsing import extract_memory_commands, strip_spans
+import random
+import re
+from typing import List, Sequence, Tuple
+
+from act.models import MemoryCommand
+from act.parsing import _parse_command_text, extract_memory_commands, strip_spans
 
 
 def test_extract_from_code_fence() -> None:
@@ -32,4 +37,113 @@ def test_extract_inline_and_direct() -> None:
     assert types == ["RETRIEVE", "STORE"]
     cleaned = strip_spans(text, spans)
     assert "RETRIEVE|" not in cleaned
-    assert "STORE|" not in cleaned
\ No newline at end of file
+    assert "STORE|" not in cleaned
+
+
+# The original three-regex parser (plus SEARCH), kept as the oracle for differential tests.
+_REF_CODE_FENCE = re.compile(r"```MEMORY_CMD\s*\n([\s\S]*?)\n```", re.MULTILINE)
+_REF_INLINE_PREFIX = re.compile(r"^\s*MEMORY_CMD:\s*(.+)$", re.MULTILINE)
+_REF_DIRECT_CMD = re.compile(r"^\s*(STORE|RETRIEVE|SEARCH)\|.+$", re.MULTILINE)
+
+
+def _reference_merge(spans: Sequence[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    if not spans:
+        return []
+    sorted_spans = sorted(spans, key=lambda s: s[0])
+    merged: List[Tuple[int, int]] = []
+    current_start, current_end = sorted_spans[0]
+    for start, end in sorted_spans[1:]:
+        if start <= current_end:
+            current_end = max(current_end, end)
+        else:
+            merged.append((current_start, current_end))
+            current_start, current_end = start, end
+    merged.append((current_start, current_end))
+    return merged
+
+
+def _reference_extract(text: str) -> Tuple[List[MemoryCommand], List[Tuple[int, int]]]:
+    commands: List[MemoryCommand] = []
+    spans: List[Tuple[int, int]] = []
+    for pattern, group in ((_REF_CODE_FENCE, 1), (_REF_INLINE_PREFIX, 1)):
+        for match in pattern.finditer(text):
+            try:
+                commands.append(_parse_command_text(match.group(group)))
+            except Exception:
+                pass
+            spans.append((match.start(), match.end()))
+    covered = _reference_merge(spans)
+    for match in _REF_DIRECT_CMD.finditer(text):
+        span = (match.start(), match.end())
+        if any(span[0] >= cs and span[1] <= ce for cs, ce in covered):
+            continue
+        try:
+            commands.append(_parse_command_text(match.group(0)))
+        except Exception:
+            pass
+        spans.append(span)
+    return commands, _reference_merge(spans)
+
+
+def _reference_strip(text: str, spans: Sequence[Tuple[int, int]]) -> str:
+    cleaned = text
+    for start, end in sorted(spans, key=lambda s: s[0], reverse=True):
+        cleaned = cleaned[:start] + cleaned[end:]
+    return cleaned
+
+
+_FRAGMENTS = [
+    "plain text",
+    "",
+    "   ",
+    "\t",
+    " \r",
+    "\x0b\u2028",
+    "```MEMORY_CMD",
+    "```MEMORY_CMD  ",
+    "```MEMORY_CMD x",
+    "```",
+    "````",
+    "MEMORY_CMD: STORE|a|s|t|c|x,y",
+    "  MEMORY_CMD: RETRIEVE|a",
+    "MEMORY_CMD:",
+    "MEMORY_CMD:   ",
+    "MEMORY_CMD: nonsense",
+    "STORE|b|s|t|c|",
+    "STORE|short",
+    "STORE|",
+    "RETRIEVE|b",
+    "  RETRIEVE|c ",
+    "RETRIEVE|",
+    "SEARCH|deploy steps|3",
+    "MEMORY_CMD: SEARCH|notes",
+    "SEARCH||x",
+    "text STORE|not|a|line|start|x",
+    "text ```MEMORY_CMD",
+]
+
+
+def _random_text(rng: random.Random) -> str:
+    parts = [rng.choice(_FRAGMENTS) for _ in range(rng.randint(0, 12))]
+    seps = ["\n", "\n", "\n", "\n\n", " ", ""]
+    text = ""
+    for part in parts:
+        text += part + rng.choice(seps)
+    return text
+
+
+def test_scanner_matches_reference_parser() -> None:
+    rng = random.Random(1234)
+    for _ in range(20000):
+        text = _random_text(rng)
+        commands, spans = extract_memory_commands(text)
+        ref_commands, ref_spans = _reference_extract(text)
+        assert spans == ref_spans, text
+        assert [vars(c) for c in commands] == [vars(c) for c in ref_commands], text
+        assert strip_spans(text, spans) == _reference_strip(text, ref_spans), text
+
+
+def test_strip_spans_handles_overlaps_like_before() -> None:
+    text = "0123456789"
+    assert strip_spans(text, [(0, 5), (3, 8)]) == _reference_strip(text, [(0, 5), (3, 8)])
+    assert strip_spans(text, [(6, 8), (1, 2)]) == "0234589"
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from act.cli import app as cli_app
+from act.mapped_storage import MappedStorage, _ContentFile
+from act.processor import ACTProcessor
+from act.retention import RetentionPolicy, Sweeper, block_size, parse_duration, sweep
+from act.storage import JsonStorage
+from helpers import make_block
+
+NOW = 1_700_000_000.0  # 2023-11-14T22:13:20Z
+
+
+def _stamp(age: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(NOW - age))
+
+
+def test_policy_parsing() -> None:
+    assert parse_duration("90s") == 90 and parse_duration("2h") == 7200 and parse_duration(30) == 30
+    policy = RetentionPolicy.from_dict({"default": {"max_blocks": 3}, "tags": {"Temp": {"max_age": "1d"}}})
+    assert policy.default.max_blocks == 3 and policy.tags["temp"].max_age == 86400
+    for bad in [{"default": {"max_size": 1}}, {"types": {"x": {"max_age": "soon"}}}, {"default": {"max_blocks": -1}}]:
+        with pytest.raises(ValueError):
+            RetentionPolicy.from_dict(bad)
+
+
+def test_age_quota_and_size_limits(tmp_path: Path) -> None:
+    storage = JsonStorage(tmp_path / "store.json")
+    storage.put_many(
+        [
+            make_block("scratch-old", "x", "", type="scratch", timestamp=_stamp(7200)),
+            make_block("scratch-new", "x", "", type="scratch", timestamp=_stamp(60)),
+            make_block("tmp", "x", "", timestamp=_stamp(600), tags=["ephemeral"]),
+            make_block("a", "x", "", timestamp=_stamp(500)),
+            make_block("b", "x", "", timestamp=_stamp(400)),
+            make_block("c", "x", "", timestamp=_stamp(300)),
+            make_block("big", "x" * 1000, "", timestamp=_stamp(200)),
+        ]
+    )
+    policy = RetentionPolicy.from_dict(
+        {
+            "default": {"max_blocks": 4, "max_bytes": 500},
+            "types": {"scratch": {"max_age": "1h"}},
+            "tags": {"ephemeral": {"max_age": 300}},
+        }
+    )
+    processor = ACTProcessor(storage=storage)
+    processor.process_model_output("RETRIEVE|a")  # now a is the most recently used
+
+    result = sweep(storage, policy, processor.access, now=NOW, dry_run=True)
+    assert result.deleted == 5 and storage.get_block("scratch-old") is not None
+
+    # Expired blocks go first; then b, the least recently used, for the count, and
+    # c and big for the byte cap, while a was just retrieved
+    result = sweep(storage, policy, processor.access, batch_size=2, now=NOW)
+    assert sorted(b.id for b in storage.list_blocks()) == ["a", "scratch-new"]
+    assert result.reasons == {
+        "type=scratch max_age": 1,
+        "tag=ephemeral max_age": 1,
+        "store max_blocks": 1,
+        "store max_bytes": 2,
+    }
+    assert result.scanned == 7 and result.freed_bytes == 12 + 4 + 2 + 2 + 1003
+
+
+def test_byte_limits_count_stored_utf8_bytes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    assert block_size(make_block("id", "é" * 10, "")) == 2 + 20
+    storage = MappedStorage(tmp_path / "store.json")
+    content = "ü" * 100
+    storage.put_many(
+        [make_block("old", content, "", timestamp=_stamp(100)), make_block("new", content, "", timestamp=_stamp(0))]
+    )
+    # Planning uses the recorded lengths, never the data file
+    monkeypatch.setattr(_ContentFile, "read", lambda *args: pytest.fail("content was read"))
+    result = sweep(storage, RetentionPolicy.from_dict({"default": {"max_bytes": 300}}), now=NOW)
+    assert result.reasons == {"store max_bytes": 1} and result.freed_bytes == 3 + 200
+
+
+def test_sweeper_runs_in_background(tmp_path: Path) -> None:
+    storage = JsonStorage(tmp_path / "store.json")
+    old = make_block("old", "x", "", timestamp=_stamp(10 * 365 * 86400))
+    storage.put_many([old, make_block("new", "c", "", timestamp="2999-01-01T00:00:00+00:00")])
+    sweeper = Sweeper(storage, RetentionPolicy.from_dict({"default": {"max_age": "30d"}}), interval=0.01)
+    sweeper.start()
+    deadline = time.monotonic() + 5
+    while sweeper.deleted == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    sweeper.stop()
+    assert [b.id for b in storage.list_blocks()] == ["new"] and sweeper.last_error is None
+
+
+def test_gc_command(tmp_path: Path) -> None:
+    store = tmp_path / "store.json"
+    JsonStorage(store).put_many([make_block(f"b{i}", "x", "", timestamp=_stamp(100 * i)) for i in range(5)])
+    policy = tmp_path / "retention.json"
+    policy.write_text(json.dumps({"default": {"max_blocks": 2}}), encoding="utf-8")
+    runner = CliRunner()
+    args = ["gc", "--policy", str(policy), "--store-path", str(store)]
+    result = runner.invoke(cli_app, args + ["--dry-run"])
+    assert result.exit_code == 0 and "Would delete 3 of 5 blocks" in result.stdout
+    assert "Deleted 3 of 5 blocks" in runner.invoke(cli_app, args).stdout
+    assert sorted(b.id for b in JsonStorage(store).list_blocks()) == ["b0", "b1"]
+    assert runner.invoke(cli_app, ["gc", "--store-path", str(store)]).exit_code == 2
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from act.models import MemoryCommandType
+from act.parsing import extract_memory_commands
+from act.processor import ACTProcessor
+from act.server import app, get_processor
+from act.storage import JsonStorage, open_storage
+from act.vector_index import VectorIndex
+from helpers import make_block
+
+
+DOCS = [
+    make_block("deploy", "run migrations then restart the web workers", "deployment checklist"),
+    make_block("pasta", "boil the pasta and stir in the tomato sauce", "dinner recipe"),
+    make_block("db", "raise the connection pool and add an index on user id", "database tuning"),
+]
+
+
+def test_vector_index_ranks_and_updates_incrementally() -> None:
+    index = VectorIndex()
+    index.rebuild(DOCS)
+    assert index.search("how do we restart workers after migrations", 2)[0][0] == "deploy"
+    assert [hits[0][0] for hits in index.search_many(["tomato pasta", "connection pool index"], 1)] == ["pasta", "db"]
+
+    index.remove("pasta")
+    assert all(block_id != "pasta" for block_id, _ in index.search("tomato pasta", 3))
+    index.add(make_block("pasta", "grill the vegetables", "dinner recipe"))
+    assert index.search("grill vegetables", 1)[0][0] == "pasta"
+    assert len(index) == 3
+    assert index.search("zzz unrelated", 3) == []
+
+
+def test_search_command_parses_with_default_k() -> None:
+    commands, _ = extract_memory_commands("SEARCH|restart workers|2\nMEMORY_CMD: SEARCH|pasta")
+    assert [(c.type, c.query, c.top_k) for c in commands] == [
+        (MemoryCommandType.SEARCH, "pasta", 5),
+        (MemoryCommandType.SEARCH, "restart workers", 2),
+    ]
+    assert extract_memory_commands("SEARCH|q|zero")[0] == []
+
+
+@pytest.mark.parametrize("name", ["store.json", "store.db", "store.shards"])
+def test_processor_search_follows_storage_changes(tmp_path: Path, name: str) -> None:
+    processor = ACTProcessor(storage=open_storage(tmp_path / name))
+    for block in DOCS:
+        processor.storage.upsert_block(block)
+
+    result = processor.process_model_output("Let me check.\nSEARCH|database connection pool|1")
+    assert result.cleaned_text == "Let me check."
+    assert [b.id for b in result.searched_blocks] == ["db"]
+
+    # Writes after the index is built are picked up without a rebuild
+    processor.process_model_output("STORE|cache|caching notes|note|put redis in front of the database pool|")
+    processor.storage.delete_block("db")
+    assert [b.id for b, _ in processor.search("database pool", 3)] == ["cache"]
+
+
+def test_search_sees_other_process_writes(tmp_path: Path) -> None:
+    processor = ACTProcessor(storage=JsonStorage(tmp_path / "store.json"))
+    processor.search("anything")
+    JsonStorage(tmp_path / "store.json").upsert_block(DOCS[1])
+    assert [b.id for b, _ in processor.search("tomato sauce", 1)] == ["pasta"]
+
+
+def test_search_endpoint(tmp_path: Path) -> None:
+    processor = ACTProcessor(storage=JsonStorage(tmp_path / "store.json"))
+    for block in DOCS:
+        processor.storage.upsert_block(block)
+    app.dependency_overrides[get_processor] = lambda: processor
+    try:
+        with TestClient(app) as client:
+            resp = client.get("/search", params={"q": "boil pasta", "k": 2})
+            assert resp.status_code == 200
+            hits = resp.json()
+            assert hits[0]["block"]["id"] == "pasta" and 0 < hits[0]["score"] <= 1
+            assert client.get("/search", params={"q": ""}).status_code == 422
+    finally:
+        app.dependency_overrides.clear()
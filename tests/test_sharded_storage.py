@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from act.cli import app
+from act.sharded_storage import ShardedStorage, shard_for
+from act.storage import JsonStorage, open_storage
+from helpers import make_block
+
+
+def test_write_touches_only_its_shard(tmp_path: Path) -> None:
+    store = ShardedStorage(tmp_path / "s.shards", shards=4)
+    store.upsert_block(make_block("x"))
+    written = sorted(p.name for p in store.path.glob("shard-*.json"))
+    assert written == [f"shard-{shard_for('x', 4):03d}.json"]
+    assert store.get_block("x") is not None
+
+
+def test_listing_matches_single_file_store(tmp_path: Path) -> None:
+    sharded = ShardedStorage(tmp_path / "s.shards", shards=5)
+    single = JsonStorage(tmp_path / "single.json")
+    for i in range(40):
+        day = i % 28 + 1
+        tags = ["a"] if day % 2 else ["b"]
+        block = make_block(f"b{i}", "needle" * (i % 3), timestamp=f"2020-01-{day:02d}T00:00:00Z", tags=tags)
+        sharded.upsert_block(block)
+        single.upsert_block(block)
+
+    for kwargs in [
+        {},
+        {"limit": 7},
+        {"tag": "b", "limit": 4},
+        {"query": "needle", "top_k": 5},
+        {"top_k": 3},
+        {"since": "2020-01-10T00:00:00Z", "until": "2020-01-20T00:00:00Z"},
+    ]:
+        assert [b.id for b in sharded.list_blocks(**kwargs)] == [b.id for b in single.list_blocks(**kwargs)]
+
+    assert sharded.delete_block("b3")
+    sharded.clear()
+    assert sharded.list_blocks() == []
+
+
+def test_shard_count_is_fixed_by_manifest(tmp_path: Path) -> None:
+    ShardedStorage(tmp_path / "s.shards", shards=4)
+    assert ShardedStorage(tmp_path / "s.shards").shard_count == 4
+    with pytest.raises(ValueError):
+        ShardedStorage(tmp_path / "s.shards", shards=8)
+
+
+def test_reshard_command_copies_store(tmp_path: Path) -> None:
+    source = JsonStorage(tmp_path / "store.json")
+    for i in range(10):
+        source.upsert_block(make_block(f"b{i}"))
+
+    dest = tmp_path / "store.shards"
+    result = CliRunner().invoke(app, ["reshard", str(source.path), str(dest), "--shards", "3"])
+    assert result.exit_code == 0, result.output
+
+    store = open_storage(dest)
+    assert isinstance(store, ShardedStorage) and store.shard_count == 3
+    assert {b.id for b in store.list_blocks()} == {f"b{i}" for i in range(10)}
+
+    again = CliRunner().invoke(app, ["reshard", str(source.path), str(dest)])
+    assert again.exit_code == 1
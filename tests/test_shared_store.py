@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import multiprocessing
+from pathlib import Path
+
+import pytest
+
+from act.storage import JsonStorage, WalJsonStorage
+from helpers import make_block
+
+
+BACKENDS = [JsonStorage, WalJsonStorage]
+
+
+def _writer(cls: type, path: str, prefix: str, count: int) -> None:
+    store = cls(storage_path=Path(path))
+    for i in range(count):
+        store.upsert_block(make_block(f"{prefix}{i}"))
+    store.close()
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+def test_instances_see_each_others_writes(tmp_path: Path, cls: type) -> None:
+    path = tmp_path / "store.json"
+    a = cls(storage_path=path)
+    b = cls(storage_path=path)
+
+    a.upsert_block(make_block("from-a"))
+    assert b.get_block("from-a") is not None
+
+    b.upsert_block(make_block("from-b"))
+    b.delete_block("from-a")
+    assert a.get_block("from-a") is None
+    assert [blk.id for blk in a.list_blocks()] == ["from-b"]
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+def test_stale_writer_does_not_drop_other_writes(tmp_path: Path, cls: type) -> None:
+    path = tmp_path / "store.json"
+    a = cls(storage_path=path)
+    b = cls(storage_path=path)
+    a.upsert_block(make_block("one"))
+    # b has not read since a wrote; its write must merge rather than overwrite
+    b.upsert_block(make_block("two"))
+
+    reopened = cls(storage_path=path)
+    assert {blk.id for blk in reopened.list_blocks()} == {"one", "two"}
+
+
+def test_wal_picks_up_compaction_by_other_instance(tmp_path: Path) -> None:
+    path = tmp_path / "store.json"
+    a = WalJsonStorage(storage_path=path)
+    b = WalJsonStorage(storage_path=path)
+    a.upsert_block(make_block("one"))
+    assert b.get_block("one") is not None
+    a.upsert_block(make_block("one", "updated"))
+    a.compact()
+    block = b.get_block("one")
+    assert block is not None and block.content == "updated"
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+def test_concurrent_processes_lose_no_writes(tmp_path: Path, cls: type) -> None:
+    path = tmp_path / "store.json"
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_writer, args=(cls, str(path), f"p{n}-", 20)) for n in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+        assert p.exitcode == 0
+
+    store = cls(storage_path=path)
+    assert len(store.list_blocks()) == 60
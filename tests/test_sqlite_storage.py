@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from act.sqlite_storage import SqliteStorage
+from act.storage import open_storage
+from helpers import make_block
+
+
+def test_sqlite_crud_and_queries(tmp_path: Path) -> None:
+    store = open_storage(tmp_path / "store.db")
+    assert isinstance(store, SqliteStorage)
+
+    for block_id, content, day, tags in [
+        ("a", "The Quick brown fox", 1, ["Animals"]),
+        ("b", "lazy dog", 2, ["animals", "x"]),
+        ("c", "nothing here", 3, []),
+    ]:
+        timestamp = f"2020-01-{day:02d}T00:00:00Z"
+        store.upsert_block(make_block(block_id, content, f"summary of {block_id}", timestamp=timestamp, tags=tags))
+
+    assert [b.id for b in store.list_blocks()] == ["c", "b", "a"]
+    assert [b.id for b in store.list_blocks(query="quick")] == ["a"]
+    assert [b.id for b in store.list_blocks(query="do")] == ["b"]
+    assert [b.id for b in store.list_blocks(tag="ANIMALS")] == ["b", "a"]
+    assert [b.id for b in store.list_blocks(query="summary of", tag="x")] == ["b"]
+    assert [b.id for b in store.list_blocks(query="summary of c", top_k=5)] == ["c"]
+    assert len(store.list_blocks(top_k=2)) == 2
+
+    # Updates replace both the FTS row and the tag rows
+    store.upsert_block(
+        make_block("a", "slow turtle", summary="summary of a", timestamp="2020-01-04T00:00:00Z", tags=["reptiles"])
+    )
+    assert store.list_blocks(query="quick") == []
+    assert [b.id for b in store.list_blocks(tag="animals")] == ["b"]
+    assert store.get_block("a").tags == ["reptiles"]
+
+    assert store.delete_block("b") is True
+    assert store.delete_block("b") is False
+    assert store.list_blocks(tag="animals") == []
+    store.close()
+
+    reopened = SqliteStorage(tmp_path / "store.db")
+    assert {b.id for b in reopened.list_blocks()} == {"a", "c"}
+    reopened.clear()
+    assert reopened.list_blocks() == []
+
+
+def test_sqlite_adds_epoch_to_existing_store(tmp_path: Path) -> None:
+    import sqlite3
+
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(str(path))
+    conn.execute(
+        "CREATE TABLE blocks (id TEXT PRIMARY KEY, summary TEXT NOT NULL, type TEXT NOT NULL, "
+        "content TEXT NOT NULL, timestamp TEXT NOT NULL, tags TEXT NOT NULL)"
+    )
+    conn.execute("CREATE INDEX blocks_timestamp_id ON blocks(timestamp, id)")
+    conn.executemany(
+        "INSERT INTO blocks VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            ("a", "s", "note", "x", "2020-01-01T05:30:00+05:30", "[]"),
+            ("b", "s", "note", "y", "2020-01-01T01:00:00Z", "[]"),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+    store = SqliteStorage(path)
+    assert [b.id for b in store.list_blocks()] == ["b", "a"]
@@ -27,4 +27,37 @@ def test_storage_crud(tmp_path: Path) -> None:
 
     removed = store.delete_block("test1")
     assert removed is True
-    assert store.get_block("test1") is None
\ No newline at end of file
+    assert store.get_block("test1") is None
+
+
+def test_storage_index_follows_updates(tmp_path: Path) -> None:
+    store = JsonStorage(storage_path=tmp_path / "store.json")
+    store.upsert_block(
+        ContextBlock(id="a", content="red apple", summary="fruit", type="note", timestamp="1", tags=["Food"])
+    )
+    store.upsert_block(
+        ContextBlock(id="b", content="green apple apple", summary="apple", type="note", timestamp="2", tags=["food"])
+    )
+    assert [b.id for b in store.list_blocks(query="APPLE")] == ["b", "a"]
+    assert [b.id for b in store.list_blocks(tag="FOOD")] == ["b", "a"]
+    assert [b.id for b in store.list_blocks(query="ap")] == ["b", "a"]
+
+    store.upsert_block(
+        ContextBlock(id="b", content="pear", summary="fruit", type="note", timestamp="3", tags=["misc"])
+    )
+    assert [b.id for b in store.list_blocks(query="apple")] == ["a"]
+    assert [b.id for b in store.list_blocks(tag="food")] == ["a"]
+
+    store.delete_block("a")
+    assert store.list_blocks(query="apple") == []
+    assert store.list_blocks(tag="food") == []
+
+
+def test_storage_top_k_ranks_by_relevance(tmp_path: Path) -> None:
+    store = JsonStorage(storage_path=tmp_path / "store.json")
+    for i, content in enumerate(["apple", "apple apple apple", "pear", "apple apple"]):
+        store.upsert_block(
+            ContextBlock(id=f"b{i}", content=content, summary="", type="note", timestamp=str(i), tags=[])
+        )
+    assert [b.id for b in store.list_blocks(query="apple", top_k=2)] == ["b1", "b3"]
+    assert [b.id for b in store.list_blocks(top_k=2)] == ["b3", "b2"]
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import random
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from act.processor import ACTProcessor, StreamingACTProcessor
+from act.server import app, get_processor
+from act.storage import JsonStorage
+
+sys.path.insert(0, str(Path(__file__).parent))
+from test_parsing import _random_text  # noqa: E402
+
+
+def _command_keys(result_commands) -> list:
+    return sorted((c.type.value, c.raw) for c in result_commands)
+
+
+def test_streaming_matches_batch(tmp_path: Path) -> None:
+    processor = ACTProcessor(storage=JsonStorage(storage_path=tmp_path / "store.json"))
+    rng = random.Random(42)
+    for _ in range(3000):
+        text = _random_text(rng)
+        expected = processor.process_model_output(text)
+
+        stream = StreamingACTProcessor(processor)
+        pieces = []
+        commands = []
+        pos = 0
+        while pos < len(text):
+            step = rng.randint(1, 8)
+            result = stream.feed(text[pos : pos + step])
+            pieces.append(result.cleaned_text)
+            commands.extend(result.commands)
+            pos += step
+        result = stream.close()
+        pieces.append(result.cleaned_text)
+        commands.extend(result.commands)
+
+        assert "".join(pieces) == expected.cleaned_text, text
+        assert _command_keys(commands) == _command_keys(expected.commands), text
+
+
+def test_streaming_runs_commands_before_the_end(tmp_path: Path) -> None:
+    storage = JsonStorage(storage_path=tmp_path / "store.json")
+    stream = StreamingACTProcessor(ACTProcessor(storage=storage))
+
+    assert stream.feed("Hello ").cleaned_text == ""
+    result = stream.feed("world\n```MEMORY_CMD\nSTORE|s1|sum|note|body|a\n")
+    assert result.cleaned_text == "Hello world"
+    assert storage.get_block("s1") is None
+
+    result = stream.feed("```\nmore")
+    assert [b.id for b in result.stored_blocks] == ["s1"]
+    assert storage.get_block("s1") is not None
+    assert stream.close().cleaned_text == "\n\nmore"
+
+
+def test_sse_endpoint(tmp_path: Path) -> None:
+    processor = ACTProcessor(storage=JsonStorage(storage_path=tmp_path / "store.json"))
+    app.dependency_overrides[get_processor] = lambda: processor
+    try:
+        client = TestClient(app)
+        chunks = [b"Intro\nSTORE|k1|s|note|c|", b"t\nRETRIEVE|k1\n", b"Outro"]
+        with client.stream("POST", "/process_output/stream", content=iter(chunks)) as response:
+            assert response.headers["content-type"].startswith("text/event-stream")
+            body = "".join(response.iter_text())
+    finally:
+        app.dependency_overrides.clear()
+
+    events = [e for e in body.split("\n\n") if e]
+    kinds = [e.split("\n")[0] for e in events]
+    assert kinds[0] == "event: text"
+    assert "event: stored" in kinds
+    assert "event: retrieved" in kinds
+    assert kinds[-1] == "event: done"
+    assert processor.storage.get_block("k1") is not None
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import io
+import json
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from typer.testing import CliRunner
+
+from act.cli import app as cli_app
+from act.processor import ACTProcessor
+from act.server import app, get_processor
+from act.sqlite_storage import SqliteStorage
+from act.storage import JsonStorage
+from act.transfer import export_blocks, import_blocks
+from helpers import make_block
+
+
+def _blocks(n: int):
+    return [
+        make_block(
+            f"b{i}",
+            f"content {i}",
+            f"s{i}",
+            timestamp=f"2024-01-01T00:00:{i:02d}+00:00",
+            tags=["even" if i % 2 == 0 else "odd"],
+        )
+        for i in range(n)
+    ]
+
+
+def test_export_import_round_trip_in_batches(tmp_path: Path) -> None:
+    source = JsonStorage(tmp_path / "source.json")
+    source.put_many(_blocks(25))
+    out = io.StringIO()
+    assert export_blocks(source, out, page_size=4) == 25
+    lines = out.getvalue().splitlines()
+    assert json.loads(lines[0])["id"] == "b24" and len(lines) == 25
+
+    dest = SqliteStorage(tmp_path / "dest.db")
+    commits = []
+    put_many = dest.put_many
+    dest.put_many = lambda blocks: (commits.append(len(blocks)), put_many(blocks))  # type: ignore[method-assign]
+    stats = import_blocks(dest, lines, batch_size=10)
+    assert (stats.read, stats.stored, stats.skipped) == (25, 25, 0)
+    assert commits == [10, 10, 5]
+    assert dest.get_block("b3") == source.get_block("b3")
+
+    dest.upsert_block(make_block("b0", "local edit", timestamp="2025-01-01"))
+    stats = import_blocks(dest, lines, mode="skip", batch_size=10)
+    assert (stats.stored, stats.skipped) == (0, 25)
+    assert dest.get_block("b0").content == "local edit"
+
+
+def test_malformed_line_keeps_earlier_batches(tmp_path: Path) -> None:
+    storage = JsonStorage(tmp_path / "store.json")
+    lines = [json.dumps(b.to_dict()) for b in _blocks(3)] + ["", "{not json"]
+    with pytest.raises(ValueError, match="line 5"):
+        import_blocks(storage, lines, batch_size=2)
+    assert [b.id for b in storage.list_blocks()] == ["b1", "b0"]
+
+
+def test_cli_export_and_import(tmp_path: Path) -> None:
+    JsonStorage(tmp_path / "source.json").put_many(_blocks(6))
+    dump = tmp_path / "dump.ndjson"
+    runner = CliRunner()
+    args = ["export", "--tag", "even", "-o", str(dump), "--store-path", str(tmp_path / "source.json")]
+    assert runner.invoke(cli_app, args).exit_code == 0
+    assert [json.loads(line)["id"] for line in dump.read_text(encoding="utf-8").splitlines()] == ["b4", "b2", "b0"]
+
+    dest = tmp_path / "dest.json"
+    result = runner.invoke(cli_app, ["import", str(dump), "--batch-size", "2", "--store-path", str(dest)])
+    assert result.exit_code == 0 and "Imported 3 of 3 blocks" in result.stdout
+    result = runner.invoke(cli_app, ["import", "-", "--mode", "skip", "--store-path", str(dest)], input=dump.read_text())
+    assert "(3 skipped)" in result.stdout
+    assert runner.invoke(cli_app, ["import", str(dump), "--mode", "merge", "--store-path", str(dest)]).exit_code == 2
+
+
+def test_server_export_and_import(tmp_path: Path) -> None:
+    storage = JsonStorage(tmp_path / "store.json")
+    storage.put_many(_blocks(4))
+    app.dependency_overrides[get_processor] = lambda: ACTProcessor(storage=storage)
+    try:
+        with TestClient(app) as client:
+            resp = client.get("/blocks:export", params={"tag": "odd"})
+            assert resp.headers["content-type"].startswith("application/x-ndjson")
+            assert [json.loads(line)["id"] for line in resp.text.splitlines()] == ["b3", "b1"]
+
+            body = '{"id": "new", "content": "c"}\n{"id": "b1", "content": "changed"}\n'
+            resp = client.post("/blocks:import", params={"mode": "skip"}, content=body)
+            assert resp.json() == {"read": 2, "stored": 1, "skipped": 1}
+            assert storage.get_block("b1").content == "content 1"
+            resp = client.post("/blocks:import", content='{"id": "x", "content": "c"}\n{"id": ""}')
+            assert resp.status_code == 400 and "line 2" in resp.json()["detail"]
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize(
+    "entry",
+    [
+        {"id": "a", "content": 5},
+        {"id": "a", "content": "c", "tags": "abc"},
+        {"id": "a", "content": "c", "summary": None},
+        {"id": 7, "content": "c"},
+    ],
+)
+def test_fields_of_the_wrong_type_reject_the_line(tmp_path: Path, entry: dict) -> None:
+    storage = JsonStorage(tmp_path / "store.json")
+    with pytest.raises(ValueError, match="line 2"):
+        import_blocks(storage, ['{"id": "ok", "content": "c"}', json.dumps(entry)])
+    assert storage.list_blocks() == [] and JsonStorage(tmp_path / "store.json").list_blocks() == []
+
+    blocks_file = tmp_path / "blocks.json"
+    blocks_file.write_text(json.dumps([entry]), encoding="utf-8")
+    result = CliRunner().invoke(cli_app, ["store", "-f", str(blocks_file), "--store-path", str(tmp_path / "store.json")])
+    assert result.exit_code == 1 and "entry 0" in result.stdout
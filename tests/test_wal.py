@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from act.storage import WalJsonStorage
+from helpers import make_block
+
+
+def test_wal_appends_and_replays(tmp_path: Path) -> None:
+    path = tmp_path / "store.json"
+    store = WalJsonStorage(storage_path=path)
+    store.upsert_block(make_block("b1"))
+    store.upsert_block(make_block("b2"))
+    store.delete_block("b1")
+
+    assert not path.exists()
+    assert len(store.log_path.read_text(encoding="utf-8").splitlines()) == 3
+
+    reopened = WalJsonStorage(storage_path=path)
+    assert reopened.get_block("b1") is None
+    assert reopened.get_block("b2") is not None
+
+
+def test_wal_compaction_truncates_log(tmp_path: Path) -> None:
+    path = tmp_path / "store.json"
+    store = WalJsonStorage(storage_path=path, compact_threshold=1)
+    store.upsert_block(make_block("b1", "x" * 100))
+    store.close()
+
+    assert path.exists()
+    assert store.log_path.stat().st_size == 0
+    reopened = WalJsonStorage(storage_path=path)
+    assert reopened.get_block("b1") is not None
+
+
+def test_wal_ignores_torn_trailing_record(tmp_path: Path) -> None:
+    path = tmp_path / "store.json"
+    store = WalJsonStorage(storage_path=path)
+    store.upsert_block(make_block("b1"))
+    with store.log_path.open("a", encoding="utf-8") as f:
+        f.write('{"op": "upsert", "block": {"id"')
+
+    reopened = WalJsonStorage(storage_path=path)
+    assert reopened.get_block("b1") is not None